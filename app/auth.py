@@ -1,12 +1,17 @@
 """Authentication and user management."""
 from __future__ import annotations
 
+import os
 from datetime import datetime
 from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 import bcrypt
 
+# Cost factor for new bcrypt hashes. Tune it per deployment so a check takes a few hundred
+# milliseconds on the production host; hashes made with another cost are replaced on their
+# owner's next successful login.
+BCRYPT_ROUNDS = int(os.getenv("PAYROLL_BCRYPT_ROUNDS", "12"))
 
 class User(Base):
     """User account for application access."""
@@ -26,13 +31,19 @@ class User(Base):
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash a password using bcrypt."""
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
     
     def verify_password(self, password: str) -> bool:
         """Verify a password against the stored hash."""
         return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
     
+    def password_needs_rehash(self) -> bool:
+        """Check whether the stored hash was made with a cost other than BCRYPT_ROUNDS."""
+        # Modular crypt format: $2b$<cost>$<salt and digest>
+        parts = self.password_hash.split("$")
+        return len(parts) != 4 or not parts[2].isdigit() or int(parts[2]) != BCRYPT_ROUNDS
+    
     @classmethod
     def create_user(cls, username: str, password: str, role: str = "user") -> User:
         """Create a new user with hashed password."""
@@ -0,0 +1,112 @@
+"""Small in-process caches that are cleared when a write to their source tables commits.
+
+Writes are noticed with engine events, so ORM flushes, bulk Core statements and textual DML issued
+through any engine all count. Writes that bypass the SQLAlchemy cursor (such as COPY on the raw
+driver connection) must be reported with ``note_table_write``. Each worker process keeps its own
+caches; the TTL bounds how long one worker can serve data written through another.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.elements import TextClause
+
+_DIRTY_TABLES_KEY = "write_invalidated_tables"
+# Stands in for "some table" when textual DML names its target in a way _TEXT_DML can't read
+_ANY_TABLE = "*"
+_TEXT_DML = re.compile(
+    r'\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+(?:["`]?\w+["`]?\.)?["`]?(\w+)', re.IGNORECASE
+)
+_TEXT_WRITE = re.compile(r"\s*(?:INSERT|UPDATE|DELETE|MERGE|TRUNCATE|COPY|REPLACE|UPSERT)\b", re.IGNORECASE)
+_caches: list["WriteInvalidatedCache"] = []
+
+
+class WriteInvalidatedCache:
+    """LRU cache with a TTL, emptied whenever a transaction writing to ``tables`` commits.
+
+    Every clear bumps ``generation``. A caller that reads the source tables and then caches the
+    result passes the generation it saw before reading to ``set``, so a value read before a
+    concurrent commit is dropped rather than outliving the clear for a full TTL.
+    """
+
+    def __init__(self, tables: Iterable[str], *, ttl_seconds: float, max_entries: int) -> None:
+        self.tables = frozenset(tables)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        _caches.append(self)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, *, generation: int | None = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+def note_table_write(conn: Connection, table_name: str) -> None:
+    """Record a write to ``table_name`` made outside SQLAlchemy's cursor, clearing on commit."""
+    conn.info.setdefault(_DIRTY_TABLES_KEY, set()).add(table_name)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _note_table_write(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+    if context is None:
+        return
+    compiled_statement = getattr(context.compiled, "statement", None)
+    if context.isinsert or context.isupdate or context.isdelete:
+        table = getattr(compiled_statement, "table", None)
+        if table is not None:
+            note_table_write(conn, table.name)
+    elif compiled_statement is None or isinstance(compiled_statement, TextClause):
+        # text() and exec_driver_sql(): read the target from the SQL itself
+        match = _TEXT_DML.match(statement)
+        if match:
+            note_table_write(conn, match.group(1).lower())
+        elif _TEXT_WRITE.match(statement):
+            note_table_write(conn, _ANY_TABLE)
+
+
+@event.listens_for(Engine, "commit")
+def _clear_on_commit(conn):
+    written = conn.info.pop(_DIRTY_TABLES_KEY, None)
+    if written:
+        for cache in _caches:
+            if _ANY_TABLE in written or cache.tables & written:
+                cache.clear()
+
+
+@event.listens_for(Engine, "rollback")
+def _discard_on_rollback(conn):
+    conn.info.pop(_DIRTY_TABLES_KEY, None)
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from datetime import date, datetime, time
+from functools import lru_cache
 from typing import Any, Iterable
 
 DISPLAY_DATE_FORMAT = "%m/%d/%Y"
@@ -58,7 +59,14 @@ def format_display_datetime(value: Any) -> str:
     return coerced.strftime(DISPLAY_DATETIME_FORMAT)
 
 
+@lru_cache(maxsize=256)
+def format_cycle_display(year: int, month: int) -> str:
+    """Format the first day of a payroll cycle month; cached since runs repeat the same cycles."""
+    return date(year, month, 1).strftime(DISPLAY_DATE_FORMAT)
+
+
 __all__ = [
+    "format_cycle_display",
     "format_display_date",
     "format_display_datetime",
 ]
@@ -3,15 +3,18 @@ from __future__ import annotations
 
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Iterable, Sequence, Dict
+from typing import Iterable, Iterator, Sequence, Dict
 
+import io
 import json
 
-from sqlalchemy import case, distinct, func, select
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import Row, case, delete, distinct, event, func, insert, lambda_stmt, select, update
+from sqlalchemy.orm import Session, joinedload, load_only, raiseload, selectinload
 
+from app.core.cache import note_table_write
 from app.core.payroll import ModelRecord, ValidationMessage
 from app.models import (
+    ActiveModelState,
     AdhocPayment,
     Model,
     ModelCompensationAdjustment,
@@ -30,6 +33,12 @@ ADVANCE_DEFAULT_MIN_FLOOR = Decimal("500")
 ADVANCE_DEFAULT_MAX_PER_RUN = Decimal("600")
 ADVANCE_DEFAULT_CAP_MULTIPLIER = Decimal("1.0")
 
+# Rows per multi-VALUES INSERT statement when bulk inserting
+BULK_INSERT_PAGE_SIZE = 1000
+
+# Bulk DELETE/UPDATE without per-row identity map bookkeeping; callers expire what they touched
+_SKIP_SESSION_SYNC = {"synchronize_session": False}
+
 
 def _model_filters(
     code: str | None = None,
@@ -59,11 +68,18 @@ def list_models(
     *,
     limit: int | None = None,
     offset: int = 0,
+    with_adjustments: bool = False,
+    with_payouts: bool = False,
 ) -> Sequence[Model]:
+    """List models, optionally selectin-loading collections the caller will walk for every row."""
     stmt = select(Model)
     filters = _model_filters(code=code, status=status, frequency=frequency, payment_method=payment_method)
     if filters:
         stmt = stmt.where(*filters)
+    if with_adjustments:
+        stmt = stmt.options(selectinload(Model.compensation_adjustments))
+    if with_payouts:
+        stmt = stmt.options(selectinload(Model.payouts).selectinload(Payout.schedule_run))
 
     stmt = stmt.order_by(Model.code)
     if offset:
@@ -199,10 +215,35 @@ def update_model(db: Session, model: Model, payload: ModelUpdate) -> Model:
 
 
 def delete_model(db: Session, model: Model) -> None:
+    _delete_model_rows(db, model.id)
+    db.expire(model)
     db.delete(model)
     db.commit()
 
 
+def _delete_model_rows(db: Session, model_id: int) -> None:
+    """Bulk delete every row owned by a model, one statement per table.
+
+    The relationships use passive_deletes, and SQLite only enforces ON DELETE CASCADE
+    with the foreign_keys pragma, so child rows are removed explicitly here.
+
+    Nothing syncs the identity map, so callers expire the parent before deleting it.
+    """
+    advance_ids = select(ModelAdvance.id).where(ModelAdvance.model_id == model_id).scalar_subquery()
+    statements = (
+        delete(PayoutAdvanceAllocation).where(PayoutAdvanceAllocation.model_id == model_id),
+        delete(AdvanceRepayment).where(AdvanceRepayment.advance_id.in_(advance_ids)),
+        delete(ModelAdvance).where(ModelAdvance.model_id == model_id),
+        # Payouts and validations only SET NULL at the database level, so delete them outright
+        delete(Payout).where(Payout.model_id == model_id),
+        delete(ValidationIssue).where(ValidationIssue.model_id == model_id),
+        delete(AdhocPayment).where(AdhocPayment.model_id == model_id),
+        delete(ModelCompensationAdjustment).where(ModelCompensationAdjustment.model_id == model_id),
+    )
+    for stmt in statements:
+        db.execute(stmt, execution_options=_SKIP_SESSION_SYNC)
+
+
 def get_effective_compensation_amount(db: Session, model: Model, target_date: date) -> Decimal:
     adjustment = (
         db.query(ModelCompensationAdjustment)
@@ -218,6 +259,11 @@ def get_effective_compensation_amount(db: Session, model: Model, target_date: da
     return Decimal(model.amount_monthly)
 
 
+def get_active_model_state(db: Session, model_id: int) -> ActiveModelState | None:
+    """Return today's effective pay and open advance balance for an active model, if it is active."""
+    return db.get(ActiveModelState, model_id)
+
+
 def create_compensation_adjustment(
     db: Session,
     model: Model,
@@ -245,20 +291,34 @@ def create_compensation_adjustment(
         )
         db.add(adjustment)
 
-    if effective_date <= date.today():
-        model.amount_monthly = amount_monthly
-        model.updated_at = datetime.now()
+    if apply_compensation_in_effect(model, effective_date, amount_monthly):
         db.add(model)
 
     db.flush()
     return adjustment
 
 
-def clear_schedule_data(db: Session, schedule_run: ScheduleRun) -> None:
+def apply_compensation_in_effect(
+    model: Model, effective_date: date, amount_monthly: Decimal, today: date | None = None
+) -> bool:
+    """Make an adjustment already in effect (dated today or earlier) the model's current rate.
+
+    Returns whether the model was changed.
+    """
+    if effective_date > (today or date.today()):
+        return False
+    model.amount_monthly = amount_monthly
+    model.updated_at = datetime.now()
+    return True
+
+
+def clear_schedule_data(db: Session, schedule_run: ScheduleRun, keep_payouts: bool = False) -> None:
     # Delete allocations linked to this run first to avoid stale planned deductions
     db.query(PayoutAdvanceAllocation).filter(PayoutAdvanceAllocation.schedule_run_id == schedule_run.id).delete(synchronize_session=False)
-    db.query(Payout).filter(Payout.schedule_run_id == schedule_run.id).delete()
-    db.query(ValidationIssue).filter(ValidationIssue.schedule_run_id == schedule_run.id).delete()
+    if not keep_payouts:
+        # Refreshes keep payouts so store_payouts can update them in place
+        db.query(Payout).filter(Payout.schedule_run_id == schedule_run.id).delete(synchronize_session=False)
+    db.query(ValidationIssue).filter(ValidationIssue.schedule_run_id == schedule_run.id).delete(synchronize_session=False)
     db.commit()
 
 
@@ -291,7 +351,7 @@ def create_schedule_run(
         include_inactive=include_inactive,
         summary_models_paid=summary.get("models_paid", 0),
         summary_total_payout=summary.get("total_payout", 0),
-        summary_frequency_counts=json.dumps(summary.get("frequency_counts", {})),
+        summary_frequency_counts=dict(summary.get("frequency_counts", {})),
         export_path=export_path,
     )
     db.add(run)
@@ -300,39 +360,66 @@ def create_schedule_run(
     return run
 
 
-def store_payouts(db: Session, run: ScheduleRun, payouts: Iterable[dict], amount_column: str, old_payout_data: dict | None = None) -> None:
-    """Store payouts, preserving status and notes from previous payouts when available."""
-    if old_payout_data is None:
-        old_payout_data = {}
-    
+def store_payouts(db: Session, run: ScheduleRun, payouts: Iterable[dict], amount_column: str) -> None:
+    """Store payouts for a run, updating rows that already exist for the same code and pay date.
+
+    Matched payouts keep their id, status, and notes; payouts the new schedule no longer
+    contains are deleted.
+    """
+    existing_by_key: dict[tuple[str, date], Payout] = {}
+    stale_ids: set[int] = set()
+    for existing in db.execute(select(Payout).where(Payout.schedule_run_id == run.id)).scalars():
+        key = (existing.code, existing.pay_date)
+        if key in existing_by_key:
+            stale_ids.add(existing.id)
+        else:
+            existing_by_key[key] = existing
+
+    payouts = list(payouts)
+    model_ids = _model_ids_by_code(db, {payout["Code"] for payout in payouts})
     objects: list[Payout] = []
+    new_rows: list[dict] = []
     for payout in payouts:
         pay_date = payout["Pay Date"]
         code = payout["Code"]
         key = (code, pay_date)
-        
-        # Check if this payout existed before - if so, preserve its status and notes
-        status = old_payout_data.get(key, {}).get("status", "not_paid")
-        notes = old_payout_data.get(key, {}).get("notes", payout.get("Notes"))
-        
-        payout_obj = Payout(
-            schedule_run_id=run.id,
-            model_id=_lookup_model_id(db, code),
-            pay_date=pay_date,
-            code=code,
-            real_name=payout["Real Name"],
-            working_name=payout["Working Name"],
-            payment_method=payout["Payment Method"],
-            payment_frequency=payout["Payment Frequency"],
-            amount=payout.get(amount_column),
-            notes=notes,
-            status=status,
-        )
+        values = {
+            "model_id": model_ids.get(code),
+            "real_name": payout["Real Name"],
+            "working_name": payout["Working Name"],
+            "payment_method": payout["Payment Method"],
+            "payment_frequency": payout["Payment Frequency"],
+            "amount": payout.get(amount_column),
+        }
+
+        payout_obj = existing_by_key.pop(key, None)
+        if payout_obj is not None:
+            for attribute, value in values.items():
+                setattr(payout_obj, attribute, value)
+        else:
+            new_rows.append(
+                {
+                    "schedule_run_id": run.id,
+                    "pay_date": pay_date,
+                    "code": code,
+                    "notes": payout.get("Notes"),
+                    "status": "not_paid",
+                    **values,
+                }
+            )
+            continue
         objects.append(payout_obj)
-    
-    db.add_all(objects)
-    # Assign IDs so we can link allocations to payouts
+
+    # Whatever was not matched above dropped out of the schedule
+    stale_ids.update(payout.id for payout in existing_by_key.values())
+    if stale_ids:
+        db.query(Payout).filter(Payout.id.in_(stale_ids)).delete(synchronize_session="fetch")
+
     db.flush()
+    if new_rows:
+        # RETURNING hands back persistent Payouts with IDs so allocations can link to them.
+        # Row order does not matter here; asking for it makes SQLite insert row by row.
+        objects.extend(db.scalars(insert(Payout).returning(Payout), new_rows).all())
 
     # Apply cash advance allocations and adjust payout amounts (net), without posting repayments yet
     _apply_advance_allocations_for_run(db, run, objects)
@@ -346,28 +433,131 @@ def store_validation_messages(
     records: Iterable[ModelRecord],
     include_inactive: bool,
 ) -> None:
-    issues: list[ValidationIssue] = []
-    for record in records:
-        is_active = record.status.lower() == "active"
-        if not is_active and not include_inactive:
-            continue
-        for message in record.validation_messages:
-            issues.append(
-                ValidationIssue(
-                    schedule_run_id=run.id,
-                    model_id=_lookup_model_id(db, record.code),
-                    severity=message.level,
-                    issue=message.text,
-                )
-            )
+    flagged = [
+        record
+        for record in records
+        if record.validation_messages and (include_inactive or record.status.lower() == "active")
+    ]
+    model_ids = _model_ids_by_code(db, {record.code for record in flagged})
+    issues = [
+        {
+            "schedule_run_id": run.id,
+            "model_id": model_ids.get(record.code),
+            "severity": message.level,
+            "issue": message.text,
+        }
+        for record in flagged
+        for message in record.validation_messages
+    ]
     if issues:
-        db.add_all(issues)
+        bulk_insert(db, ValidationIssue, issues)
         db.commit()
 
 
-def _lookup_model_id(db: Session, code: str) -> int | None:
-    stmt = select(Model.id).where(Model.code == code)
-    return db.execute(stmt).scalar_one_or_none()
+def bulk_insert(db: Session, model: type, rows: list[dict], page_size: int = BULK_INSERT_PAGE_SIZE) -> None:
+    """Insert plain row dicts with batched multi-VALUES statements instead of one INSERT per ORM object.
+
+    Use this when the caller does not need the generated primary keys back.
+    """
+    if not rows:
+        return
+    stmt = insert(model).execution_options(insertmanyvalues_page_size=page_size)
+    db.execute(stmt, rows)
+
+
+def _copy_field(value: object) -> str:
+    """Render one COPY CSV field: unquoted empty is NULL, anything else is quoted."""
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_psycopg2(dbapi_connection, sql: str, data: io.StringIO) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(sql, data)
+    finally:
+        cursor.close()
+
+
+def _copy_psycopg(dbapi_connection, sql: str, data: io.StringIO) -> None:
+    with dbapi_connection.cursor() as cursor, cursor.copy(sql) as copy:
+        copy.write(data.getvalue())
+
+
+# COPY FROM STDIN per PostgreSQL driver; a bare postgresql:// URL resolves to psycopg (3)
+_COPY_WRITERS = {"psycopg2": _copy_psycopg2, "psycopg": _copy_psycopg}
+
+
+def bulk_copy(db: Session, model: type, rows: list[dict]) -> None:
+    """Load plain row dicts with COPY FROM STDIN on PostgreSQL, otherwise via bulk_insert.
+
+    COPY skips Python-side column defaults, so every row must carry the same keys, covering
+    each NOT NULL column without a server default. Values still go through the column
+    types' bind processing (e.g. payout status names become their codes).
+    """
+    if not rows:
+        return
+    bind = db.get_bind()
+    copy_rows = _COPY_WRITERS.get(bind.dialect.driver)
+    if copy_rows is None:
+        bulk_insert(db, model, rows)
+        return
+
+    table = model.__table__
+    names = list(rows[0])
+    processors = [table.c[name].type.bind_processor(bind.dialect) for name in names]
+    buffer = io.StringIO()
+    for row in rows:
+        values = (row[name] for name in names)
+        buffer.write(
+            ",".join(
+                _copy_field(processor(value) if processor and value is not None else value)
+                for processor, value in zip(processors, values)
+            )
+        )
+        buffer.write("\n")
+    buffer.seek(0)
+
+    column_list = ", ".join(names)
+    connection = db.connection()
+    copy_rows(connection.connection, f"COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+    # COPY runs on the driver connection, out of sight of the engine events the caches watch
+    note_table_write(connection, table.name)
+
+
+# The code -> id cache lives on Session.info, so it never outlives a request or leaks
+# between worker processes. Any write that could rename or remove a model drops it.
+_MODEL_IDS_CACHE_KEY = "model_ids_by_code"
+
+
+def _model_ids_by_code(db: Session, codes: Iterable[str]) -> dict[str, int]:
+    """Resolve model ids for many codes, querying only codes this session hasn't resolved yet."""
+    cache: dict[str, int] = db.info.setdefault(_MODEL_IDS_CACHE_KEY, {})
+    wanted = {code for code in codes if code}
+    missing = [code for code in wanted if code not in cache]
+    if missing:
+        stmt = select(Model.code, Model.id).where(Model.code.in_(missing))
+        cache.update((code, model_id) for code, model_id in db.execute(stmt))
+    return {code: cache[code] for code in wanted if code in cache}
+
+
+@event.listens_for(Session, "after_flush")
+def _forget_model_ids_after_flush(session: Session, flush_context) -> None:
+    if any(isinstance(obj, Model) for obj in (*session.dirty, *session.deleted)):
+        session.info.pop(_MODEL_IDS_CACHE_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _forget_model_ids_on_bulk_write(orm_execute_state) -> None:
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and mapper is not None and mapper.class_ is Model:
+        orm_execute_state.session.info.pop(_MODEL_IDS_CACHE_KEY, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_model_ids_after_rollback(session: Session) -> None:
+    session.info.pop(_MODEL_IDS_CACHE_KEY, None)
 
 
 def list_schedule_runs(
@@ -397,11 +587,15 @@ def list_payouts_for_run(
     payment_method: str | None = None,
     status: str | None = None,
     pay_date: date | None = None,
+    *,
+    with_models: bool = False,
 ) -> Sequence[Payout]:
     stmt = select(Payout).where(
         Payout.schedule_run_id == run_id,
         Payout.model_id.isnot(None),
     )
+    if with_models:
+        stmt = stmt.options(selectinload(Payout.model))
 
     if code:
         stmt = stmt.where(Payout.code.ilike(f"%{code.strip()}%"))
@@ -430,27 +624,31 @@ def list_payouts_for_model(
     frequency: str | None = None,
     payment_method: str | None = None,
 ) -> Sequence[Payout]:
-    stmt = select(Payout).where(Payout.model_id == model_id)
+    # lambda_stmt caches the constructed statement per filter combination, so repeat calls
+    # skip building the Core expression and computing its compiled-cache key
+    stmt = lambda_stmt(lambda: select(Payout).where(Payout.model_id == model_id))
 
     if pay_date is not None:
-        stmt = stmt.where(Payout.pay_date == pay_date)
+        stmt += lambda s: s.where(Payout.pay_date == pay_date)
 
     if status:
-        stmt = stmt.where(Payout.status == status)
+        stmt += lambda s: s.where(Payout.status == status)
 
     if frequency:
-        stmt = stmt.where(Payout.payment_frequency == frequency)
+        stmt += lambda s: s.where(Payout.payment_frequency == frequency)
 
     if payment_method:
-        stmt = stmt.where(Payout.payment_method == payment_method)
+        stmt += lambda s: s.where(Payout.payment_method == payment_method)
 
-    stmt = stmt.order_by(Payout.pay_date.desc(), Payout.id.desc())
+    stmt += lambda s: s.order_by(Payout.pay_date.desc(), Payout.id.desc())
     return db.execute(stmt).scalars().all()
 
 
 def list_validation_for_run(db: Session, run_id: int) -> Sequence[ValidationIssue]:
-    stmt = select(ValidationIssue).where(ValidationIssue.schedule_run_id == run_id).order_by(
-        ValidationIssue.severity, ValidationIssue.id
+    stmt = lambda_stmt(
+        lambda: select(ValidationIssue)
+        .where(ValidationIssue.schedule_run_id == run_id)
+        .order_by(ValidationIssue.severity, ValidationIssue.id)
     )
     return db.execute(stmt).scalars().all()
 
@@ -472,10 +670,26 @@ def update_payout(db: Session, payout: Payout, note: str | None, status: str) ->
 
 
 def delete_schedule_run(db: Session, run: ScheduleRun) -> None:
+    _delete_run_rows(db, [run.id])
+    db.expire(run)
     db.delete(run)
     db.commit()
 
 
+def _delete_run_rows(db: Session, run_ids: Sequence[int]) -> None:
+    """Bulk delete the payouts, validations, and allocations belonging to schedule runs.
+
+    Nothing syncs the identity map, so callers expire the runs before deleting them.
+    """
+    statements = (
+        delete(PayoutAdvanceAllocation).where(PayoutAdvanceAllocation.schedule_run_id.in_(run_ids)),
+        delete(ValidationIssue).where(ValidationIssue.schedule_run_id.in_(run_ids)),
+        delete(Payout).where(Payout.schedule_run_id.in_(run_ids)),
+    )
+    for stmt in statements:
+        db.execute(stmt, execution_options=_SKIP_SESSION_SYNC)
+
+
 def total_paid_by_model(db: Session, model_ids: Sequence[int]) -> dict[int, Decimal]:
     if not model_ids:
         return {}
@@ -608,6 +822,22 @@ def payout_dates_for_run(db: Session, run_id: int) -> list[date]:
     return [row[0] for row in db.execute(stmt).all() if row[0]]
 
 
+def paid_totals_by_run(db: Session, run_ids: Sequence[int]) -> dict[int, Decimal]:
+    """Paid payout totals (model-linked rows only) for several runs in one grouped query."""
+    if not run_ids:
+        return {}
+    stmt = (
+        select(Payout.schedule_run_id, func.coalesce(func.sum(Payout.amount), 0))
+        .where(
+            Payout.schedule_run_id.in_(run_ids),
+            Payout.status == "paid",
+            Payout.model_id.isnot(None),
+        )
+        .group_by(Payout.schedule_run_id)
+    )
+    return {run_id: Decimal(total) for run_id, total in db.execute(stmt).all()}
+
+
 def dashboard_summary(db: Session) -> dict[str, Decimal | int | date | None]:
     # Model counts with a single grouped query to reduce round-trips
     model_counts_stmt = select(Model.status, func.count(Model.id)).group_by(Model.status)
@@ -824,22 +1054,16 @@ def recent_schedule_runs(db: Session, limit: int = 5) -> Sequence[ScheduleRun]:
 
 
 def top_paid_models(db: Session, limit: int = 5) -> list[tuple[Model, Decimal]]:
+    # lifetime_paid is maintained by triggers on payouts, so this reads the head of
+    # ix_models_lifetime_paid instead of summing every paid payout
     stmt = (
-        select(Model, func.coalesce(func.sum(Payout.amount), 0).label("total_paid"))
-        .join(Payout, Payout.model_id == Model.id)
-        .where(Payout.status == "paid")
-        .group_by(Model.id)
-        .order_by(func.coalesce(func.sum(Payout.amount), 0).desc())
+        select(Model)
+        .options(load_only(Model.code, Model.working_name, Model.status, Model.lifetime_paid), raiseload("*"))
+        .where(Model.lifetime_paid > 0)
+        .order_by(Model.lifetime_paid.desc(), Model.id)
         .limit(limit)
     )
-    results = db.execute(stmt).all()
-    output: list[tuple[Model, Decimal]] = []
-    for model, total in results:
-        if isinstance(total, Decimal):
-            output.append((model, total))
-        else:
-            output.append((model, Decimal(total)))
-    return output
+    return [(model, Decimal(model.lifetime_paid)) for model in db.execute(stmt).scalars()]
 
 
 def recent_validation_issues(db: Session, limit: int = 5) -> Sequence[ValidationIssue]:
@@ -848,9 +1072,15 @@ def recent_validation_issues(db: Session, limit: int = 5) -> Sequence[Validation
 
 
 def pending_adhoc_payments(db: Session, limit: int = 6) -> Sequence[AdhocPayment]:
+    # The dashboard only shows the model's code and name; the many-to-one join brings them
+    # back in the same query, and raiseload turns any other relationship access into an error
+    # rather than a lazy SELECT per payment.
     stmt = (
         select(AdhocPayment)
-        .options(selectinload(AdhocPayment.model))
+        .options(
+            joinedload(AdhocPayment.model).load_only(Model.code, Model.working_name),
+            raiseload("*"),
+        )
         .where(AdhocPayment.status == "pending")
         .order_by(AdhocPayment.pay_date.asc(), AdhocPayment.id.asc())
     )
@@ -864,8 +1094,8 @@ def get_paid_payouts_for_model(db: Session, model_id: int) -> Sequence[Payout]:
     Get all paid payouts for a model, sorted by pay date descending.
     This is the unified source of truth for payment history.
     """
-    stmt = (
-        select(Payout)
+    stmt = lambda_stmt(
+        lambda: select(Payout)
         .where(Payout.model_id == model_id)
         .where(Payout.status == "paid")
         .order_by(Payout.pay_date.desc())
@@ -873,6 +1103,31 @@ def get_paid_payouts_for_model(db: Session, model_id: int) -> Sequence[Payout]:
     return db.execute(stmt).scalars().all()
 
 
+def iter_paid_payout_export_rows(
+    db: Session,
+    code: str | None = None,
+    status: str | None = None,
+    frequency: str | None = None,
+    payment_method: str | None = None,
+    *,
+    batch_size: int = 500,
+) -> Iterator[Row]:
+    """Yield (model_id, pay_date, amount, status, notes) for the paid payouts of the filtered models.
+
+    Rows follow list_models' order (model code), newest payment first within a model, and are
+    fetched ``batch_size`` at a time, so a caller can merge them with the model list as it goes.
+    """
+    stmt = (
+        select(Payout.model_id, Payout.pay_date, Payout.amount, Payout.status, Payout.notes)
+        .join(Model, Model.id == Payout.model_id)
+        .where(Payout.status == "paid", *_model_filters(code, status, frequency, payment_method))
+        .order_by(Model.code, Payout.pay_date.desc())
+    )
+    result = db.execute(stmt, execution_options={"yield_per": batch_size})
+    for partition in result.partitions():
+        yield from partition
+
+
 def find_duplicate_payouts(
     db: Session, 
     model_id: int, 
@@ -1096,19 +1351,10 @@ def purge_model_hard(db: Session, model_id: int) -> dict[str, Decimal | int | st
 
     # Perform deletes in a transaction
     try:
-        # Delete payouts and validations that reference this model (FK is SET NULL otherwise)
-        db.query(Payout).filter(Payout.model_id == model_id).delete(synchronize_session=False)
-        db.query(ValidationIssue).filter(ValidationIssue.model_id == model_id).delete(synchronize_session=False)
-
-        # Delete associated adhoc payments and adjustments (FKs are CASCADE, but do explicitly for SQLite)
-        db.query(AdhocPayment).filter(AdhocPayment.model_id == model_id).delete(synchronize_session=False)
-        db.query(ModelCompensationAdjustment).filter(ModelCompensationAdjustment.model_id == model_id).delete(synchronize_session=False)
-
-        # Finally delete the model
-        model = get_model(db, model_id)
-        if model:
-            db.delete(model)
+        _delete_model_rows(db, model_id)
 
+        # Finally delete the model; children are already gone so no FK order remains
+        db.execute(delete(Model).where(Model.id == model_id), execution_options=_SKIP_SESSION_SYNC)
         db.commit()
     except Exception:
         db.rollback()
@@ -1123,7 +1369,8 @@ def log_admin_action(db: Session, user_id: int | None, action: str, details: dic
     payload = AuditLog(
         user_id=user_id,
         action=action,
-        details=json.dumps(details or {}),
+        # Compact separators keep audit rows small; default=str covers Decimal/date values
+        details=json.dumps(details or {}, separators=(",", ":"), default=str),
     )
     db.add(payload)
     db.commit()
@@ -1131,18 +1378,14 @@ def log_admin_action(db: Session, user_id: int | None, action: str, details: dic
 
 def cleanup_empty_runs(db: Session) -> dict[str, int | list[int]]:
     """Delete schedule runs that have zero payouts. Returns count and ids."""
-    runs = db.execute(select(ScheduleRun.id)).scalars().all()
-    deleted_ids: list[int] = []
-    for run_id in runs:
-        count = db.execute(
-            select(func.count()).where(Payout.schedule_run_id == run_id)
-        ).scalar_one() or 0
-        if count == 0:
-            run = get_schedule_run(db, run_id)
-            if run:
-                db.delete(run)
-                deleted_ids.append(run_id)
+    has_payouts = select(Payout.id).where(Payout.schedule_run_id == ScheduleRun.id).exists()
+    deleted_ids = list(db.execute(select(ScheduleRun.id).where(~has_payouts)).scalars())
     if deleted_ids:
+        _delete_run_rows(db, deleted_ids)
+        db.execute(
+            delete(ScheduleRun).where(ScheduleRun.id.in_(deleted_ids)),
+            execution_options=_SKIP_SESSION_SYNC,
+        )
         db.commit()
     return {"deleted_runs": len(deleted_ids), "run_ids": deleted_ids}
 
@@ -1164,10 +1407,10 @@ def cleanup_orphans(db: Session) -> dict[str, int]:
 # --- Cash Advances CRUD ----------------------------------------------------
 
 def list_advances_for_model(db: Session, model_id: int, status: str | None = None) -> Sequence[ModelAdvance]:
-    stmt = select(ModelAdvance).where(ModelAdvance.model_id == model_id)
+    stmt = lambda_stmt(lambda: select(ModelAdvance).where(ModelAdvance.model_id == model_id))
     if status:
-        stmt = stmt.where(ModelAdvance.status == status)
-    stmt = stmt.order_by(ModelAdvance.created_at.desc())
+        stmt += lambda s: s.where(ModelAdvance.status == status)
+    stmt += lambda s: s.order_by(ModelAdvance.created_at.desc())
     return db.execute(stmt).scalars().all()
 
 
@@ -1176,13 +1419,9 @@ def get_advance(db: Session, advance_id: int) -> ModelAdvance | None:
 
 
 def outstanding_advance_total(db: Session, model_id: int) -> Decimal:
-    stmt = (
-        select(func.coalesce(func.sum(ModelAdvance.amount_remaining), 0))
-        .where(ModelAdvance.model_id == model_id)
-        .where(ModelAdvance.status.in_(["approved", "active"]))
-    )
-    value = db.execute(stmt).scalar_one() or 0
-    return Decimal(value)
+    # Trigger-maintained sum of approved/active advance balances, a primary key read instead of an aggregate
+    value = db.execute(select(Model.active_advance_remaining).where(Model.id == model_id)).scalar_one_or_none()
+    return Decimal(value or 0)
 
 
 def create_advance(
@@ -1288,15 +1527,18 @@ def _apply_advance_allocations_for_run(db: Session, run: ScheduleRun, payouts: l
         if not p.model_id:
             continue
         by_model.setdefault(p.model_id, []).append(p)
+    allocations: list[dict] = []
+    planned_at = datetime.now()
     for model_id, rows in by_model.items():
         rows.sort(key=lambda x: (x.pay_date, x.id))
         # Fetch active advances
         advances = list(
             db.execute(
-                select(ModelAdvance).where(
-                    ModelAdvance.model_id == model_id,
-                    ModelAdvance.status == "active",
-                ).order_by(ModelAdvance.created_at.asc())
+                lambda_stmt(
+                    lambda: select(ModelAdvance)
+                    .where(ModelAdvance.model_id == model_id, ModelAdvance.status == "active")
+                    .order_by(ModelAdvance.created_at.asc())
+                )
             ).scalars().all()
         )
         if not advances:
@@ -1334,21 +1576,24 @@ def _apply_advance_allocations_for_run(db: Session, run: ScheduleRun, payouts: l
                 temp_remaining[adv.id] = temp_remaining[adv.id] - planned
 
                 # Create allocation row
-                alloc = PayoutAdvanceAllocation(
-                    schedule_run_id=run.id,
-                    payout_id=payout.id,
-                    model_id=model_id,
-                    advance_id=adv.id,
-                    planned_amount=planned,
+                allocations.append(
+                    {
+                        "schedule_run_id": run.id,
+                        "payout_id": payout.id,
+                        "model_id": model_id,
+                        "advance_id": adv.id,
+                        "planned_amount": planned,
+                        "created_at": planned_at,
+                    }
                 )
-                db.add(alloc)
 
                 # Stop if no more room on this payout
                 if (available - total_deducted) <= 0:
                     break
 
-        # Persist adjustments for this model's payouts before next model
-        db.flush()
+    # Persist adjusted payout amounts, then write every allocation in one batch
+    db.flush()
+    bulk_insert(db, PayoutAdvanceAllocation, allocations)
 
 
 def delete_advance(db: Session, advance: ModelAdvance) -> None:
@@ -1367,26 +1612,75 @@ def delete_advance(db: Session, advance: ModelAdvance) -> None:
 
 
 def _realize_allocations_for_paid_payout(db: Session, payout: Payout) -> None:
+    payout_id = payout.id
     allocations = db.execute(
-        select(PayoutAdvanceAllocation).where(PayoutAdvanceAllocation.payout_id == payout.id)
+        lambda_stmt(lambda: select(PayoutAdvanceAllocation).where(PayoutAdvanceAllocation.payout_id == payout_id))
     ).scalars().all()
     if not allocations:
         return
     # If repayments already exist for this payout, skip (idempotent)
     existing = db.execute(
-        select(AdvanceRepayment).where(AdvanceRepayment.payout_id == payout.id)
+        lambda_stmt(lambda: select(AdvanceRepayment).where(AdvanceRepayment.payout_id == payout_id))
     ).scalars().first()
     if existing:
         return
 
+    # Apply every allocation against a local balance, then write repayments and balances in batches
+    advance_ids = {alloc.advance_id for alloc in allocations}
+    remaining: dict[int, Decimal] = {
+        adv_id: Decimal(balance or 0)
+        for adv_id, balance in db.execute(
+            select(ModelAdvance.id, ModelAdvance.amount_remaining).where(ModelAdvance.id.in_(advance_ids))
+        ).all()
+    }
+    repayments: list[dict] = []
+    repaid_at = datetime.now()
     for alloc in allocations:
-        adv = get_advance(db, alloc.advance_id)
-        if not adv:
+        if alloc.advance_id not in remaining:
             continue
-        record_advance_repayment(db, adv, amount=Decimal(alloc.planned_amount or 0), source="auto", payout=payout)
-        # Allocation will be deleted by cascade when clearing runs is not guaranteed, so delete explicitly on realize
-        db.delete(alloc)
-    db.flush()
+        applied = min(Decimal(alloc.planned_amount or 0), remaining[alloc.advance_id])
+        if applied <= 0:
+            continue
+        remaining[alloc.advance_id] -= applied
+        repayments.append(
+            {
+                "advance_id": alloc.advance_id,
+                "payout_id": payout_id,
+                "amount": applied,
+                "source": "auto",
+                "created_at": repaid_at,
+            }
+        )
+
+    if remaining:
+        _update_advance_balances(db, remaining, updated_at=repaid_at)
+    bulk_insert(db, AdvanceRepayment, repayments)
+    # Allocation will be deleted by cascade when clearing runs is not guaranteed, so delete explicitly on realize
+    db.execute(
+        delete(PayoutAdvanceAllocation).where(PayoutAdvanceAllocation.payout_id == payout_id),
+        execution_options=_SKIP_SESSION_SYNC,
+    )
+
+
+def _update_advance_balances(db: Session, remaining: dict[int, Decimal], *, updated_at: datetime) -> None:
+    """Write new advance balances as one executemany UPDATE and close the advances that reached zero."""
+    db.execute(
+        update(ModelAdvance),
+        [
+            {"id": adv_id, "amount_remaining": max(balance, Decimal("0")), "updated_at": updated_at}
+            for adv_id, balance in remaining.items()
+        ],
+    )
+    db.execute(
+        update(ModelAdvance)
+        .where(
+            ModelAdvance.id.in_(list(remaining)),
+            ModelAdvance.amount_remaining <= 0,
+            ModelAdvance.status != "closed",
+        )
+        .values(amount_remaining=Decimal("0"), status="closed", updated_at=updated_at),
+        execution_options=_SKIP_SESSION_SYNC,
+    )
 
 
 # --- Export helpers for advances ------------------------------------------
@@ -1,14 +1,20 @@
 """Database configuration for the payroll web application."""
 from __future__ import annotations
 
+import hashlib
 import os
+from concurrent.futures import Executor
 from datetime import date, datetime
 from pathlib import Path
 from urllib.parse import urlsplit, urlunsplit
-from typing import Generator
+from typing import Callable, Generator, Mapping, TypeVar
 
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import Integer, create_engine, inspect, make_url, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
 
 DEFAULT_SQLITE_PATH = Path("data/payroll.db")
 DEFAULT_SQLITE_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -33,10 +39,38 @@ def _mask_db_url(url: str) -> str:
         return url
 
 
+# Compiled statement cache entries; comfortably above the distinct statements this schema emits
+QUERY_CACHE_SIZE = 1200
+
+DB_POOL_SIZE = int(os.getenv("PAYROLL_DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("PAYROLL_DB_MAX_OVERFLOW", "40"))
+
+
 def _create_engine(url: str):
-    """Create a SQLAlchemy engine for the given URL, handling sqlite connect args."""
-    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
-    return create_engine(url, connect_args=connect_args, future=True)
+    """Create a SQLAlchemy engine for the given URL, handling sqlite connect args and pool sizing."""
+    if url.startswith("sqlite"):
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            future=True,
+            insertmanyvalues_page_size=1000,
+            query_cache_size=QUERY_CACHE_SIZE,
+        )
+
+    options = {}
+    if make_url(url).get_dialect().driver == "psycopg2":
+        # Also batch executemany UPDATE/DELETE, not only multi-VALUES INSERTs
+        options["executemany_mode"] = "values_plus_batch"
+    return create_engine(
+        url,
+        future=True,
+        insertmanyvalues_page_size=1000,
+        query_cache_size=QUERY_CACHE_SIZE,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        **options,
+    )
 
 
 # Try to create the engine and verify a quick connection. On local development
@@ -82,12 +116,57 @@ def get_session() -> Generator[Session, None, None]:
         session.close()
 
 
+_T = TypeVar("_T")
+
+
+def run_parallel_reads(
+    db: Session,
+    jobs: Mapping[str, Callable[[Session], _T]],
+    executor: Executor,
+) -> dict[str, _T]:
+    """Run independent read-only jobs concurrently, each on its own session of ``db``'s bind.
+
+    Latency becomes the slowest job rather than the sum. Pools that hand every thread the same
+    connection (StaticPool, SingletonThreadPool) run the jobs in order on ``db`` instead.
+
+    ``db``'s read transaction is rolled back first so its connection goes back to the pool: a
+    caller parked on the executor while holding a connection could starve the workers it waits
+    for. Loaded objects are set aside during the rollback, so they stay loaded. A session with
+    pending changes keeps its transaction and runs the jobs in order instead.
+    """
+    bind = db.get_bind()
+    if (
+        len(jobs) < 2
+        or isinstance(getattr(bind, "pool", None), (StaticPool, SingletonThreadPool))
+        or db.new
+        or db.dirty
+        or db.deleted
+    ):
+        return {name: job(db) for name, job in jobs.items()}
+
+    if db.in_transaction():
+        loaded = list(db.identity_map.values())
+        db.expunge_all()
+        db.rollback()
+        db.add_all(loaded)
+
+    def _run(job: Callable[[Session], _T]) -> _T:
+        with Session(bind=bind) as worker_db:
+            return job(worker_db)
+
+    futures = {name: executor.submit(_run, job) for name, job in jobs.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
 def init_db() -> None:
     """Ensure database tables exist and create default admin user if needed."""
 
     from app import models  # noqa: F401  (import ensures model metadata is registered)
     from app.auth import User
 
+    # Configure every mapper now so the first request doesn't pay for relationship setup
+    Base.registry.configure()
+
     # Try to create all tables; if they already exist, skip
     try:
         Base.metadata.create_all(bind=engine, checkfirst=True)
@@ -126,6 +205,269 @@ def init_db() -> None:
         ensure_schema_updates()
 
 
+def ensure_declared_indexes() -> None:
+    """Create any model-declared index missing from existing tables.
+
+    create_all only adds indexes together with a new table. On PostgreSQL the index is built
+    CONCURRENTLY (outside a transaction) so live payout writes are not blocked.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    is_postgres = engine.dialect.name == "postgresql"
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            if not is_postgres and index.dialect_kwargs.get("postgresql_using"):
+                # PostgreSQL-only access methods such as BRIN have no equivalent elsewhere
+                continue
+            print(f"[ensure_schema_updates] Creating index {index.name} on {table.name}")
+            if is_postgres and not index.unique:
+                ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+                ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                    connection.execute(text(ddl))
+            else:
+                index.create(bind=engine)
+
+
+def ensure_payout_status_codes() -> None:
+    """Convert payout status names left by older databases to their SMALLINT codes.
+
+    PostgreSQL changes the column type in place. SQLite cannot alter column types,
+    so its values are rewritten and stay readable through the VARCHAR column.
+    """
+    from app.models import PayoutStatus
+
+    mapping = " ".join(f"WHEN '{status.name.lower()}' THEN {int(status)}" for status in PayoutStatus)
+    names = ", ".join(f"'{status.name.lower()}'" for status in PayoutStatus)
+    status_column = next(
+        column for column in inspect(engine).get_columns("payouts") if column["name"] == "status"
+    )
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            if isinstance(status_column["type"], Integer):
+                return
+            print("[ensure_schema_updates] Converting payouts.status to SMALLINT codes")
+            connection.execute(text("ALTER TABLE payouts ALTER COLUMN status DROP DEFAULT"))
+            connection.execute(
+                text(f"ALTER TABLE payouts ALTER COLUMN status TYPE SMALLINT USING (CASE status {mapping} END)")
+            )
+            connection.execute(text("ALTER TABLE payouts ALTER COLUMN status SET DEFAULT 0"))
+        else:
+            connection.execute(
+                text(f"UPDATE payouts SET status = CASE status {mapping} END WHERE status IN ({names})")
+            )
+
+
+TEXT_COLUMNS = {
+    "models": ("real_name", "working_name", "payment_method", "crypto_wallet"),
+    "payouts": ("real_name", "working_name", "payment_method"),
+    "audit_logs": ("action",),
+}
+
+
+def ensure_text_columns() -> None:
+    """Convert bounded VARCHAR columns listed in TEXT_COLUMNS to TEXT on PostgreSQL."""
+    inspector = inspect(engine)
+    for table_name, column_names in TEXT_COLUMNS.items():
+        columns = {column["name"]: column for column in inspector.get_columns(table_name)}
+        pending = [
+            name
+            for name in column_names
+            if name in columns and getattr(columns[name]["type"], "length", None) is not None
+        ]
+        if not pending:
+            continue
+        print(f"[ensure_schema_updates] Converting {table_name}.{', '.join(pending)} to TEXT")
+        alterations = ", ".join(f"ALTER COLUMN {name} TYPE TEXT" for name in pending)
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {table_name} {alterations}"))
+
+
+# Recomputes the cached open advance balance for the models row aliased as ``models``
+_ADVANCE_REMAINING_REFRESH = """
+    UPDATE models SET active_advance_remaining = (
+        SELECT COALESCE(SUM(a.amount_remaining), 0)
+        FROM model_advances a
+        WHERE a.model_id = models.id AND a.status IN ('approved', 'active')
+    )
+"""
+
+
+def _lifetime_paid_refresh() -> str:
+    """Statement recomputing models.lifetime_paid from the model's paid payouts."""
+    from app.models import PayoutStatus
+
+    return f"""
+    UPDATE models SET lifetime_paid = (
+        SELECT COALESCE(SUM(p.amount), 0)
+        FROM payouts p
+        WHERE p.model_id = models.id AND p.status = {int(PayoutStatus.PAID)}
+    )
+"""
+
+
+def _create_model_refresh_triggers(
+    connection: Connection,
+    *,
+    table: str,
+    trigger: str,
+    function: str,
+    columns: str,
+    refresh: str,
+    row_filter: str | None = None,
+) -> None:
+    """Create row triggers on ``table`` that run ``refresh`` for each affected model_id.
+
+    Each change recomputes the model's value through the model_id index instead of applying
+    deltas, so status transitions stay correct. ``row_filter`` is a condition on ``{row}``
+    (OLD or NEW); rows failing it on both sides cannot change the value and skip the refresh.
+
+    Every worker calls this at startup, so triggers already matching the definition are left
+    alone: dropping one takes an exclusive lock on ``table`` that queues behind long reads.
+    """
+
+    def _passes(row: str) -> str:
+        return f"({row_filter.format(row=row)})" if row_filter else "TRUE"
+
+    if connection.dialect.name == "postgresql":
+        function_ddl = f"""
+                CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP <> 'INSERT' THEN
+                        IF {_passes("OLD")} THEN
+                            {refresh} WHERE id = OLD.model_id;
+                        END IF;
+                    END IF;
+                    IF TG_OP <> 'DELETE' THEN
+                        IF {_passes("NEW")} THEN
+                            {refresh} WHERE id = NEW.model_id;
+                        END IF;
+                    END IF;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+                """
+        trigger_ddl = (
+            f"CREATE TRIGGER {trigger} AFTER INSERT OR DELETE OR UPDATE OF {columns} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+        )
+        # The installed definition is fingerprinted in the trigger's comment
+        fingerprint = hashlib.sha256(f"{function_ddl}\n{trigger_ddl}".encode()).hexdigest()[:16]
+        installed = text(
+            "SELECT obj_description(t.oid, 'pg_trigger') FROM pg_trigger t "
+            "WHERE t.tgname = :trigger AND t.tgrelid = CAST(:table AS regclass)"
+        )
+        params = {"trigger": trigger, "table": table}
+        if connection.execute(installed, params).scalar() == fingerprint:
+            return
+        # Workers boot together; only one replaces the function and trigger, the others recheck
+        connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:trigger))"), params)
+        if connection.execute(installed, params).scalar() == fingerprint:
+            return
+        connection.execute(text(function_ddl))
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger} ON {table}"))
+        connection.execute(text(trigger_ddl))
+        connection.execute(text(f"COMMENT ON TRIGGER {trigger} ON {table} IS '{fingerprint}'"))
+    else:
+        # SQLite triggers handle a single event each, and sqlite_master keeps their DDL verbatim
+        installed = dict(
+            connection.execute(
+                text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table"),
+                {"table": table},
+            ).all()
+        )
+        events = {
+            "ins": ("INSERT", _passes("NEW"), "NEW.model_id"),
+            "upd": (f"UPDATE OF {columns}", f"{_passes('OLD')} OR {_passes('NEW')}", "OLD.model_id, NEW.model_id"),
+            "del": ("DELETE", _passes("OLD"), "OLD.model_id"),
+        }
+        for suffix, (event, condition, model_ids) in events.items():
+            when = f"WHEN {condition} " if row_filter else ""
+            trigger_ddl = (
+                f"CREATE TRIGGER {trigger}_{suffix} AFTER {event} ON {table} "
+                f"{when}BEGIN {refresh} WHERE id IN ({model_ids}); END"
+            )
+            if installed.get(f"{trigger}_{suffix}") == trigger_ddl:
+                continue
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}_{suffix}"))
+            connection.execute(text(trigger_ddl))
+
+
+def ensure_advance_remaining_triggers() -> None:
+    """Create or update the triggers keeping models.active_advance_remaining in sync with model_advances."""
+    with engine.begin() as connection:
+        _create_model_refresh_triggers(
+            connection,
+            table="model_advances",
+            trigger="trg_model_advances_remaining",
+            function="refresh_model_advance_remaining",
+            columns="model_id, amount_remaining, status",
+            refresh=_ADVANCE_REMAINING_REFRESH,
+        )
+
+
+def ensure_lifetime_paid_triggers() -> None:
+    """Create or update the triggers keeping models.lifetime_paid in sync with paid payouts.
+
+    Only rows that are (or were) paid can move the total, so schedule generation inserting
+    unpaid payouts never touches models.
+    """
+    from app.models import PayoutStatus
+
+    with engine.begin() as connection:
+        _create_model_refresh_triggers(
+            connection,
+            table="payouts",
+            trigger="trg_payouts_lifetime_paid",
+            function="refresh_model_lifetime_paid",
+            columns="model_id, amount, status",
+            refresh=_lifetime_paid_refresh(),
+            row_filter=f"{{row}}.status = {int(PayoutStatus.PAID)}",
+        )
+
+
+ACTIVE_MODEL_STATE_VIEW = "v_active_model_state"
+
+
+def ensure_active_model_state_view() -> None:
+    """(Re)create the view joining active models with their current pay and open advances.
+
+    Correlated subqueries keep the definition portable between SQLite and PostgreSQL
+    (SQLite has no LATERAL). The view is dropped first so definition changes apply on startup.
+    """
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP VIEW IF EXISTS {ACTIVE_MODEL_STATE_VIEW}"))
+        connection.execute(
+            text(
+                f"""
+                CREATE VIEW {ACTIVE_MODEL_STATE_VIEW} AS
+                SELECT
+                    m.id AS model_id,
+                    m.code AS code,
+                    m.payment_frequency AS payment_frequency,
+                    COALESCE(
+                        (
+                            SELECT a.amount_monthly
+                            FROM model_compensation_adjustments a
+                            WHERE a.model_id = m.id AND a.effective_date <= CURRENT_DATE
+                            ORDER BY a.effective_date DESC
+                            LIMIT 1
+                        ),
+                        m.amount_monthly
+                    ) AS effective_amount,
+                    m.active_advance_remaining AS advance_remaining
+                FROM models m
+                WHERE m.status = 'Active'
+                """
+            )
+        )
+
+
 def ensure_schema_updates() -> None:
     """Ensure all required columns exist in the database tables."""
     from app.models import Model, ModelCompensationAdjustment
@@ -168,22 +510,102 @@ def ensure_schema_updates() -> None:
         if "status" not in payouts_columns:
             print("[ensure_schema_updates] Adding status column to payouts table")
             with engine.begin() as connection:
-                connection.execute(text("ALTER TABLE payouts ADD COLUMN status VARCHAR(20) NOT NULL DEFAULT 'not_paid'"))
+                connection.execute(text("ALTER TABLE payouts ADD COLUMN status SMALLINT NOT NULL DEFAULT 0"))
                 print("[ensure_schema_updates] Successfully added status column to payouts table")
+        ensure_payout_status_codes()
     except Exception as e:
         print(f"[ensure_schema_updates] Error updating payouts table: {e}")
     
+    # Store schedule run frequency counts as JSONB on PostgreSQL (older tables used TEXT)
+    try:
+        if engine.dialect.name == "postgresql":
+            run_columns = {column["name"]: column for column in inspector.get_columns("schedule_runs")}
+            counts_column = run_columns.get("summary_frequency_counts")
+            if counts_column is not None and not isinstance(counts_column["type"], JSONB):
+                print("[ensure_schema_updates] Converting schedule_runs.summary_frequency_counts to JSONB")
+                with engine.begin() as connection:
+                    connection.execute(
+                        text(
+                            "ALTER TABLE schedule_runs ALTER COLUMN summary_frequency_counts "
+                            "TYPE JSONB USING summary_frequency_counts::jsonb"
+                        )
+                    )
+    except Exception as e:
+        print(f"[ensure_schema_updates] Error updating schedule_runs table: {e}")
+
+    # Ensure models table caches the open advance balance, backfilled and kept current by triggers
+    try:
+        models_columns = {column["name"] for column in inspector.get_columns("models")}
+        if "active_advance_remaining" not in models_columns:
+            print("[ensure_schema_updates] Adding active_advance_remaining column to models table")
+            with engine.begin() as connection:
+                connection.execute(
+                    text("ALTER TABLE models ADD COLUMN active_advance_remaining NUMERIC(12, 2) NOT NULL DEFAULT 0")
+                )
+                connection.execute(text(_ADVANCE_REMAINING_REFRESH))
+        ensure_advance_remaining_triggers()
+    except Exception as e:
+        print(f"[ensure_schema_updates] Error maintaining active_advance_remaining: {e}")
+
+    # Ensure models table caches its lifetime paid total, backfilled and kept current by triggers
+    try:
+        models_columns = {column["name"] for column in inspector.get_columns("models")}
+        if "lifetime_paid" not in models_columns:
+            print("[ensure_schema_updates] Adding lifetime_paid column to models table")
+            with engine.begin() as connection:
+                connection.execute(
+                    text("ALTER TABLE models ADD COLUMN lifetime_paid NUMERIC(12, 2) NOT NULL DEFAULT 0")
+                )
+                connection.execute(text(_lifetime_paid_refresh()))
+        ensure_lifetime_paid_triggers()
+    except Exception as e:
+        print(f"[ensure_schema_updates] Error maintaining lifetime_paid: {e}")
+
     # Ensure models table has crypto_wallet column
     try:
         models_columns = {column["name"] for column in inspector.get_columns("models")}
         if "crypto_wallet" not in models_columns:
             print("[ensure_schema_updates] Adding crypto_wallet column to models table")
             with engine.begin() as connection:
-                connection.execute(text("ALTER TABLE models ADD COLUMN crypto_wallet VARCHAR(200)"))
+                connection.execute(text("ALTER TABLE models ADD COLUMN crypto_wallet TEXT"))
                 print("[ensure_schema_updates] Successfully added crypto_wallet column to models table")
     except Exception as e:
         print(f"[ensure_schema_updates] Error updating models table: {e}")
-    
+
+    # Ensure maintenance_tasks has the heartbeat the runner refreshes while a job executes
+    try:
+        task_columns = {column["name"] for column in inspector.get_columns("maintenance_tasks")}
+        if "heartbeat_at" not in task_columns:
+            print("[ensure_schema_updates] Adding heartbeat_at column to maintenance_tasks table")
+            with engine.begin() as connection:
+                connection.execute(text("ALTER TABLE maintenance_tasks ADD COLUMN heartbeat_at TIMESTAMP"))
+                connection.execute(text("UPDATE maintenance_tasks SET heartbeat_at = created_at"))
+    except Exception as e:
+        print(f"[ensure_schema_updates] Error updating maintenance_tasks table: {e}")
+
+    # Free-text columns are TEXT now. On PostgreSQL VARCHAR -> TEXT is a catalog-only change;
+    # SQLite never enforced the VARCHAR length, so it needs nothing.
+    try:
+        if engine.dialect.name == "postgresql":
+            ensure_text_columns()
+    except Exception as e:
+        print(f"[ensure_schema_updates] Error converting text columns: {e}")
+
+    # Create indexes declared on the models that an older database is missing
+    try:
+        with engine.begin() as connection:
+            # Superseded by the partial ix_login_attempts_failed index
+            connection.execute(text("DROP INDEX IF EXISTS idx_failed_attempts"))
+        ensure_declared_indexes()
+    except Exception as e:
+        print(f"[ensure_schema_updates] Error creating indexes: {e}")
+
+    # Rebuild the read-only active model state view
+    try:
+        ensure_active_model_state_view()
+    except Exception as e:
+        print(f"[ensure_schema_updates] Error creating {ACTIVE_MODEL_STATE_VIEW} view: {e}")
+
     # Ensure users table has security fields
     try:
         users_columns = {column["name"] for column in inspector.get_columns("users")}
@@ -1,17 +1,36 @@
 """Shared FastAPI dependencies."""
 from __future__ import annotations
 
+import hashlib
+import os
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
 
+from fastapi import Request
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
 from app.core.formatting import format_display_date, format_display_datetime
 from app import __version__
 from app.database import get_session
 
 TEMPLATES_PATH = Path(__file__).parent / "templates"
-templates = Jinja2Templates(directory=str(TEMPLATES_PATH))
+
+# Compiled templates are cached on disk (keyed by source checksum), so a fresh worker loads
+# bytecode instead of parsing every template. Outside development the template files never
+# change under a running worker, so the per-render mtime check is skipped as well.
+_DEV_ENVIRONMENTS = ("development", "dev", "local")
+_bytecode_dir = os.getenv("PAYROLL_JINJA_CACHE_DIR")
+if _bytecode_dir:
+    Path(_bytecode_dir).mkdir(parents=True, exist_ok=True)
+templates = Jinja2Templates(
+    env=Environment(
+        loader=FileSystemLoader(str(TEMPLATES_PATH)),
+        autoescape=True,
+        bytecode_cache=FileSystemBytecodeCache(_bytecode_dir),
+        auto_reload=os.getenv("ENVIRONMENT", "production").lower() in _DEV_ENVIRONMENTS,
+    )
+)
 
 
 def _format_money(value) -> str:
@@ -50,3 +69,26 @@ templates.env.globals["APP_VERSION"] = __version__
 templates.env.globals["APP_NAME"] = "Payroll Desk"
 
 get_db = get_session
+
+# Templates on the login and landing paths, compiled when a worker starts
+HOT_TEMPLATES = ("auth/login.html", "dashboard/index.html", "changelog.html")
+
+
+def warm_templates() -> None:
+    """Load the hot templates into the environment cache so first requests skip compilation."""
+    for name in HOT_TEMPLATES:
+        templates.env.get_template(name)
+
+
+def page_etag(*parts: object) -> str:
+    """Weak ETag for a rendered page, fingerprinting everything the template reads."""
+    digest = hashlib.blake2s(repr((__version__, *parts)).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already names this ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(tag.strip() in (etag, "*") for tag in header.split(","))
@@ -1,5 +1,6 @@
 """Data export helpers."""
 
+from .csv_stream import stream_csv
 from .xlsx import export_full_workbook
 
-__all__ = ["export_full_workbook"]
+__all__ = ["export_full_workbook", "stream_csv"]
@@ -0,0 +1,27 @@
+"""Chunked CSV encoding for streaming responses."""
+from __future__ import annotations
+
+import csv
+from io import StringIO
+from typing import Iterable, Iterator, Sequence
+
+CSV_CHUNK_SIZE = 8192
+
+
+def stream_csv(rows: Iterable[Sequence[object]], *, bom: bool = False) -> Iterator[bytes]:
+    """Encode CSV rows as UTF-8 in ~8 KB chunks, as the rows arrive.
+
+    ``bom`` leads the output with a byte order mark so Excel detects the encoding.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    if bom:
+        buffer.write("\ufeff")
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CSV_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
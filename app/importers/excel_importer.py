@@ -1,20 +1,23 @@
 """Utilities for importing models and payouts from Excel workbooks."""
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, replace
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
+import re
 from io import BytesIO
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable
 
+import numpy as np
 import pandas as pd
 from dateutil import parser as date_parser
+from sqlalchemy import case, func, insert, select, update
 from sqlalchemy.orm import Session
 
-from app import crud
+from app.crud import apply_compensation_in_effect, bulk_copy
 from app.models import (
     FREQUENCY_ENUM,
+    MODEL_TEXT_LIMITS,
     PAYOUT_STATUS_ENUM,
     ADHOC_PAYMENT_STATUS_ENUM,
     STATUS_ENUM,
@@ -27,13 +30,13 @@ from app.models import (
 )
 
 MODEL_COLUMNS: dict[str, dict[str, Any]] = {
-    "code": {"aliases": ["code", "model code", "model"], "required": True},
-    "status": {"aliases": ["status", "model status"], "required": False},
-    "real_name": {"aliases": ["real name", "legal name", "real_name"], "required": True},
-    "working_name": {"aliases": ["working name", "stage name", "working_name"], "required": True},
-    "start_date": {"aliases": ["start date", "model start date", "start_date"], "required": True},
-    "payment_method": {"aliases": ["payment method", "method", "payment_method"], "required": True},
-    "payment_frequency": {"aliases": ["payment frequency", "frequency", "payment_frequency"], "required": True},
+    "code": {"aliases": ["code", "model code", "model"], "required": True, "kind": "text"},
+    "status": {"aliases": ["status", "model status"], "required": False, "kind": "text"},
+    "real_name": {"aliases": ["real name", "legal name", "real_name"], "required": True, "kind": "text"},
+    "working_name": {"aliases": ["working name", "stage name", "working_name"], "required": True, "kind": "text"},
+    "start_date": {"aliases": ["start date", "model start date", "start_date"], "required": True, "kind": "date"},
+    "payment_method": {"aliases": ["payment method", "method", "payment_method"], "required": True, "kind": "text"},
+    "payment_frequency": {"aliases": ["payment frequency", "frequency", "payment_frequency"], "required": True, "kind": "text"},
     "amount_monthly": {
         "aliases": [
             "monthly amount",
@@ -43,23 +46,24 @@ MODEL_COLUMNS: dict[str, dict[str, Any]] = {
             "amount_monthly",
         ],
         "required": True,
+        "kind": "decimal",
     },
-    "crypto_wallet": {"aliases": ["crypto wallet", "wallet", "crypto_wallet"], "required": False},
+    "crypto_wallet": {"aliases": ["crypto wallet", "wallet", "crypto_wallet"], "required": False, "kind": "text"},
 }
 
 PAYOUT_COLUMNS: dict[str, dict[str, Any]] = {
-    "code": {"aliases": ["code", "model code"], "required": True},
-    "pay_date": {"aliases": ["pay date", "payment date", "pay_date"], "required": True},
-    "amount": {"aliases": ["amount", "payment amount"], "required": True},
-    "status": {"aliases": ["status", "payment status"], "required": True},
-    "payment_method": {"aliases": ["payment method", "method", "payment_method"], "required": False},
-    "payment_frequency": {"aliases": ["payment frequency", "frequency", "payment_frequency"], "required": False},
-    "notes": {"aliases": ["notes", "note", "notes & actions", "actions"], "required": False},
+    "code": {"aliases": ["code", "model code"], "required": True, "kind": "text"},
+    "pay_date": {"aliases": ["pay date", "payment date", "pay_date"], "required": True, "kind": "date"},
+    "amount": {"aliases": ["amount", "payment amount"], "required": True, "kind": "decimal"},
+    "status": {"aliases": ["status", "payment status"], "required": True, "kind": "text"},
+    "payment_method": {"aliases": ["payment method", "method", "payment_method"], "required": False, "kind": "text"},
+    "payment_frequency": {"aliases": ["payment frequency", "frequency", "payment_frequency"], "required": False, "kind": "text"},
+    "notes": {"aliases": ["notes", "note", "notes & actions", "actions"], "required": False, "kind": "text"},
 }
 
 ADJUSTMENT_COLUMNS: dict[str, dict[str, Any]] = {
-    "code": {"aliases": ["code", "model code"], "required": True},
-    "effective_date": {"aliases": ["effective date", "effective_date"], "required": True},
+    "code": {"aliases": ["code", "model code"], "required": True, "kind": "text"},
+    "effective_date": {"aliases": ["effective date", "effective_date"], "required": True, "kind": "date"},
     "amount_monthly": {
         "aliases": [
             "monthly amount",
@@ -69,20 +73,73 @@ ADJUSTMENT_COLUMNS: dict[str, dict[str, Any]] = {
             "amount_monthly",
         ],
         "required": True,
+        "kind": "decimal",
     },
-    "notes": {"aliases": ["notes", "note", "comments"], "required": False},
+    "notes": {"aliases": ["notes", "note", "comments"], "required": False, "kind": "text"},
 }
 
 ADHOC_COLUMNS: dict[str, dict[str, Any]] = {
-    "code": {"aliases": ["code", "model code"], "required": True},
-    "pay_date": {"aliases": ["pay date", "payment date", "pay_date"], "required": True},
-    "amount": {"aliases": ["amount", "payment amount"], "required": True},
-    "status": {"aliases": ["status"], "required": False},
-    "description": {"aliases": ["description", "desc", "memo"], "required": False},
-    "notes": {"aliases": ["notes", "note", "comments"], "required": False},
+    "code": {"aliases": ["code", "model code"], "required": True, "kind": "text"},
+    "pay_date": {"aliases": ["pay date", "payment date", "pay_date"], "required": True, "kind": "date"},
+    "amount": {"aliases": ["amount", "payment amount"], "required": True, "kind": "decimal"},
+    "status": {"aliases": ["status"], "required": False, "kind": "text"},
+    "description": {"aliases": ["description", "desc", "memo"], "required": False, "kind": "text"},
+    "notes": {"aliases": ["notes", "note", "comments"], "required": False, "kind": "text"},
 }
 
-DATE_FORMATS: tuple[str, ...] = ("%m/%d/%Y", "%Y-%m-%d", "%m-%d-%Y")
+
+
+def _index_aliases(*specs: dict[str, dict[str, Any]]) -> None:
+    """Store each column's lowercased aliases once so header matching skips per-call normalization."""
+    for spec in specs:
+        for column_spec in spec.values():
+            column_spec["alias_keys"] = tuple(alias.strip().lower() for alias in column_spec["aliases"])
+
+
+_index_aliases(MODEL_COLUMNS, PAYOUT_COLUMNS, ADJUSTMENT_COLUMNS, ADHOC_COLUMNS)
+
+try:  # python-calamine parses workbooks in Rust; openpyxl remains the fallback reader
+    import python_calamine  # noqa: F401
+except ImportError:  # pragma: no cover - depends on installed extras
+    EXCEL_ENGINE = "openpyxl"
+else:
+    EXCEL_ENGINE = "calamine"
+
+try:  # Arrow-backed strings keep a text column in one contiguous buffer instead of per-cell objects
+    import pyarrow  # noqa: F401
+except ImportError:  # pragma: no cover - depends on installed extras
+    TEXT_DTYPE = "string"
+else:
+    TEXT_DTYPE = "string[pyarrow]"
+
+# ISO (YYYY-MM-DD) or US (MM/DD/YYYY, MM-DD-YYYY) dates; anything else falls back to dateutil
+_FAST_DATE = re.compile(
+    r"^(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})$"
+    r"|^(?P<us_month>\d{1,2})(?P<sep>[-/])(?P<us_day>\d{1,2})(?P=sep)(?P<us_year>\d{4})$",
+    re.ASCII,
+)
+_CURRENCY_NOISE = str.maketrans({"$": None, ",": None})
+
+# Accepted spellings -> canonical values, built once instead of per-cell if/elif ladders
+_FREQUENCY_CANON: dict[str, str] = {
+    **{value: value for value in FREQUENCY_ENUM},
+    "week": "weekly",
+    "bi-weekly": "biweekly",
+    "fortnightly": "biweekly",
+    "month": "monthly",
+}
+_STATUS_CANON: dict[str, str] = {value.lower(): value for value in STATUS_ENUM}
+_PAYOUT_STATUS_CANON: dict[str, str] = {
+    **{value: value for value in PAYOUT_STATUS_ENUM},
+    "approve": "approved",
+    "unpaid": "not_paid",
+    "hold": "on_hold",
+    "holding": "on_hold",
+}
+_ADHOC_STATUS_CANON: dict[str, str] = {
+    **{value: value for value in ADHOC_PAYMENT_STATUS_ENUM},
+    "canceled": "cancelled",
+}
 
 
 def _row_number(idx: Any) -> int:
@@ -92,6 +149,103 @@ def _row_number(idx: Any) -> int:
         return 0
 
 
+def _is_missing(raw: Any) -> bool:
+    # Cells arrive pre-masked to None; the NaN/NaT checks only cover direct callers
+    return raw is None or raw is pd.NaT or (isinstance(raw, float) and raw != raw)
+
+
+def _mask_missing(frame: pd.DataFrame | pd.Series) -> pd.DataFrame | pd.Series:
+    """Replace NaN/NaT/NA cells with None using a single vectorized notna() mask."""
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def _prepare_text_columns(records: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+    """Strip text columns once and add lowercase ``_<column>_key`` lookup columns."""
+    records = records.copy()
+    for column in columns:
+        if column not in records.columns:
+            continue
+        stripped = records[column].astype(TEXT_DTYPE).str.strip()
+        records[column] = stripped
+        records[f"_{column}_key"] = stripped.str.lower()
+    return records
+
+
+def _parse_column(
+    records: pd.DataFrame,
+    column: str,
+    parser: Callable[..., Any],
+    *args: Any,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Run ``parser`` once per distinct value of ``column``.
+
+    Returns row-aligned arrays of parsed values and error messages (None where the cell parsed).
+    """
+    if column in records.columns:
+        cells = _mask_missing(records[column])
+    else:
+        cells = pd.Series(None, index=records.index, dtype=object)
+    codes, uniques = pd.factorize(cells, use_na_sentinel=False)
+    parsed = np.empty(len(uniques), dtype=object)
+    messages = np.empty(len(uniques), dtype=object)
+    for position, raw in enumerate(uniques):
+        try:
+            parsed[position] = parser(raw, *args)
+        except ValueError as exc:
+            messages[position] = str(exc)
+    return parsed[codes], messages[codes]
+
+
+def _code_errors(records: pd.DataFrame, label: str) -> np.ndarray:
+    """Flag rows whose (already stripped) code column is missing or empty."""
+    code = records["code"]
+    missing = code.isna().to_numpy()
+    empty = ~missing & (code.fillna("").to_numpy(dtype=object) == "")
+    messages = np.empty(len(code), dtype=object)
+    messages[missing] = f"{label} code is missing"
+    messages[empty] = f"{label} code is empty"
+    return messages
+
+
+def _length_errors(values: np.ndarray, field_name: str) -> np.ndarray:
+    """Flag text values longer than the model field limit (the columns themselves are unbounded TEXT)."""
+    limit = MODEL_TEXT_LIMITS[field_name]
+    too_long = np.fromiter(
+        (isinstance(value, str) and len(value) > limit for value in values), dtype=bool, count=len(values)
+    )
+    messages = np.empty(len(values), dtype=object)
+    messages[too_long] = f"{field_name.replace('_', ' ')} exceeds {limit} characters"
+    return messages
+
+
+def _lookup_models(
+    records: pd.DataFrame,
+    models_by_code: dict[str, Model],
+    label: str,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Resolve each row's model, reporting missing, empty, or unknown codes."""
+    messages = _code_errors(records, label)
+    models, _ = _parse_column(records, "_code_key", models_by_code.get)
+    unknown = pd.isna(models) & pd.isna(messages)
+    codes = records["code"].to_numpy(dtype=object)
+    messages[unknown] = [f"model '{code}' not found; import models first" for code in codes[unknown]]
+    return models, messages
+
+
+def _first_errors(*columns: np.ndarray) -> np.ndarray:
+    """Keep, per row, the first message in precedence order (None for rows that passed)."""
+    result = np.empty(len(columns[0]), dtype=object)
+    for messages in reversed(columns):
+        result = np.where(pd.notna(messages), messages, result)
+    return result
+
+
+def _collect_row_errors(records: pd.DataFrame, row_errors: np.ndarray) -> list[RowError]:
+    failed = pd.notna(row_errors)
+    labels = records.index.to_numpy()[failed]
+    return [RowError(_row_number(idx), message) for idx, message in zip(labels, row_errors[failed])]
+
+
 @dataclass
 class RunOptions:
     schedule_run_id: int | None = None
@@ -112,6 +266,22 @@ class ImportOptions:
     adhoc_sheet: str | None = "Adhoc"
 
 
+@dataclass(frozen=True, slots=True)
+class RowError:
+    """A skipped row (or sheet-level problem when ``row`` is None); rendered lazily by __str__."""
+
+    row: int | None
+    reason: str
+    period: tuple[int, int] | None = None
+
+    def __str__(self) -> str:
+        message = self.reason if self.row is None else f"Row {self.row}: {self.reason}"
+        if self.period is None:
+            return message
+        year, month = self.period
+        return f"{year:04d}-{month:02d}: {message}"
+
+
 @dataclass
 class ImportSummary:
     models_created: int = 0
@@ -123,53 +293,52 @@ class ImportSummary:
     adhoc_updated: int = 0
     schedule_run_id: int | None = None
     schedule_run_ids: list[int] = field(default_factory=list)
-    model_errors: list[str] = field(default_factory=list)
-    payout_errors: list[str] = field(default_factory=list)
-    adjustment_errors: list[str] = field(default_factory=list)
-    adhoc_errors: list[str] = field(default_factory=list)
+    model_errors: list[RowError] = field(default_factory=list)
+    payout_errors: list[RowError] = field(default_factory=list)
+    adjustment_errors: list[RowError] = field(default_factory=list)
+    adhoc_errors: list[RowError] = field(default_factory=list)
 
     def as_dict(self) -> dict[str, Any]:
-        return {
-            "models_created": self.models_created,
-            "models_updated": self.models_updated,
-            "payouts_created": self.payouts_created,
-            "adjustments_created": self.adjustments_created,
-            "adjustments_updated": self.adjustments_updated,
-            "adhoc_created": self.adhoc_created,
-            "adhoc_updated": self.adhoc_updated,
-            "schedule_run_id": self.schedule_run_id,
-            "schedule_run_ids": self.schedule_run_ids,
-            "model_errors": self.model_errors,
-            "payout_errors": self.payout_errors,
-            "adjustment_errors": self.adjustment_errors,
-            "adhoc_errors": self.adhoc_errors,
-        }
+        data = asdict(self)
+        # Errors are formatted only here (and by templates via str()), never while importing
+        for name in ("model_errors", "payout_errors", "adjustment_errors", "adhoc_errors"):
+            data[name] = [str(error) for error in getattr(self, name)]
+        return data
 
 
-def resolve_column(df: pd.DataFrame, aliases: Iterable[str]) -> str | None:
-    lookup = {str(col).strip().lower(): str(col) for col in df.columns}
-    for alias in aliases:
-        key = alias.strip().lower()
+def _header_lookup(df: pd.DataFrame) -> dict[str, str]:
+    return {str(col).strip().lower(): str(col) for col in df.columns}
+
+
+def _match_header(lookup: dict[str, Any], alias_keys: Iterable[str]) -> Any:
+    for key in alias_keys:
         if key in lookup:
             return lookup[key]
     return None
 
 
+def resolve_column(df: pd.DataFrame, aliases: Iterable[str]) -> str | None:
+    return _match_header(_header_lookup(df), (alias.strip().lower() for alias in aliases))
+
+
 def normalize_columns(df: pd.DataFrame, spec: dict[str, dict[str, Any]], label: str) -> pd.DataFrame:
     mapping: dict[str, str] = {}
+    # Build the header lookup once for the whole spec rather than once per column
+    lookup = _header_lookup(df)
     for canonical, column_spec in spec.items():
-        source = resolve_column(df, column_spec["aliases"])
+        source = _match_header(lookup, column_spec["alias_keys"])
         if source:
             mapping[source] = canonical
         elif column_spec.get("required", False):
             raise ValueError(f"Missing required column '{canonical}' in {label} sheet")
     renamed = df.rename(columns=mapping)
     columns = list(mapping.values())
-    return renamed[columns]
+    text_columns = {column: TEXT_DTYPE for column in columns if spec[column].get("kind") == "text"}
+    return renamed[columns].astype(text_columns)
 
 
 def parse_date_value(raw: Any, field_name: str) -> date:
-    if pd.isna(raw):
+    if _is_missing(raw):
         raise ValueError(f"{field_name} is missing")
     if isinstance(raw, date) and not isinstance(raw, datetime):
         return raw
@@ -178,11 +347,16 @@ def parse_date_value(raw: Any, field_name: str) -> date:
     text = str(raw).strip()
     if not text:
         raise ValueError(f"{field_name} is empty")
-    for pattern in DATE_FORMATS:
+    match = _FAST_DATE.match(text)
+    if match:
+        if match["iso_year"]:
+            parts = (match["iso_year"], match["iso_month"], match["iso_day"])
+        else:
+            parts = (match["us_year"], match["us_month"], match["us_day"])
         try:
-            return datetime.strptime(text, pattern).date()
+            return date(*(int(part) for part in parts))
         except ValueError:
-            continue
+            pass
     try:
         return date_parser.parse(text).date()
     except (ValueError, TypeError) as exc:
@@ -190,7 +364,7 @@ def parse_date_value(raw: Any, field_name: str) -> date:
 
 
 def parse_decimal_value(raw: Any, field_name: str) -> Decimal:
-    if pd.isna(raw):
+    if _is_missing(raw):
         raise ValueError(f"{field_name} is missing")
     if isinstance(raw, Decimal):
         value = raw
@@ -198,7 +372,7 @@ def parse_decimal_value(raw: Any, field_name: str) -> Decimal:
         text = str(raw).strip()
         if not text:
             raise ValueError(f"{field_name} is empty")
-        normalized = text.replace("$", "").replace(",", "")
+        normalized = text.translate(_CURRENCY_NOISE)
         try:
             value = Decimal(normalized)
         except (InvalidOperation, ValueError) as exc:
@@ -209,243 +383,287 @@ def parse_decimal_value(raw: Any, field_name: str) -> Decimal:
 
 
 def normalize_frequency(raw: Any) -> str:
-    if pd.isna(raw):
+    if _is_missing(raw):
         raise ValueError("payment frequency is missing")
-    text = str(raw).strip().lower().replace(" ", "")
-    if text in ("weekly", "week"):
-        value = "weekly"
-    elif text in ("biweekly", "bi-weekly", "fortnightly"):
-        value = "biweekly"
-    elif text in ("monthly", "month"):
-        value = "monthly"
-    else:
-        value = text
-    if value not in FREQUENCY_ENUM:
+    value = _FREQUENCY_CANON.get(str(raw).strip().lower().replace(" ", ""))
+    if value is None:
         raise ValueError(f"Unsupported payment frequency '{raw}'")
     return value
 
 
+def _normalize_optional_frequency(raw: Any) -> str | None:
+    return None if _is_missing(raw) else normalize_frequency(raw)
+
+
 def normalize_status(raw: Any) -> str:
-    if pd.isna(raw):
+    if _is_missing(raw):
         return "Active"
     text = str(raw).strip()
     if not text:
         return "Active"
-    lowered = text.lower()
-    allowed = {value.lower(): value for value in STATUS_ENUM}
-    if lowered in allowed:
-        return allowed[lowered]
-    raise ValueError(f"Unsupported model status '{raw}'")
+    value = _STATUS_CANON.get(text.lower())
+    if value is None:
+        raise ValueError(f"Unsupported model status '{raw}'")
+    return value
 
 
 def normalize_payout_status(raw: Any) -> str:
-    if pd.isna(raw):
-        return "not_paid"
-    text = str(raw).strip().lower().replace(" ", "_")
-    if text == "paid":
-        return "paid"
-    if text in ("approved", "approve"):
-        return "approved"
-    if text in ("not_paid", "unpaid"):
+    if _is_missing(raw):
         return "not_paid"
-    if text in ("on_hold", "hold", "holding"):
-        return "on_hold"
-    if text not in PAYOUT_STATUS_ENUM:
+    value = _PAYOUT_STATUS_CANON.get(str(raw).strip().lower().replace(" ", "_"))
+    if value is None:
         raise ValueError(f"Unsupported payout status '{raw}'")
-    return text
+    return value
 
 
 def normalize_adhoc_status(raw: Any) -> str:
-    if pd.isna(raw) or not str(raw).strip():
+    if _is_missing(raw) or not str(raw).strip():
         return "pending"
-    text = str(raw).strip().lower()
-    if text in ("pending", "paid", "cancelled", "canceled"):
-        return "cancelled" if text in ("cancelled", "canceled") else text
-    if text not in ADHOC_PAYMENT_STATUS_ENUM:
+    value = _ADHOC_STATUS_CANON.get(str(raw).strip().lower())
+    if value is None:
         raise ValueError(f"Unsupported adhoc status '{raw}'")
-    return text
+    return value
 
 
 def clean_string(raw: Any) -> str | None:
-    if pd.isna(raw):
+    if _is_missing(raw):
         return None
     text = str(raw).strip()
     return text or None
 
 
-def load_sheet(workbook_bytes: bytes, sheet_name: str) -> pd.DataFrame:
+def load_models_by_code(session: Session) -> dict[str, Model]:
+    """Index every model by its normalized (stripped, lowercased) code."""
+    return {(m.code or "").strip().lower(): m for m in session.query(Model).all()}
+
+
+def open_workbook(workbook_bytes: bytes) -> pd.ExcelFile:
+    """Open the workbook once so every sheet is read from the same parsed archive."""
+    return pd.ExcelFile(BytesIO(workbook_bytes), engine=EXCEL_ENGINE)
+
+
+def _text_dtypes(headers: Iterable[Any], spec: dict[str, dict[str, Any]]) -> dict[Any, str]:
+    """Map the sheet's actual text headers to a string dtype so pandas skips inference."""
+    lookup = {str(col).strip().lower(): col for col in headers}
+    dtypes: dict[Any, str] = {}
+    for column_spec in spec.values():
+        if column_spec.get("kind") != "text":
+            continue
+        source = _match_header(lookup, column_spec["alias_keys"])
+        if source is not None:
+            dtypes[source] = TEXT_DTYPE
+    return dtypes
+
+
+def load_sheet(
+    workbook: pd.ExcelFile,
+    sheet_name: str,
+    spec: dict[str, dict[str, Any]] | None = None,
+) -> pd.DataFrame:
+    if sheet_name not in workbook.sheet_names:
+        raise ValueError(f"Could not read sheet '{sheet_name}'")
     try:
-        return pd.read_excel(BytesIO(workbook_bytes), sheet_name=sheet_name)
+        dtype = None
+        if spec is not None:
+            # Reading just the header row is cheap and lets the hints target real column names
+            headers = workbook.parse(sheet_name, nrows=0).columns
+            dtype = _text_dtypes(headers, spec) or None
+        return workbook.parse(sheet_name, dtype=dtype)
     except ValueError as exc:
         raise ValueError(f"Could not read sheet '{sheet_name}'") from exc
 
 
-def group_payout_rows_by_month(df: pd.DataFrame) -> tuple[dict[tuple[int, int], pd.DataFrame], list[str]]:
+def load_optional_sheet(
+    workbook: pd.ExcelFile,
+    sheet_name: str | None,
+    spec: dict[str, dict[str, Any]] | None = None,
+) -> pd.DataFrame | None:
+    if not sheet_name or sheet_name not in workbook.sheet_names:
+        return None
+    try:
+        return load_sheet(workbook, sheet_name, spec)
+    except ValueError:
+        return None
+
+
+def group_payout_rows_by_month(df: pd.DataFrame) -> tuple[dict[tuple[int, int], pd.DataFrame], list[RowError]]:
     """Group payout rows by (year, month) of pay_date.
 
     Parses each pay_date cell robustly and collects invalid rows as errors without aborting.
-    Returns a mapping of (year, month) -> sub-DataFrame preserving the original row order.
+    Returns a mapping of (year, month) -> sub-DataFrame preserving the original row order,
+    with keys in ascending period order.
     """
-    column = resolve_column(df, PAYOUT_COLUMNS["pay_date"]["aliases"])
+    column = _match_header(_header_lookup(df), PAYOUT_COLUMNS["pay_date"]["alias_keys"])
     if not column:
         raise ValueError("Missing required pay_date column in payout sheet")
 
-    errors: list[str] = []
-    parsed_dates: list[date | None] = []
-    row_numbers: list[int] = []
-
-    # Parse dates row-by-row so we can retain row numbers for error messages
-    for idx, raw in df[column].items():
-        try:
-            parsed = parse_date_value(raw, "pay date")
-            parsed_dates.append(parsed)
-        except ValueError as exc:
-            errors.append(f"Row {_row_number(idx)}: {exc}")
-            parsed_dates.append(None)
-        row_numbers.append(_row_number(idx))
-
-    # Build (year, month) keys for valid rows
-    groups: dict[tuple[int, int], list[int]] = {}
-    for i, d in enumerate(parsed_dates):
-        if d is None:
-            continue
-        key = (d.year, d.month)
-        groups.setdefault(key, []).append(i)
+    # Pay dates are parsed once per distinct cell value and grouped with a single groupby
+    periods, period_errors = _parse_column(df, column, _pay_period)
+    errors = _collect_row_errors(df, period_errors)
+    valid = pd.isna(period_errors)
 
-    # Slice by positional indices to avoid label-vs-position confusion
     grouped_frames: dict[tuple[int, int], pd.DataFrame] = {}
-    for key, positions in groups.items():
-        # Use iloc to pick rows by position; copy to detach from original
-        grouped_frames[key] = df.iloc[positions].copy()
+    for period, frame in df[valid].groupby(periods[valid].astype(np.int64), sort=True):
+        year, month = divmod(int(period), 100)
+        grouped_frames[(year, month)] = frame
 
     return grouped_frames, errors
 
 
-def import_models(df: pd.DataFrame, session: Session, update_existing: bool) -> tuple[int, int, list[str]]:
+def _pay_period(raw: Any) -> int:
+    pay_date = parse_date_value(raw, "pay date")
+    return pay_date.year * 100 + pay_date.month
+
+
+def import_models(
+    df: pd.DataFrame,
+    session: Session,
+    update_existing: bool,
+    models_by_code: dict[str, Model] | None = None,
+    flush: bool = True,
+) -> tuple[int, int, list[RowError]]:
     created = 0
     updated = 0
-    errors: list[str] = []
+    errors: list[RowError] = []
     normalized = normalize_columns(df, MODEL_COLUMNS, "model")
-    records = normalized.dropna(how="all")
-    # Normalize codes when building lookup keys to avoid trailing/leading whitespace mismatches
-    existing = {(m.code or "").strip().lower(): m for m in session.query(Model).all()}
-
-    for idx, row in records.iterrows():
-        code_raw = row.get("code")
-        if pd.isna(code_raw):
-            errors.append(f"Row {_row_number(idx)}: model code is missing")
-            continue
-        code = str(code_raw).strip()
-        if not code:
-            errors.append(f"Row {_row_number(idx)}: model code is empty")
-            continue
-        try:
-            start_date = parse_date_value(row.get("start_date"), "start date")
-            amount = parse_decimal_value(row.get("amount_monthly"), "monthly amount")
-            frequency = normalize_frequency(row.get("payment_frequency"))
-            status_value = normalize_status(row.get("status"))
-            real_name = clean_string(row.get("real_name"))
-            working_name = clean_string(row.get("working_name"))
-            method = clean_string(row.get("payment_method"))
-            wallet = clean_string(row.get("crypto_wallet"))
-        except ValueError as exc:
-            errors.append(f"Row {_row_number(idx)}: {exc}")
-            continue
-        if not real_name or not working_name or not method:
-            errors.append(f"Row {_row_number(idx)}: required text fields are missing")
-            continue
+    records = _prepare_text_columns(normalized.dropna(how="all"), ("code",))
+    # Newly created models are added to the shared lookup so later importers can see them
+    existing = models_by_code if models_by_code is not None else load_models_by_code(session)
+
+    # Validate column by column; only rows that pass every check reach the ORM loop
+    codes = records["code"].to_numpy(dtype=object)
+    code_keys = records["_code_key"].to_numpy(dtype=object)
+    start_dates, start_date_errors = _parse_column(records, "start_date", parse_date_value, "start date")
+    amounts, amount_errors = _parse_column(records, "amount_monthly", parse_decimal_value, "monthly amount")
+    frequencies, frequency_errors = _parse_column(records, "payment_frequency", normalize_frequency)
+    statuses, status_errors = _parse_column(records, "status", normalize_status)
+    real_names, _ = _parse_column(records, "real_name", clean_string)
+    working_names, _ = _parse_column(records, "working_name", clean_string)
+    methods, _ = _parse_column(records, "payment_method", clean_string)
+    wallets, _ = _parse_column(records, "crypto_wallet", clean_string)
+    text_missing = pd.isna(real_names) | pd.isna(working_names) | pd.isna(methods)
+    row_errors = _first_errors(
+        _code_errors(records, "model"),
+        start_date_errors,
+        amount_errors,
+        frequency_errors,
+        status_errors,
+        np.where(text_missing, "required text fields are missing", None),
+        _length_errors(real_names, "real_name"),
+        _length_errors(working_names, "working_name"),
+        _length_errors(methods, "payment_method"),
+        _length_errors(wallets, "crypto_wallet"),
+    )
 
-        model = existing.get(code.lower())
-        if model:
+    # New models are collected as plain rows (keyed like ``existing``) and inserted in bulk below
+    new_models: dict[str, dict[str, Any]] = {}
+    for position in np.flatnonzero(pd.isna(row_errors)):
+        key = code_keys[position]
+        values = {
+            "status": statuses[position],
+            "real_name": real_names[position],
+            "working_name": working_names[position],
+            "start_date": start_dates[position],
+            "payment_method": methods[position],
+            "payment_frequency": frequencies[position],
+            "amount_monthly": amounts[position],
+            "crypto_wallet": wallets[position],
+        }
+
+        model = existing.get(key)
+        pending = new_models.get(key)
+        if model or pending:
             if update_existing:
-                model.status = status_value
-                model.real_name = real_name
-                model.working_name = working_name
-                model.start_date = start_date
-                model.payment_method = method
-                model.payment_frequency = frequency
-                model.amount_monthly = amount
-                model.crypto_wallet = wallet
+                if model:
+                    for attribute, value in values.items():
+                        setattr(model, attribute, value)
+                else:
+                    pending.update(values)
                 updated += 1
             else:
-                errors.append(f"Row {_row_number(idx)}: model '{code}' already exists (enable update to modify)")
+                row_errors[position] = f"model '{codes[position]}' already exists (enable update to modify)"
             continue
 
-        model = Model(
-            code=code,
-            status=status_value,
-            real_name=real_name,
-            working_name=working_name,
-            start_date=start_date,
-            payment_method=method,
-            payment_frequency=frequency,
-            amount_monthly=amount,
-            crypto_wallet=wallet,
-        )
-        session.add(model)
-        existing[code.lower()] = model
+        new_models[key] = {"code": codes[position], **values}
         created += 1
-    session.flush()
+
+    if new_models:
+        # One timestamp for the whole batch instead of a datetime.now() default call per row
+        stamped_at = datetime.now()
+        for row in new_models.values():
+            row["created_at"] = row["updated_at"] = stamped_at
+        # RETURNING hands back identity-mapped instances with ids. Rows are matched back by
+        # code rather than sort_by_parameter_order, which SQLite can only honour row by row.
+        inserted = session.scalars(insert(Model).returning(Model), list(new_models.values())).all()
+        existing.update(((model.code or "").strip().lower(), model) for model in inserted)
+    errors.extend(_collect_row_errors(records, row_errors))
+    if flush:
+        session.flush()
     return created, updated, errors
 
 
 def import_compensation_adjustments(
-    df: pd.DataFrame, session: Session
-) -> tuple[int, int, list[str]]:
+    df: pd.DataFrame,
+    session: Session,
+    models_by_code: dict[str, Model] | None = None,
+    flush: bool = True,
+) -> tuple[int, int, list[RowError]]:
     created = 0
     updated = 0
-    errors: list[str] = []
+    errors: list[RowError] = []
     normalized = normalize_columns(df, ADJUSTMENT_COLUMNS, "compensation adjustment")
-    records = normalized.dropna(how="all")
-    # Normalize codes to be resilient to stray whitespace or casing differences
-    models_by_code = {(m.code or "").strip().lower(): m for m in session.query(Model).all()}
-
-    for idx, row in records.iterrows():
-        code_raw = row.get("code")
-        if pd.isna(code_raw):
-            errors.append(f"Row {_row_number(idx)}: model code is missing")
-            continue
-        code = str(code_raw).strip()
-        if not code:
-            errors.append(f"Row {_row_number(idx)}: model code is empty")
-            continue
-        model = models_by_code.get(code.lower())
-        if not model:
-            errors.append(f"Row {_row_number(idx)}: model '{code}' not found; import models first")
-            continue
-        try:
-            effective_date = parse_date_value(row.get("effective_date"), "effective date")
-            amount = parse_decimal_value(row.get("amount_monthly"), "monthly amount")
-            notes = clean_string(row.get("notes"))
-        except ValueError as exc:
-            errors.append(f"Row {_row_number(idx)}: {exc}")
-            continue
+    records = _prepare_text_columns(normalized.dropna(how="all"), ("code",))
+    if models_by_code is None:
+        models_by_code = load_models_by_code(session)
 
-        existing = (
-            session.query(ModelCompensationAdjustment)
-            .filter(
-                ModelCompensationAdjustment.model_id == model.id,
-                ModelCompensationAdjustment.effective_date == effective_date,
-            )
-            .first()
+    models, model_errors = _lookup_models(records, models_by_code, "model")
+    effective_dates, effective_date_errors = _parse_column(
+        records, "effective_date", parse_date_value, "effective date"
+    )
+    amounts, amount_errors = _parse_column(records, "amount_monthly", parse_decimal_value, "monthly amount")
+    notes_values, _ = _parse_column(records, "notes", clean_string)
+    row_errors = _first_errors(model_errors, effective_date_errors, amount_errors)
+    errors.extend(_collect_row_errors(records, row_errors))
+    valid_positions = np.flatnonzero(pd.isna(row_errors))
+
+    # One query for every adjustment that could collide with this sheet
+    existing_index: dict[tuple[int, date], ModelCompensationAdjustment] = {}
+    if len(valid_positions):
+        model_ids = {models[position].id for position in valid_positions}
+        candidates = session.query(ModelCompensationAdjustment).filter(
+            ModelCompensationAdjustment.model_id.in_(model_ids)
         )
+        for adjustment in candidates:
+            existing_index[(adjustment.model_id, adjustment.effective_date)] = adjustment
+
+    today = date.today()
+    for position in valid_positions:
+        model = models[position]
+        effective_date = effective_dates[position]
+        amount = amounts[position]
+        notes = notes_values[position]
+
+        key = (model.id, effective_date)
+        existing = existing_index.get(key)
         if existing:
             if existing.amount_monthly != amount or existing.notes != notes:
                 existing.amount_monthly = amount
                 existing.notes = notes
-                session.add(existing)
                 updated += 1
         else:
-            crud.create_compensation_adjustment(
-                session,
-                model,
+            adjustment = ModelCompensationAdjustment(
+                model_id=model.id,
                 effective_date=effective_date,
                 amount_monthly=amount,
                 notes=notes,
             )
+            session.add(adjustment)
+            existing_index[key] = adjustment
+            apply_compensation_in_effect(model, effective_date, amount, today)
             created += 1
 
-    session.flush()
+    if flush:
+        session.flush()
     return created, updated, errors
 
 
@@ -453,73 +671,107 @@ def import_adhoc_payments(
     df: pd.DataFrame,
     session: Session,
     allow_update: bool,
-) -> tuple[int, int, list[str]]:
+    models_by_code: dict[str, Model] | None = None,
+    flush: bool = True,
+) -> tuple[int, int, list[RowError]]:
     created = 0
     updated = 0
-    errors: list[str] = []
+    errors: list[RowError] = []
     normalized = normalize_columns(df, ADHOC_COLUMNS, "adhoc")
-    records = normalized.dropna(how="all")
+    records = _prepare_text_columns(normalized.dropna(how="all"), ("code", "description"))
+
+    if models_by_code is None:
+        models_by_code = load_models_by_code(session)
+
+    # Validate every row first so the duplicate lookup can be scoped to this batch
+    models, model_errors = _lookup_models(records, models_by_code, "adhoc")
+    pay_dates, pay_date_errors = _parse_column(records, "pay_date", parse_date_value, "pay date")
+    amounts, amount_errors = _parse_column(records, "amount", parse_decimal_value, "amount")
+    statuses, status_errors = _parse_column(records, "status", normalize_adhoc_status)
+    descriptions, _ = _parse_column(records, "description", clean_string)
+    notes_values, _ = _parse_column(records, "notes", clean_string)
+    if "_description_key" in records.columns:
+        description_keys = records["_description_key"].fillna("").to_numpy(dtype=object)
+    else:
+        description_keys = np.full(len(records), "", dtype=object)
+    row_errors = _first_errors(model_errors, pay_date_errors, amount_errors, status_errors)
+    errors.extend(_collect_row_errors(records, row_errors))
+
+    parsed_rows: list[tuple[tuple[int, date, str], dict[str, Any]]] = []
+    for position in np.flatnonzero(pd.isna(row_errors)):
+        model = models[position]
+        values = {
+            "model_id": model.id,
+            "pay_date": pay_dates[position],
+            "amount": amounts[position],
+            "status": statuses[position],
+            "description": descriptions[position],
+            "notes": notes_values[position],
+        }
+        key = (model.id, values["pay_date"], description_keys[position])
+        parsed_rows.append((key, values))
 
-    # Normalize codes to match input values even if DB has stray spaces/casing
-    models_by_code = {(m.code or "").strip().lower(): m for m in session.query(Model).all()}
-    # Prefetch all existing adhoc payments and index by (model_id, pay_date, normalized_description)
+    # Index only the existing payments that could collide with this sheet
     existing_index: dict[tuple[int, date, str], AdhocPayment] = {}
-    for ap in session.query(AdhocPayment).all():
-        key = (ap.model_id, ap.pay_date, (ap.description or "").strip().lower())
-        existing_index[key] = ap
-
-    for idx, row in records.iterrows():
-        code_raw = row.get("code")
-        if pd.isna(code_raw):
-            errors.append(f"Row {_row_number(idx)}: adhoc code is missing")
-            continue
-        code = str(code_raw).strip()
-        if not code:
-            errors.append(f"Row {_row_number(idx)}: adhoc code is empty")
-            continue
-        model = models_by_code.get(code.lower())
-        if not model:
-            errors.append(f"Row {_row_number(idx)}: model '{code}' not found; import models first")
-            continue
-        try:
-            pay_date = parse_date_value(row.get("pay_date"), "pay date")
-            amount = parse_decimal_value(row.get("amount"), "amount")
-            status_value = normalize_adhoc_status(row.get("status"))
-            description_value = clean_string(row.get("description"))
-            notes_value = clean_string(row.get("notes"))
-        except ValueError as exc:
-            errors.append(f"Row {_row_number(idx)}: {exc}")
-            continue
+    if parsed_rows:
+        model_ids = {key[0] for key, _ in parsed_rows}
+        pay_dates = {key[1] for key, _ in parsed_rows}
+        candidates = session.query(AdhocPayment).filter(
+            AdhocPayment.model_id.in_(model_ids),
+            AdhocPayment.pay_date.in_(pay_dates),
+        )
+        for ap in candidates:
+            existing_index[(ap.model_id, ap.pay_date, (ap.description or "").strip().lower())] = ap
 
-        key = (model.id, pay_date, (description_value or "").strip().lower())
+    for key, values in parsed_rows:
         existing = existing_index.get(key)
         if existing and allow_update:
-            existing.amount = amount
-            existing.status = status_value
-            existing.notes = notes_value
-            existing.description = description_value
+            existing.amount = values["amount"]
+            existing.status = values["status"]
+            existing.notes = values["notes"]
+            existing.description = values["description"]
             updated += 1
         elif existing:
             # Skip duplicate without update flag
             continue
         else:
-            payment = AdhocPayment(
-                model_id=model.id,
-                pay_date=pay_date,
-                amount=amount,
-                description=description_value,
-                notes=notes_value,
-                status=status_value,
-            )
+            payment = AdhocPayment(**values)
             session.add(payment)
             existing_index[key] = payment
             created += 1
 
-    session.flush()
+    if flush:
+        session.flush()
     return created, updated, errors
 
 
-def ensure_schedule_run(session: Session, options: RunOptions) -> ScheduleRun:
+def latest_runs_by_period(
+    session: Session, periods: Iterable[tuple[int, int]]
+) -> dict[tuple[int, int], ScheduleRun]:
+    """Fetch the most recent schedule run for each (year, month) in one query."""
+    wanted = set(periods)
+    if not wanted:
+        return {}
+    runs = (
+        session.query(ScheduleRun)
+        .filter(ScheduleRun.target_year.in_({year for year, _ in wanted}))
+        .order_by(ScheduleRun.created_at.asc())
+        .all()
+    )
+    latest: dict[tuple[int, int], ScheduleRun] = {}
+    for run in runs:
+        key = (run.target_year, run.target_month)
+        if key in wanted:
+            # Ascending order lets the newest run for a period win
+            latest[key] = run
+    return latest
+
+
+def ensure_schedule_run(
+    session: Session,
+    options: RunOptions,
+    runs_by_period: dict[tuple[int, int], ScheduleRun] | None = None,
+) -> ScheduleRun:
     if options.schedule_run_id:
         run = session.get(ScheduleRun, options.schedule_run_id)
         if not run:
@@ -531,20 +783,22 @@ def ensure_schedule_run(session: Session, options: RunOptions) -> ScheduleRun:
         raise ValueError("target_year and target_month are required for new schedule runs")
     if not 1 <= int(options.target_month) <= 12:
         raise ValueError("target_month must be between 1 and 12")
-    existing_run = (
-        session.query(ScheduleRun)
-        .filter(
-            ScheduleRun.target_year == int(options.target_year),
-            ScheduleRun.target_month == int(options.target_month),
+    if runs_by_period is not None:
+        existing_run = runs_by_period.get((int(options.target_year), int(options.target_month)))
+    else:
+        existing_run = (
+            session.query(ScheduleRun)
+            .filter(
+                ScheduleRun.target_year == int(options.target_year),
+                ScheduleRun.target_month == int(options.target_month),
+            )
+            .order_by(ScheduleRun.created_at.desc())
+            .first()
         )
-        .order_by(ScheduleRun.created_at.desc())
-        .first()
-    )
     if existing_run:
         existing_run.currency = str(options.currency).upper()
         existing_run.export_path = str(options.export_dir)
         existing_run.include_inactive = False
-        session.flush()
         return existing_run
     run = ScheduleRun(
         target_year=int(options.target_year),
@@ -553,7 +807,7 @@ def ensure_schedule_run(session: Session, options: RunOptions) -> ScheduleRun:
         include_inactive=False,
         summary_models_paid=0,
         summary_total_payout=Decimal("0"),
-        summary_frequency_counts="{}",
+        summary_frequency_counts={},
         export_path=str(options.export_dir),
     )
     session.add(run)
@@ -565,9 +819,10 @@ def import_payouts(
     df: pd.DataFrame,
     session: Session,
     run: ScheduleRun,
-) -> tuple[int, list[str]]:
+    models_by_code: dict[str, Model] | None = None,
+) -> tuple[int, list[RowError]]:
     created = 0
-    errors: list[str] = []
+    errors: list[RowError] = []
     # Prefetch existing payouts keyed by model/pay date so we can update instead of wiping the run
     existing_payouts = (
         session.query(Payout)
@@ -580,83 +835,113 @@ def import_payouts(
             continue
         existing_by_key[(payout.model_id, payout.pay_date)] = payout
     normalized = normalize_columns(df, PAYOUT_COLUMNS, "payout")
-    records = normalized.dropna(how="all")
-    # Normalize model codes by stripping whitespace and lowering for robust lookups
-    models_by_code = {m.code.strip().lower(): m for m in session.query(Model).all()}
-
-    payouts_to_add: list[Payout] = []
-    for idx, row in records.iterrows():
-        code_raw = row.get("code")
-        if pd.isna(code_raw):
-            errors.append(f"Row {_row_number(idx)}: payout code is missing")
-            continue
-        code = str(code_raw).strip()
-        if not code:
-            errors.append(f"Row {_row_number(idx)}: payout code is empty")
-            continue
-        model = models_by_code.get(code.lower())
-        if not model:
-            errors.append(f"Row {_row_number(idx)}: model '{code}' not found; import models first")
-            continue
-        try:
-            pay_date = parse_date_value(row.get("pay_date"), "pay date")
-            amount = parse_decimal_value(row.get("amount"), "amount")
-            status_value = normalize_payout_status(row.get("status"))
-            frequency = row.get("payment_frequency")
-            frequency_value = normalize_frequency(frequency) if not pd.isna(frequency) else model.payment_frequency
-            method_value = clean_string(row.get("payment_method")) or model.payment_method
-            notes_value = clean_string(row.get("notes"))
-        except ValueError as exc:
-            errors.append(f"Row {_row_number(idx)}: {exc}")
-            continue
+    records = _prepare_text_columns(normalized.dropna(how="all"), ("code",))
+    if models_by_code is None:
+        models_by_code = load_models_by_code(session)
+
+    new_payouts: list[dict[str, Any]] = []
+    # Updates are collected and applied as one executemany keyed on primary key
+    pending_updates: list[dict[str, Any]] = []
+    updated_payouts: list[Payout] = []
+    codes = records["code"].to_numpy(dtype=object)
+    models, model_errors = _lookup_models(records, models_by_code, "payout")
+    pay_dates, pay_date_errors = _parse_column(records, "pay_date", parse_date_value, "pay date")
+    amounts, amount_errors = _parse_column(records, "amount", parse_decimal_value, "amount")
+    statuses, status_errors = _parse_column(records, "status", normalize_payout_status)
+    frequencies, frequency_errors = _parse_column(records, "payment_frequency", _normalize_optional_frequency)
+    methods, _ = _parse_column(records, "payment_method", clean_string)
+    notes_values, _ = _parse_column(records, "notes", clean_string)
+    row_errors = _first_errors(
+        model_errors,
+        pay_date_errors,
+        amount_errors,
+        status_errors,
+        frequency_errors,
+        _length_errors(methods, "payment_method"),
+    )
+    errors.extend(_collect_row_errors(records, row_errors))
+
+    for position in np.flatnonzero(pd.isna(row_errors)):
+        model = models[position]
+        code = codes[position]
+        pay_date = pay_dates[position]
+        amount = amounts[position]
+        status_value = statuses[position]
+        frequency_value = frequencies[position] or model.payment_frequency
+        method_value = methods[position] or model.payment_method
+        notes_value = notes_values[position]
 
         existing_key = (model.id, pay_date)
         existing = existing_by_key.get(existing_key)
         if existing:
-            existing.code = code
-            existing.real_name = model.real_name
-            existing.working_name = model.working_name
-            existing.payment_method = method_value
-            existing.payment_frequency = frequency_value
-            existing.amount = amount
-            existing.status = status_value
-            existing.notes = notes_value
+            pending_updates.append(
+                {
+                    "id": existing.id,
+                    "code": code,
+                    "real_name": model.real_name,
+                    "working_name": model.working_name,
+                    "payment_method": method_value,
+                    "payment_frequency": frequency_value,
+                    "amount": amount,
+                    "status": status_value,
+                    "notes": notes_value,
+                }
+            )
+            updated_payouts.append(existing)
         else:
-            payout = Payout(
-                schedule_run_id=run.id,
-                model_id=model.id,
-                pay_date=pay_date,
-                code=code,
-                real_name=model.real_name,
-                working_name=model.working_name,
-                payment_method=method_value,
-                payment_frequency=frequency_value,
-                amount=amount,
-                status=status_value,
-                notes=notes_value,
+            new_payouts.append(
+                {
+                    "schedule_run_id": run.id,
+                    "model_id": model.id,
+                    "pay_date": pay_date,
+                    "code": code,
+                    "real_name": model.real_name,
+                    "working_name": model.working_name,
+                    "payment_method": method_value,
+                    "payment_frequency": frequency_value,
+                    "amount": amount,
+                    "status": status_value,
+                    "notes": notes_value,
+                }
             )
-            payouts_to_add.append(payout)
             created += 1
 
-    session.add_all(payouts_to_add)
+    if pending_updates:
+        session.execute(update(Payout), pending_updates)
+        # Bulk updates bypass the identity map; reload those rows on next access
+        for payout in updated_payouts:
+            session.expire(payout)
+    if new_payouts:
+        bulk_copy(session, Payout, new_payouts)
     session.flush()
     refresh_schedule_summary(session, run.id)
     return created, errors
 
 
 def refresh_schedule_summary(session: Session, run_id: int) -> None:
-    payouts = session.query(Payout).filter(Payout.schedule_run_id == run_id).all()
-    total = sum((p.amount for p in payouts), Decimal("0"))
-    paid_count = sum(1 for p in payouts if p.status == "paid")
+    # One grouped aggregate; the per-frequency rows are few enough to total in Python
+    summary_stmt = (
+        select(
+            Payout.payment_frequency,
+            func.count(),
+            func.coalesce(func.sum(Payout.amount), 0),
+            func.coalesce(func.sum(case((Payout.status == "paid", 1), else_=0)), 0),
+        )
+        .where(Payout.schedule_run_id == run_id)
+        .group_by(Payout.payment_frequency)
+    )
+    total = Decimal("0")
+    paid_count = 0
     freq_counts: dict[str, int] = {}
-    for payout in payouts:
-        freq = payout.payment_frequency or ""
-        freq_counts[freq] = freq_counts.get(freq, 0) + 1
+    for freq, count, amount, paid in session.execute(summary_stmt):
+        freq_counts[freq or ""] = int(count)
+        total += Decimal(amount or 0)
+        paid_count += int(paid)
     run = session.get(ScheduleRun, run_id)
     if run:
         run.summary_total_payout = total
         run.summary_models_paid = paid_count
-        run.summary_frequency_counts = json.dumps(freq_counts)
+        run.summary_frequency_counts = freq_counts
 
 
 def import_from_excel(
@@ -665,41 +950,37 @@ def import_from_excel(
     import_options: ImportOptions,
     run_options: RunOptions,
 ) -> ImportSummary:
-    model_df = load_sheet(workbook_bytes, import_options.model_sheet)
-    payout_df = load_sheet(workbook_bytes, import_options.payout_sheet)
-    adhoc_df: pd.DataFrame | None = None
+    with open_workbook(workbook_bytes) as workbook:
+        model_df = load_sheet(workbook, import_options.model_sheet, MODEL_COLUMNS)
+        payout_df = load_sheet(workbook, import_options.payout_sheet, PAYOUT_COLUMNS)
+        adjustment_df = load_optional_sheet(workbook, import_options.adjustments_sheet, ADJUSTMENT_COLUMNS)
+        adhoc_df = load_optional_sheet(workbook, import_options.adhoc_sheet, ADHOC_COLUMNS)
 
     summary = ImportSummary()
+    # Shared across every importer below; import_models registers new models in place
+    models_by_code = load_models_by_code(session)
 
     created_models, updated_models, model_errors = import_models(
         model_df,
         session,
         import_options.update_existing,
+        models_by_code,
+        flush=False,
     )
     summary.models_created = created_models
     summary.models_updated = updated_models
     summary.model_errors = model_errors
 
-    adjustment_df: pd.DataFrame | None = None
-    if import_options.adjustments_sheet:
-        try:
-            adjustment_df = load_sheet(workbook_bytes, import_options.adjustments_sheet)
-        except ValueError:
-            adjustment_df = None
     if adjustment_df is not None:
         created_adjustments, updated_adjustments, adjustment_errors = import_compensation_adjustments(
             adjustment_df,
             session,
+            models_by_code,
+            flush=False,
         )
         summary.adjustments_created = created_adjustments
         summary.adjustments_updated = updated_adjustments
         summary.adjustment_errors = adjustment_errors
-    # Load optional Adhoc sheet
-    if import_options.adhoc_sheet:
-        try:
-            adhoc_df = load_sheet(workbook_bytes, import_options.adhoc_sheet)
-        except ValueError:
-            adhoc_df = None
 
     if run_options.auto_generate_runs:
         grouped_frames, grouping_errors = group_payout_rows_by_month(payout_df)
@@ -709,13 +990,18 @@ def import_from_excel(
             if not grouping_errors:
                 # Gracefully handle an empty Payouts sheet: don't fail the import.
                 # Return a summary with zero payouts and no schedule runs.
-                summary.payout_errors.append("No payout rows to import (Payouts sheet is empty).")
+                summary.payout_errors.append(RowError(None, "No payout rows to import (Payouts sheet is empty)."))
+                session.flush()
                 return summary
             # Make invalid pay dates non-fatal: surface errors in the summary and finish gracefully.
-            summary.payout_errors.append("No valid pay dates found; unable to auto-create schedule runs.")
+            summary.payout_errors.append(RowError(None, "No valid pay dates found; unable to auto-create schedule runs."))
+            session.flush()
             return summary
 
-        for (year, month), subset in sorted(grouped_frames.items()):
+        runs_by_period = latest_runs_by_period(session, grouped_frames.keys())
+        # Keys are already in ascending period order; pop each month so its frame is freed once imported
+        for year, month in list(grouped_frames):
+            subset = grouped_frames.pop((year, month))
             per_run_options = RunOptions(
                 schedule_run_id=None,
                 create_schedule_run=True,
@@ -724,22 +1010,20 @@ def import_from_excel(
                 currency=run_options.currency,
                 export_dir=run_options.export_dir,
             )
-            run = ensure_schedule_run(session, per_run_options)
+            run = ensure_schedule_run(session, per_run_options, runs_by_period)
             summary.schedule_run_ids.append(run.id)
             if summary.schedule_run_id is None:
                 summary.schedule_run_id = run.id
 
-            created_payouts, payout_errors = import_payouts(subset, session, run)
+            created_payouts, payout_errors = import_payouts(subset, session, run, models_by_code)
             summary.payouts_created += created_payouts
-            summary.payout_errors.extend(
-                [f"{year:04d}-{month:02d}: {message}" for message in payout_errors]
-            )
+            summary.payout_errors.extend(replace(error, period=(year, month)) for error in payout_errors)
     else:
         run = ensure_schedule_run(session, run_options)
         summary.schedule_run_id = run.id
         summary.schedule_run_ids.append(run.id)
 
-        created_payouts, payout_errors = import_payouts(payout_df, session, run)
+        created_payouts, payout_errors = import_payouts(payout_df, session, run, models_by_code)
         summary.payouts_created = created_payouts
         summary.payout_errors = payout_errors
 
@@ -749,9 +1033,13 @@ def import_from_excel(
             adhoc_df,
             session,
             import_options.update_existing,
+            models_by_code,
+            flush=False,
         )
         summary.adhoc_created = adhoc_created
         summary.adhoc_updated = adhoc_updated
         summary.adhoc_errors = adhoc_errors
 
+    # Single flush for everything the importers above left pending
+    session.flush()
     return summary
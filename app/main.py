@@ -1,23 +1,55 @@
 """FastAPI entry point for the payroll application."""
 from __future__ import annotations
 
+import asyncio
+import re
 from contextlib import asynccontextmanager
 
+from anyio import to_thread
 from fastapi import FastAPI, Response, Request
 from fastapi.responses import RedirectResponse
 from fastapi import status, HTTPException
 from fastapi.responses import JSONResponse
-from urllib.parse import quote
+from urllib.parse import parse_qs, quote
 from fastapi.staticfiles import StaticFiles
+from starlette.types import Scope
 
-from app.database import init_db
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE, init_db
+from app.dependencies import warm_templates
 from app import __version__
+from app.security import flush_login_attempts, flush_login_attempts_periodically
 from app.routers import admin, analytics, auth, changelog, dashboard, models, profile, schedules
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db()
+    warm_templates()
+    changelog.warm_changelog()
+    # Sync handlers hold a worker thread for each blocking query; allow as many threads as the
+    # connection pool can serve instead of AnyIO's default of 40
+    to_thread.current_default_thread_limiter().total_tokens = max(40, DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    attempt_flusher = asyncio.create_task(flush_login_attempts_periodically())
     yield
+    attempt_flusher.cancel()
+    flush_login_attempts()
+
+
+class CachedStaticFiles(StaticFiles):
+    """Static files with browser caching on top of Starlette's ETag/Last-Modified handling.
+
+    URLs carrying a ``v`` query parameter (templates append the app version) are cached as
+    immutable for a year; anything else is revalidated with the ETag on each use.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            if query.get("v"):
+                response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+            else:
+                response.headers["Cache-Control"] = "no-cache"
+        return response
 
 
 app = FastAPI(title="Payroll Desk", version=__version__, lifespan=lifespan)
@@ -31,7 +63,7 @@ app.include_router(dashboard.router)
 app.include_router(models.router)
 app.include_router(schedules.router)
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="app/static"), name="static")
 
 
 @app.get("/")
@@ -45,6 +77,19 @@ def health() -> Response:
     return Response(content='{"status":"ok"}', media_type="application/json")
 
 
+_HTML_MEDIA = re.compile(r"\btext/html\b")
+
+
+def _wants_html(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    if _HTML_MEDIA.search(accept):
+        return True
+    if request.headers.get("sec-fetch-mode") == "navigate":
+        return True
+    # A bare */* only counts as a browser for GETs that don't also ask for JSON
+    return request.method == "GET" and "*/*" in accept and "application/json" not in accept
+
+
 # Custom handler: redirect unauthenticated HTML requests to /login instead of JSON 401
 @app.exception_handler(HTTPException)
 async def http_exception_redirect_login(request: Request, exc: HTTPException):
@@ -52,15 +97,14 @@ async def http_exception_redirect_login(request: Request, exc: HTTPException):
 
     Logic:
     - If status != 401, fall back to normal JSON style.
-    - If 401 and client likely expects HTML (Accept header includes text/html or navigating via browser), issue 303 redirect.
-    - Otherwise return JSON (e.g. for fetch/XHR expecting application/json).
+    - If 401 and client likely expects HTML (Accept header includes text/html, a browser navigation,
+      or a plain GET accepting */* without asking for JSON), issue 303 redirect.
+    - Otherwise return JSON (e.g. for fetch/XHR expecting application/json, or non-GET */* callers).
     """
     if exc.status_code != status.HTTP_401_UNAUTHORIZED:
         return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
-    accept = request.headers.get("accept", "")
-    wants_html = "text/html" in accept or "*/*" in accept  # browsers often send */*
-    if wants_html:
+    if _wants_html(request):
         # Preserve original target so we can return after login
         original = request.url.path
         if request.url.query:
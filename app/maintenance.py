@@ -0,0 +1,185 @@
+"""Admin maintenance jobs that run after the HTTP response has been sent.
+
+Each job is recorded in ``maintenance_tasks`` so the admin UI can poll its status.
+Jobs run in the web worker through FastAPI background tasks with their own session.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import func, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.database import SessionLocal
+from app.exporting import export_full_workbook
+from app.models import MaintenanceTask
+
+# Generated workbooks are kept this long, then removed by the next export
+EXPORT_DIR = Path(os.getenv("PAYROLL_EXPORT_DIR") or Path(tempfile.gettempdir()) / "payroll-exports")
+EXPORT_RETENTION_SECONDS = 3600
+# Jobs run inside a web worker, so one that dies with its worker is never finished. The runner
+# refreshes heartbeat_at every TASK_HEARTBEAT_SECONDS while the job executes; a pending or
+# running task whose heartbeat is older than TASK_TIMEOUT_SECONDS is reported as failed.
+TASK_HEARTBEAT_SECONDS = 30
+TASK_TIMEOUT_SECONDS = 300
+_UNFINISHED_STATUSES = ("pending", "running")
+
+
+def _cleanup_empty_runs(db: Session, params: dict[str, Any]) -> tuple[dict[str, Any], str]:
+    result = crud.cleanup_empty_runs(db)
+    return result, f"Deleted {result['deleted_runs']} empty run(s)."
+
+
+def _cleanup_orphans(db: Session, params: dict[str, Any]) -> tuple[dict[str, Any], str]:
+    result = crud.cleanup_orphans(db)
+    return result, f"Removed {result['payouts']} orphan payout(s), {result['validations']} orphan validation(s)."
+
+
+def _reset_application_data(db: Session, params: dict[str, Any]) -> tuple[dict[str, Any], str]:
+    result = crud.reset_application_data(db)
+    message = (
+        f"Reset complete: models={result.get('models',0)}, runs={result.get('schedule_runs',0)}, "
+        f"payouts={result.get('payouts',0)}, validations={result.get('validations',0)}, "
+        f"adhoc={result.get('adhoc_payments',0)}, adjustments={result.get('adjustments',0)}, "
+        f"advances={result.get('model_advances',0)}, repayments={result.get('advance_repayments',0)}."
+    )
+    return result, message
+
+
+def _purge_model(db: Session, params: dict[str, Any]) -> tuple[dict[str, Any], str]:
+    impact = crud.purge_model_hard(db, params["model_id"])
+    return {"impact": impact}, f"Purged model {impact.get('model_code', '')} and its related records."
+
+
+def _export_workbook(db: Session, params: dict[str, Any]) -> tuple[dict[str, Any], str]:
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    cutoff = time.time() - EXPORT_RETENTION_SECONDS
+    for stale in EXPORT_DIR.glob("payroll_full_export_*.xlsx"):
+        if stale.stat().st_mtime < cutoff:
+            stale.unlink(missing_ok=True)
+    (EXPORT_DIR / params["filename"]).write_bytes(export_full_workbook(db))
+    return {"filename": params["filename"]}, "Workbook is ready to download."
+
+
+# kind -> (audit action, job). Jobs return the audit details and a message for the admin.
+TASK_RUNNERS: dict[str, tuple[str, Callable[[Session, dict[str, Any]], tuple[dict[str, Any], str]]]] = {
+    "cleanup_empty_runs": ("cleanup_empty_runs", _cleanup_empty_runs),
+    "cleanup_orphans": ("cleanup_orphans", _cleanup_orphans),
+    "reset_application_data": ("reset_application_data", _reset_application_data),
+    "purge_model": ("purge_model", _purge_model),
+    "export_workbook": ("export_workbook", _export_workbook),
+}
+
+
+def enqueue_task(db: Session, kind: str, requested_by: int | None, params: dict[str, Any] | None = None) -> MaintenanceTask:
+    """Record a pending task; the caller schedules run_task(task.id) as a background task."""
+    if kind not in TASK_RUNNERS:
+        raise ValueError(f"Unknown maintenance task: {kind}")
+    task = MaintenanceTask(kind=kind, requested_by=requested_by, params=params or {})
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+    return task
+
+
+def get_task(db: Session, task_id: int) -> MaintenanceTask | None:
+    """Load a task, failing it first if its heartbeat is older than TASK_TIMEOUT_SECONDS."""
+    task = db.get(MaintenanceTask, task_id)
+    now = datetime.now()
+    cutoff = now - timedelta(seconds=TASK_TIMEOUT_SECONDS)
+    if (
+        task is not None
+        and task.status in _UNFINISHED_STATUSES
+        and (task.heartbeat_at or task.created_at) < cutoff
+    ):
+        # Conditional, so a heartbeat or a finished job landing meanwhile is not overwritten
+        db.execute(
+            update(MaintenanceTask)
+            .where(
+                MaintenanceTask.id == task_id,
+                MaintenanceTask.status.in_(_UNFINISHED_STATUSES),
+                func.coalesce(MaintenanceTask.heartbeat_at, MaintenanceTask.created_at) < cutoff,
+            )
+            .values(status="failed", error="Timed out; the task stopped reporting progress.", finished_at=now)
+        )
+        db.commit()
+    return task
+
+
+def _beat(new_session: Callable[[], Session], task_id: int, stop: threading.Event) -> None:
+    """Refresh the running task's heartbeat until ``stop`` is set."""
+    while not stop.wait(TASK_HEARTBEAT_SECONDS):
+        try:
+            with new_session() as db:
+                db.execute(
+                    update(MaintenanceTask)
+                    .where(MaintenanceTask.id == task_id, MaintenanceTask.status == "running")
+                    .values(heartbeat_at=datetime.now())
+                )
+                db.commit()
+        except Exception as exc:
+            print(f"[maintenance] Heartbeat for task {task_id} failed: {type(exc).__name__}: {exc}")
+
+
+def run_task(task_id: int, bind: Engine | Connection | None = None) -> None:
+    """Execute a recorded task in a fresh session, storing its outcome on the task row.
+
+    ``bind`` is the engine the task was recorded on; it defaults to the application database.
+    Status changes are conditional updates: only a pending task is started, and only a running
+    one is finished, so a task already failed by get_task keeps that outcome.
+    """
+
+    def new_session() -> Session:
+        return Session(bind=bind, autoflush=False) if bind is not None else SessionLocal()
+
+    db = new_session()
+    try:
+        claimed = db.execute(
+            update(MaintenanceTask)
+            .where(MaintenanceTask.id == task_id, MaintenanceTask.status == "pending")
+            .values(status="running", heartbeat_at=datetime.now())
+        )
+        db.commit()
+        if not claimed.rowcount:
+            return
+        task = db.get(MaintenanceTask, task_id)
+        kind, requested_by, params = task.kind, task.requested_by, dict(task.params or {})
+
+        action, job = TASK_RUNNERS[kind]
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_beat, args=(new_session, task_id, stop), name=f"task-heartbeat-{task_id}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            details, message = job(db, params)
+        except Exception as exc:
+            db.rollback()
+            print(f"[maintenance] Task {task_id} ({kind}) failed: {type(exc).__name__}: {exc}")
+            outcome = {"status": "failed", "error": str(exc) or type(exc).__name__}
+        else:
+            try:
+                crud.log_admin_action(db, requested_by, action, details)
+            except Exception:
+                # Logging should not block the action
+                db.rollback()
+            outcome = {"status": "succeeded", "message": message}
+        finally:
+            stop.set()
+            heartbeat.join()
+        db.execute(
+            update(MaintenanceTask)
+            .where(MaintenanceTask.id == task_id, MaintenanceTask.status == "running")
+            .values(finished_at=datetime.now(), **outcome)
+        )
+        db.commit()
+    finally:
+        db.close()
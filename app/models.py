@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 from decimal import Decimal
+from enum import IntEnum
 
 from sqlalchemy import (
     Boolean,
@@ -13,11 +14,18 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    JSON,
+    MetaData,
     Numeric,
+    SmallInteger,
     String,
+    Table,
     Text,
+    TypeDecorator,
     UniqueConstraint,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -26,6 +34,48 @@ STATUS_ENUM = ("Active", "Inactive")
 FREQUENCY_ENUM = ("weekly", "biweekly", "monthly")
 PAYOUT_STATUS_ENUM = ("paid", "approved", "on_hold", "not_paid")
 ADHOC_PAYMENT_STATUS_ENUM = ("pending", "paid", "cancelled")
+# Free-text model fields are stored as TEXT; their length limits are enforced on input instead
+MODEL_TEXT_LIMITS = {"real_name": 200, "working_name": 200, "payment_method": 100, "crypto_wallet": 200}
+
+
+class PayoutStatus(IntEnum):
+    """Storage codes for payout statuses; names match PAYOUT_STATUS_ENUM."""
+
+    NOT_PAID = 0
+    ON_HOLD = 1
+    APPROVED = 2
+    PAID = 3
+
+
+# Matches the overdue filters' status IN ('not_paid', 'on_hold') once bound to codes
+_UNSETTLED_PAYOUT_CODES = f"status IN ({int(PayoutStatus.NOT_PAID)}, {int(PayoutStatus.ON_HOLD)})"
+
+
+class CodedStatus(TypeDecorator):
+    """Store a status vocabulary as SMALLINT codes while the ORM keeps its string names."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: type[IntEnum]):
+        super().__init__()
+        self.enum_class = enum_class
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, self.enum_class):
+            return int(value)
+        try:
+            return int(self.enum_class[str(value).upper()])
+        except KeyError:
+            raise ValueError(f"Unsupported status '{value}'") from None
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # int() also accepts codes SQLite hands back from a legacy VARCHAR column
+        return self.enum_class(int(value)).name.lower()
 
 
 class Model(Base):
@@ -34,34 +84,51 @@ class Model(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     status: Mapped[str] = mapped_column(String(20), nullable=False, default="Active")
     code: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
-    real_name: Mapped[str] = mapped_column(String(200), nullable=False)
-    working_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    real_name: Mapped[str] = mapped_column(Text, nullable=False)
+    working_name: Mapped[str] = mapped_column(Text, nullable=False)
     start_date: Mapped[date] = mapped_column(Date, nullable=False)
-    payment_method: Mapped[str] = mapped_column(String(100), nullable=False)
+    payment_method: Mapped[str] = mapped_column(Text, nullable=False)
     payment_frequency: Mapped[str] = mapped_column(String(20), nullable=False)
     amount_monthly: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
-    crypto_wallet: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    crypto_wallet: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Sum of approved/active advance balances, kept current by database triggers on
+    # model_advances (see database.ensure_advance_remaining_triggers); never written by the app
+    active_advance_remaining: Mapped[Decimal] = mapped_column(
+        Numeric(12, 2), nullable=False, default=Decimal("0"), server_default="0"
+    )
+    # Sum of paid payouts, kept current by database triggers on payouts
+    # (see database.ensure_lifetime_paid_triggers); never written by the app
+    lifetime_paid: Mapped[Decimal] = mapped_column(
+        Numeric(12, 2), nullable=False, default=Decimal("0"), server_default="0"
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now, onupdate=datetime.now, nullable=False
     )
 
-    payouts: Mapped[list["Payout"]] = relationship(back_populates="model", cascade="all, delete-orphan")
+    # passive_deletes: crud.delete_model removes child rows with bulk DELETEs instead of
+    # loading every collection just to delete its members one by one
+    payouts: Mapped[list["Payout"]] = relationship(
+        back_populates="model", cascade="all, delete-orphan", passive_deletes=True
+    )
     validations: Mapped[list["ValidationIssue"]] = relationship(
-        back_populates="model", cascade="all, delete-orphan"
+        back_populates="model", cascade="all, delete-orphan", passive_deletes=True
     )
     compensation_adjustments: Mapped[list["ModelCompensationAdjustment"]] = relationship(
         back_populates="model",
         cascade="all, delete-orphan",
-        order_by="ModelCompensationAdjustment.effective_date",
+        passive_deletes=True,
     )
     adhoc_payments: Mapped[list["AdhocPayment"]] = relationship(
         back_populates="model",
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     __table_args__ = (
         CheckConstraint("amount_monthly > 0", name="ck_models_amount_positive"),
+        # Top earners read the head of this index instead of summing payouts
+        Index("ix_models_lifetime_paid", "lifetime_paid"),
     )
 
 
@@ -75,13 +142,17 @@ class ScheduleRun(Base):
     include_inactive: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     summary_models_paid: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     summary_total_payout: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
-    summary_frequency_counts: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    summary_frequency_counts: Mapped[dict[str, int]] = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"), nullable=False, default=dict
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
     export_path: Mapped[str] = mapped_column(String(255), nullable=False, default="exports")
 
-    payouts: Mapped[list["Payout"]] = relationship(back_populates="schedule_run", cascade="all, delete-orphan")
+    payouts: Mapped[list["Payout"]] = relationship(
+        back_populates="schedule_run", cascade="all, delete-orphan", passive_deletes=True
+    )
     validations: Mapped[list["ValidationIssue"]] = relationship(
-        back_populates="schedule_run", cascade="all, delete-orphan"
+        back_populates="schedule_run", cascade="all, delete-orphan", passive_deletes=True
     )
 
 
@@ -93,23 +164,44 @@ class Payout(Base):
     model_id: Mapped[int] = mapped_column(ForeignKey("models.id", ondelete="SET NULL"), nullable=True)
     pay_date: Mapped[date] = mapped_column(Date, nullable=False)
     code: Mapped[str] = mapped_column(String(50), nullable=False)
-    real_name: Mapped[str] = mapped_column(String(200), nullable=False)
-    working_name: Mapped[str] = mapped_column(String(200), nullable=False)
-    payment_method: Mapped[str] = mapped_column(String(100), nullable=False)
+    real_name: Mapped[str] = mapped_column(Text, nullable=False)
+    working_name: Mapped[str] = mapped_column(Text, nullable=False)
+    payment_method: Mapped[str] = mapped_column(Text, nullable=False)
     payment_frequency: Mapped[str] = mapped_column(String(20), nullable=False)
     amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
-    status: Mapped[str] = mapped_column(String(20), nullable=False, default="not_paid")
+    status: Mapped[str] = mapped_column(CodedStatus(PayoutStatus), nullable=False, default="not_paid")
 
     schedule_run: Mapped[ScheduleRun] = relationship(back_populates="payouts")
     model: Mapped[Model] = relationship(back_populates="payouts")
 
+    __table_args__ = (
+        Index("ix_payouts_run_status", "schedule_run_id", "status"),
+        Index("ix_payouts_model_paydate", "model_id", "pay_date"),
+        Index("ix_payouts_status_paydate", "status", "pay_date"),
+        # Date-range analytics scan pay_date first; INCLUDE lets PostgreSQL total amounts from the index
+        Index("ix_payouts_paydate_status", "pay_date", "status", postgresql_include=["amount"]),
+        # Overdue lookups only ever want unsettled rows, which stay a small slice of the table
+        Index(
+            "ix_payouts_unsettled_paydate",
+            "pay_date",
+            postgresql_where=text(_UNSETTLED_PAYOUT_CODES),
+            sqlite_where=text(_UNSETTLED_PAYOUT_CODES),
+        ),
+        CheckConstraint(
+            f"status IN ({', '.join(str(int(code)) for code in PayoutStatus)})",
+            name="ck_payouts_status_valid",
+        ),
+    )
+
 
 class ValidationIssue(Base):
     __tablename__ = "validation_issues"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    schedule_run_id: Mapped[int] = mapped_column(ForeignKey("schedule_runs.id", ondelete="CASCADE"), nullable=False)
+    schedule_run_id: Mapped[int] = mapped_column(
+        ForeignKey("schedule_runs.id", ondelete="CASCADE"), nullable=False, index=True
+    )
     model_id: Mapped[int] = mapped_column(ForeignKey("models.id", ondelete="SET NULL"), nullable=True)
     severity: Mapped[str] = mapped_column(String(20), nullable=False)
     issue: Mapped[str] = mapped_column(Text, nullable=False)
@@ -129,7 +221,14 @@ class LoginAttempt(Base):
     attempted_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False, index=True)
 
     __table_args__ = (
-        Index("idx_failed_attempts", "username", "success", "attempted_at"),
+        # Lockout checks only look at failures, so successful logins stay out of this index
+        Index(
+            "ix_login_attempts_failed",
+            "username",
+            "attempted_at",
+            postgresql_where=text("success = false"),
+            sqlite_where=text("success = 0"),
+        ),
     )
 
 
@@ -151,6 +250,7 @@ class ModelCompensationAdjustment(Base):
     __table_args__ = (
         UniqueConstraint("model_id", "effective_date", name="uq_adjustment_model_date"),
         CheckConstraint("amount_monthly > 0", name="ck_adjustment_amount_positive"),
+        Index("ix_adjustments_effective_date", "effective_date"),
     )
 
 
@@ -177,6 +277,15 @@ class AdhocPayment(Base):
             "status IN ('pending', 'paid', 'cancelled')",
             name="ck_adhoc_payments_status_valid",
         ),
+        Index("ix_adhoc_payments_paydate_status", "pay_date", "status", postgresql_include=["amount"]),
+        # The dashboard lists pending payments by date; settled ones make up most of the table
+        Index(
+            "ix_adhoc_payments_pending_paydate",
+            "pay_date",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
     )
 
 class AuditLog(Base):
@@ -184,10 +293,46 @@ class AuditLog(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    action: Mapped[str] = mapped_column(String(100), nullable=False)
+    action: Mapped[str] = mapped_column(Text, nullable=False)
     details: Mapped[str] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
 
+    __table_args__ = (
+        # Append-only and written in created_at order, so a BRIN index stays a few pages in size
+        Index(
+            "ix_audit_logs_created_brin",
+            "created_at",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class MaintenanceTask(Base):
+    """A long-running admin maintenance job executed after its request returns."""
+
+    __tablename__ = "maintenance_tasks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    # pending -> running -> succeeded | failed
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    requested_by: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    params: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
+    # Refreshed by the runner while the job executes; a stale heartbeat means its worker is gone
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, default=datetime.now, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('pending', 'running', 'succeeded', 'failed')",
+            name="ck_maintenance_tasks_status_valid",
+        ),
+    )
+
 
 # --- Cash advance feature models -------------------------------------------
 
@@ -222,7 +367,7 @@ class ModelAdvance(Base):
 
     model: Mapped[Model] = relationship(back_populates="advances")
     repayments: Mapped[list["AdvanceRepayment"]] = relationship(
-        back_populates="advance", cascade="all, delete-orphan"
+        back_populates="advance", cascade="all, delete-orphan", passive_deletes=True
     )
 
     __table_args__ = (
@@ -250,6 +395,7 @@ class AdvanceRepayment(Base):
 
     __table_args__ = (
         CheckConstraint("amount > 0", name="ck_advance_repayment_amount_positive"),
+        Index("ix_advance_repayments_advance_created", "advance_id", "created_at"),
     )
 
 
@@ -266,10 +412,34 @@ class PayoutAdvanceAllocation(Base):
 
     __table_args__ = (
         CheckConstraint("planned_amount > 0", name="ck_payout_allocation_amount_positive"),
+        Index("ix_payout_allocations_run_advance", "schedule_run_id", "advance_id"),
     )
 
 
 # Back-populate relationships added after class definitions
 Model.advances = relationship(
-    "ModelAdvance", back_populates="model", cascade="all, delete-orphan"
+    "ModelAdvance", back_populates="model", cascade="all, delete-orphan", passive_deletes=True
 )
+
+
+class ActiveModelState(Base):
+    """Read-only mapping of the ``v_active_model_state`` view created by ensure_schema_updates.
+
+    The table lives on its own MetaData so create_all never tries to create it as a table.
+    """
+
+    __table__ = Table(
+        "v_active_model_state",
+        MetaData(),
+        Column("model_id", Integer, primary_key=True),
+        Column("code", String(50), nullable=False),
+        Column("payment_frequency", String(20), nullable=False),
+        Column("effective_amount", Numeric(12, 2), nullable=False),
+        Column("advance_remaining", Numeric(12, 2), nullable=False),
+    )
+
+    model_id: Mapped[int]
+    code: Mapped[str]
+    payment_frequency: Mapped[str]
+    effective_amount: Mapped[Decimal]
+    advance_remaining: Mapped[Decimal]
@@ -0,0 +1,45 @@
+"""Fixed-window request counters for throttling abusive clients before expensive work."""
+from __future__ import annotations
+
+import math
+import threading
+import time
+
+# Expired windows are swept once the table grows past this many keys
+_SWEEP_THRESHOLD = 10_000
+
+# key -> (window number, hits, window length). Windows are aligned buckets of the clock
+# (now // window), so a counter from an earlier bucket is simply stale: no start times to
+# compare and nothing to reset when a hit lands in a new window.
+_windows: dict[str, tuple[int, int, int]] = {}
+_lock = threading.Lock()
+
+
+def check(key: str, limit: int, window: int) -> tuple[bool, int]:
+    """Count a hit against ``key`` and report whether it is within ``limit`` per ``window`` seconds.
+
+    Returns (allowed, retry_after_seconds); retry_after is 0 when the hit is allowed.
+    Counters live in this process, so each worker enforces the limit on its own share of traffic.
+    """
+    now = time.monotonic()
+    bucket = int(now // window)
+    with _lock:
+        current, count, _ = _windows.get(key, (bucket, 0, window))
+        count = count + 1 if current == bucket else 1
+        _windows[key] = (bucket, count, window)
+        if len(_windows) > _SWEEP_THRESHOLD:
+            _sweep(now)
+    if count <= limit:
+        return True, 0
+    return False, max(1, math.ceil((bucket + 1) * window - now))
+
+
+def _sweep(now: float) -> None:
+    for key in [key for key, (bucket, _, window) in _windows.items() if bucket != int(now // window)]:
+        del _windows[key]
+
+
+def reset() -> None:
+    """Forget every counter (used by tests)."""
+    with _lock:
+        _windows.clear()
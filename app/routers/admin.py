@@ -1,8 +1,9 @@
 """Admin routes for user and data administration."""
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Form, HTTPException, Request, Query
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, HTTPException, Request, Query
+from fastapi.responses import RedirectResponse, JSONResponse, Response
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.engine.url import make_url
@@ -11,9 +12,11 @@ import os
 from app import crud
 from app.auth import User
 from app.database import get_session, engine, DATABASE_URL
-from app.dependencies import templates
+from app.dependencies import etag_matches, page_etag, templates
+from app.maintenance import enqueue_task, get_task, run_task
+from app.models import AuditLog, MaintenanceTask
 from app.routers.auth import get_current_user, get_admin_user
-from app.security import unlock_account
+from app.security import LOGIN_ATTEMPT_RETENTION_DAYS, purge_login_attempts, unlock_account
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -25,7 +28,14 @@ def list_users(
     admin: User = Depends(get_admin_user),
 ):
     """List all users (admin only)."""
-    users = db.query(User).all()
+    # The template only reads these columns, so rows double as the ETag fingerprint
+    users = db.execute(
+        select(User.id, User.username, User.role, User.is_locked, User.created_at).order_by(User.id)
+    ).all()
+    etag = page_etag(admin.id, admin.username, admin.role, request.url.query, [tuple(row) for row in users])
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
     return templates.TemplateResponse(
         "admin/users.html",
         {
@@ -33,6 +43,7 @@ def list_users(
             "users": users,
             "user": admin,
         },
+        headers=headers,
     )
 
 
@@ -62,20 +73,6 @@ def create_user(
     admin: User = Depends(get_admin_user),
 ):
     """Create a new user (admin only)."""
-    # Check if username already exists
-    existing = db.query(User).filter(User.username == username).first()
-    if existing:
-        return templates.TemplateResponse(
-            "admin/user_form.html",
-            {
-                "request": request,
-                "action": "create",
-                "error": "Username already exists",
-                "user": admin,
-            },
-            status_code=400,
-        )
-    
     # Validate role
     if role not in ["admin", "user"]:
         return templates.TemplateResponse(
@@ -95,8 +92,9 @@ def create_user(
         db.commit()
     except IntegrityError as e:
         db.rollback()
-        # Handle unique constraint violation
-        if "username" in str(e):
+        # The unique index on users.username is the only duplicate check, so there is no
+        # window between a pre-check SELECT and the INSERT
+        if "username" in str(e.orig):
             return templates.TemplateResponse(
                 "admin/user_form.html",
                 {
@@ -119,7 +117,7 @@ def edit_user_form(
     admin: User = Depends(get_admin_user),
 ):
     """Show user edit form (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -143,7 +141,7 @@ def update_user(
     admin: User = Depends(get_admin_user),
 ):
     """Update user role (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -188,7 +186,7 @@ def reset_user_password(
     admin: User = Depends(get_admin_user),
 ):
     """Reset user password (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -204,7 +202,7 @@ def unlock_user_account(
     admin: User = Depends(get_admin_user),
 ):
     """Unlock a locked user account (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -224,15 +222,18 @@ def delete_user(
     admin: User = Depends(get_admin_user),
 ):
     """Delete user (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Prevent admin from deleting their own account
-    if user.id == admin.id:
+    if user_id == admin.id:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
-    
-    db.delete(user)
+
+    # Audit and task rows outlive the account. The schema declares ON DELETE SET NULL, but SQLite
+    # only honours it with the foreign_keys pragma on, so the references are cleared explicitly.
+    db.execute(update(AuditLog).where(AuditLog.user_id == user_id).values(user_id=None))
+    db.execute(update(MaintenanceTask).where(MaintenanceTask.requested_by == user_id).values(requested_by=None))
+    result = db.execute(delete(User).where(User.id == user_id))
+    if not result.rowcount:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="User not found")
     db.commit()
     return RedirectResponse(url="/admin/users", status_code=303)
 
@@ -262,25 +263,27 @@ def purge_model_preview(
 def purge_model_execute(
     model_id: int,
     request: Request,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_session),
     admin: User = Depends(get_admin_user),
 ):
-    """Execute the hard purge of a model and related records (admin only)."""
-    try:
-        impact = crud.purge_model_hard(db, model_id)
-    except ValueError as exc:
-        raise HTTPException(status_code=404, detail=str(exc))
+    """Queue the hard purge of a model and related records (admin only)."""
+    if not crud.get_model(db, model_id):
+        raise HTTPException(status_code=404, detail="Model not found")
+    return _start_task(db, background_tasks, "purge_model", admin, {"model_id": model_id})
 
-    # Log admin action
-    try:
-        crud.log_admin_action(db, admin.id, "purge_model", {"impact": impact})
-    except Exception:
-        # Logging should not block the action
-        pass
 
-    # Redirect to models list with a lightweight success note in query
-    code = impact.get("model_code", "")
-    return RedirectResponse(url=f"/models?purged={code}", status_code=303)
+def _start_task(
+    db: Session,
+    background_tasks: BackgroundTasks,
+    kind: str,
+    admin: User,
+    params: dict | None = None,
+) -> RedirectResponse:
+    """Record a maintenance task, run it after the response, and send the admin to its status page."""
+    task = enqueue_task(db, kind, admin.id, params)
+    background_tasks.add_task(run_task, task.id)
+    return RedirectResponse(url=f"/admin/tasks/{task.id}", status_code=303)
 
 
 # --- Admin Settings & Maintenance ------------------------------------------
@@ -302,36 +305,42 @@ def admin_settings(
 @router.post("/maintenance/cleanup-empty-runs")
 def maintenance_cleanup_empty_runs(
     request: Request,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_session),
     admin: User = Depends(get_admin_user),
 ):
-    result = crud.cleanup_empty_runs(db)
-    try:
-        crud.log_admin_action(db, admin.id, "cleanup_empty_runs", result)
-    except Exception:
-        pass
-    msg = f"Deleted {result['deleted_runs']} empty run(s)."
-    return RedirectResponse(url=f"/admin/settings?message={msg}", status_code=303)
+    return _start_task(db, background_tasks, "cleanup_empty_runs", admin)
 
 
 @router.post("/maintenance/cleanup-orphans")
 def maintenance_cleanup_orphans(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_session),
+    admin: User = Depends(get_admin_user),
+):
+    return _start_task(db, background_tasks, "cleanup_orphans", admin)
+
+
+@router.post("/maintenance/purge-login-attempts")
+def maintenance_purge_login_attempts(
     request: Request,
     db: Session = Depends(get_session),
     admin: User = Depends(get_admin_user),
 ):
-    result = crud.cleanup_orphans(db)
+    removed = purge_login_attempts(db)
     try:
-        crud.log_admin_action(db, admin.id, "cleanup_orphans", result)
+        crud.log_admin_action(db, admin.id, "purge_login_attempts", {"deleted": removed})
     except Exception:
         pass
-    msg = f"Removed {result['payouts']} orphan payout(s), {result['validations']} orphan validation(s)."
+    msg = f"Deleted {removed} login attempt(s) older than {LOGIN_ATTEMPT_RETENTION_DAYS} days."
     return RedirectResponse(url=f"/admin/settings?message={msg}", status_code=303)
 
 
 @router.post("/maintenance/reset-application-data")
 def maintenance_reset_application_data(
     request: Request,
+    background_tasks: BackgroundTasks,
     confirm_text: str = Form(...),
     db: Session = Depends(get_session),
     admin: User = Depends(get_admin_user),
@@ -343,20 +352,24 @@ def maintenance_reset_application_data(
     if (confirm_text or "").strip().upper() != "RESET":
         return RedirectResponse(url="/admin/settings?error=Please+type+RESET+to+confirm", status_code=303)
 
-    result = crud.reset_application_data(db)
-    try:
-        crud.log_admin_action(db, admin.id, "reset_application_data", result)
-    except Exception:
-        pass
+    return _start_task(db, background_tasks, "reset_application_data", admin)
+
 
-    # Build a compact message
-    msg = (
-        f"Reset complete: models={result.get('models',0)}, runs={result.get('schedule_runs',0)}, "
-        f"payouts={result.get('payouts',0)}, validations={result.get('validations',0)}, "
-        f"adhoc={result.get('adhoc_payments',0)}, adjustments={result.get('adjustments',0)}, "
-        f"advances={result.get('model_advances',0)}, repayments={result.get('advance_repayments',0)}."
+@router.get("/tasks/{task_id}")
+def maintenance_task_status(
+    task_id: int,
+    request: Request,
+    db: Session = Depends(get_session),
+    admin: User = Depends(get_admin_user),
+):
+    """Show the progress of a queued maintenance task; the page refreshes until it finishes."""
+    task = get_task(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return templates.TemplateResponse(
+        "admin/task_status.html",
+        {"request": request, "user": admin, "task": task},
     )
-    return RedirectResponse(url=f"/admin/settings?message={msg}", status_code=303)
 
 
 # --- JSON API variants ------------------------------------------------------
@@ -444,6 +457,28 @@ def diagnostics_db(
 
     return JSONResponse(payload)
 
+@router.get("/api/tasks/{task_id}")
+def api_maintenance_task_status(
+    task_id: int,
+    db: Session = Depends(get_session),
+    admin: User = Depends(get_admin_user),
+):
+    task = get_task(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return JSONResponse(
+        {
+            "id": task.id,
+            "kind": task.kind,
+            "status": task.status,
+            "message": task.message,
+            "error": task.error,
+            "created_at": task.created_at.isoformat() if task.created_at else None,
+            "finished_at": task.finished_at.isoformat() if task.finished_at else None,
+        }
+    )
+
+
 @router.get("/api/models/{model_id}/purge")
 def api_purge_model_preview(
     model_id: int,
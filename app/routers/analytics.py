@@ -1,27 +1,61 @@
 """Analytics routes providing customizable data views."""
 from __future__ import annotations
 
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from decimal import Decimal
-from typing import Iterable
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Float, Row, case, cast, func, lambda_stmt, select
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
 from app.auth import User
-from app.database import get_session
-from app.dependencies import templates
-from app.core.formatting import format_display_date, format_display_datetime
+from app.database import get_session, run_parallel_reads
+from app.dependencies import etag_matches, page_etag, templates
+from app.core.cache import WriteInvalidatedCache
+from app.core.formatting import DISPLAY_DATE_FORMAT, DISPLAY_DATETIME_FORMAT, format_display_date
 from app.models import (
     AdhocPayment,
+    Model,
     ModelCompensationAdjustment,
     Payout,
     ScheduleRun,
 )
 from app.routers.auth import get_current_user
 
-router = APIRouter(prefix="/analytics", tags=["Analytics"])
+# orjson encodes the large analytics payloads in C instead of the stdlib json module
+router = APIRouter(prefix="/analytics", tags=["Analytics"], default_response_class=ORJSONResponse)
+
+# Above this many payout/adhoc rows the body is streamed in batches instead of built in memory
+STREAM_ROW_THRESHOLD = 5000
+STREAM_BATCH_SIZE = 1000
+
+# One worker per dataset query; shared by all requests so threads are not spun up per call
+_DATASET_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="analytics-query")
+
+# Encoded /analytics/data bodies and their ETags, keyed by date range and datasets
+_ANALYTICS_TABLES = ("payouts", "adhoc_payments", "model_compensation_adjustments", "schedule_runs", "models")
+_response_cache = WriteInvalidatedCache(_ANALYTICS_TABLES, ttl_seconds=60, max_entries=256)
+
+
+def clear_analytics_cache() -> None:
+    _response_cache.clear()
+
+
+def _cached_response(key: str) -> tuple[bytes, str] | None:
+    return _response_cache.get(key)
+
+
+def _store_response(key: str, body: bytes, generation: int) -> str:
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    _response_cache.set(key, (body, etag), generation=generation)
+    return etag
 
 
 def _default_date_range() -> tuple[date, date]:
@@ -45,6 +79,11 @@ def analytics_home(
     user: User = Depends(get_current_user),
 ):
     start_default, end_default = _default_date_range()
+    # The page is static apart from the user and the default range, which moves once a day
+    etag = page_etag(user.id, user.username, user.role, start_default)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
     dataset_options = [
         {"id": "payouts", "label": "Payroll Payouts"},
         {"id": "adhoc", "label": "Ad Hoc Payments"},
@@ -60,79 +99,103 @@ def analytics_home(
             "default_start": start_default.strftime("%Y-%m-%d"),
             "default_end": end_default.strftime("%Y-%m-%d"),
         },
+        headers=headers,
     )
 
 
-def _serialize_payouts(items: Iterable[Payout]) -> list[dict[str, object]]:
-    rows: list[dict[str, object]] = []
-    for payout in items:
-        rows.append(
-            {
-                "run_id": payout.schedule_run_id,
-                "code": payout.code,
-                "working_name": payout.working_name,
-                "pay_date": format_display_date(payout.pay_date),
-                "amount": float(payout.amount) if payout.amount is not None else 0.0,
-                "status": payout.status,
-                "payment_method": payout.payment_method,
-                "wallet_address": payout.model.crypto_wallet if payout.model else None,
-            }
-        )
-    return rows
-
-
-def _serialize_adhoc(items: Iterable[AdhocPayment]) -> list[dict[str, object]]:
-    rows: list[dict[str, object]] = []
-    for record in items:
-        rows.append(
-            {
-                "model_id": record.model_id,
-                "model_code": record.model.code if record.model else None,
-                "pay_date": format_display_date(record.pay_date),
-                "amount": float(record.amount) if record.amount is not None else 0.0,
-                "status": record.status,
-                "description": record.description,
-            }
-        )
-    return rows
-
-
-def _serialize_adjustments(items: Iterable[ModelCompensationAdjustment]) -> list[dict[str, object]]:
-    rows: list[dict[str, object]] = []
-    for adjustment in items:
-        rows.append(
-            {
-                "model_id": adjustment.model_id,
-                "model_code": adjustment.model.code if adjustment.model else None,
-                "effective_date": format_display_date(adjustment.effective_date),
-                "amount_monthly": float(adjustment.amount_monthly),
-                "notes": adjustment.notes,
-            }
-        )
-    return rows
-
-
-def _serialize_runs(items: Iterable[ScheduleRun]) -> list[dict[str, object]]:
-    rows: list[dict[str, object]] = []
-    for run in items:
-        rows.append(
-            {
-                "run_id": run.id,
-                "cycle": format_display_date(date(run.target_year, run.target_month, 1)),
-                "created_at": format_display_datetime(run.created_at),
-                "currency": run.currency,
-                "models_paid": run.summary_models_paid,
-                "total_payout": float(run.summary_total_payout or 0),
-            }
-        )
-    return rows
+# Datasets whose amounts feed meta["totals"] (see _analytics_meta)
+_TOTALLED_DATASETS = frozenset({"payouts", "adhoc"})
+
+_Serializer = Callable[[Iterable[Row]], list[dict[str, object]]]
+# (dataset name, row query, serializer)
+_DatasetQuery = tuple[str, StatementLambdaElement, _Serializer]
+
+
+@lru_cache(maxsize=4096)
+def _display_date(value: date) -> str:
+    """Format a non-null date column; payroll rows share few distinct dates, so most calls hit the cache."""
+    return value.strftime(DISPLAY_DATE_FORMAT)
+
+
+# Serializers unpack rows positionally, so the column order must match _dataset_queries
+def _serialize_payouts(items: Iterable[Row]) -> list[dict[str, object]]:
+    return [
+        {
+            "run_id": run_id,
+            "code": code,
+            "working_name": working_name,
+            "pay_date": _display_date(pay_date),
+            "amount": amount if amount is not None else 0.0,
+            "status": status,
+            "payment_method": payment_method,
+            "wallet_address": crypto_wallet,
+        }
+        for run_id, code, working_name, pay_date, amount, status, payment_method, crypto_wallet in items
+    ]
+
+
+def _serialize_adhoc(items: Iterable[Row]) -> list[dict[str, object]]:
+    return [
+        {
+            "model_id": model_id,
+            "model_code": model_code,
+            "pay_date": _display_date(pay_date),
+            "amount": amount if amount is not None else 0.0,
+            "status": status,
+            "description": description,
+        }
+        for model_id, model_code, pay_date, amount, status, description in items
+    ]
+
+
+def _serialize_adjustments(items: Iterable[Row]) -> list[dict[str, object]]:
+    return [
+        {
+            "model_id": model_id,
+            "model_code": model_code,
+            "effective_date": _display_date(effective_date),
+            "amount_monthly": amount_monthly,
+            "notes": notes,
+        }
+        for model_id, model_code, effective_date, amount_monthly, notes in items
+    ]
+
+
+def _serialize_runs(items: Iterable[Row]) -> list[dict[str, object]]:
+    return [
+        {
+            "run_id": run_id,
+            "cycle": _display_date(date(target_year, target_month, 1)),
+            "created_at": created_at.strftime(DISPLAY_DATETIME_FORMAT),
+            "currency": currency,
+            "models_paid": models_paid,
+            "total_payout": total_payout or 0.0,
+        }
+        for run_id, target_year, target_month, created_at, currency, models_paid, total_payout in items
+    ]
+
+
+def _status_totals(db: Session, table: type[Payout] | type[AdhocPayment], start_date: date, end_date: date) -> Row:
+    """Sum paid and unpaid amounts (and count rows) for a dated payment table in one query."""
+    # track_on keeps one cached construct per table; the dates are bound as parameters
+    stmt = lambda_stmt(
+        lambda: select(
+            func.coalesce(func.sum(case((table.status == "paid", table.amount), else_=0)), 0).label("paid"),
+            func.coalesce(func.sum(case((table.status == "paid", 0), else_=table.amount)), 0).label("unpaid"),
+            func.count().label("count"),
+        ).where(table.pay_date >= start_date, table.pay_date <= end_date),
+        track_on=[table],
+    )
+    return db.execute(stmt).one()
 
 
 @router.get("/data")
 def analytics_data(
+    request: Request,
     start: str | None = Query(default=None, description="Inclusive start date (YYYY-MM-DD)"),
     end: str | None = Query(default=None, description="Inclusive end date (YYYY-MM-DD)"),
     datasets: str = Query(default="payouts", description="Comma separated dataset identifiers"),
+    totals_only: bool = Query(default=False, description="Return counts and totals without result rows"),
     db: Session = Depends(get_session),
     user: User = Depends(get_current_user),  # noqa: ARG001 - ensure auth
 ):
@@ -146,78 +209,246 @@ def analytics_data(
     if not requested:
         requested = {"payouts"}
 
-    response: dict[str, list[dict[str, object]]] = {}
-    paid_total = Decimal("0")
-    unpaid_total = Decimal("0")
-
-    def _record_amount(amount: Decimal | None, status: str | None) -> None:
-        nonlocal paid_total, unpaid_total
-        if amount is None:
-            return
-        amt = amount if isinstance(amount, Decimal) else Decimal(str(amount))
-        status_normalized = (status or "").strip().lower()
-        if status_normalized in {"paid", "complete", "completed"}:
-            paid_total += amt
+    key = f"{start_date.isoformat()}:{end_date.isoformat()}:{','.join(sorted(requested))}:{int(totals_only)}"
+    cached = _cached_response(key)
+    if cached is None:
+        generation = _response_cache.generation
+        meta = _analytics_meta(db, start_date, end_date, requested)
+        if totals_only:
+            meta["counts"].update(_window_counts(db, start_date, end_date, requested))
+            payload = {"meta": _finish_meta(meta), "results": {}}
         else:
-            unpaid_total += amt
+            queries = _dataset_queries(start_date, end_date, requested)
+            if sum(meta["counts"].values()) > STREAM_ROW_THRESHOLD:
+                # Wide ranges are streamed in batches and never cached, keeping memory flat
+                return StreamingResponse(
+                    _stream_payload(db.get_bind(), queries, meta),
+                    media_type="application/json",
+                    headers={"Cache-Control": "private, no-cache"},
+                )
+            results = _fetch_datasets(db, queries)
+            # The rows are read after the meta query, so totals and counts are taken from them
+            totals = meta["totals"] = {"paid": 0.0, "unpaid": 0.0}
+            for name, rows in results.items():
+                if name in _TOTALLED_DATASETS:
+                    _add_row_totals(totals, rows)
+            meta["counts"].update((name, len(rows)) for name, rows in results.items())
+            payload = {"meta": _finish_meta(meta), "results": results}
+        body = orjson.dumps(payload)
+        etag = _store_response(key, body, generation)
+    else:
+        body, etag = cached
+
+    # no-cache still lets the browser reuse its copy, but only after revalidating the ETag
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _analytics_meta(db: Session, start_date: date, end_date: date, requested: set[str]) -> dict[str, Any]:
+    """Build the response meta with SQL-summed paid/unpaid totals and payout/adhoc row counts."""
+    counts: dict[str, int] = {}
+    paid_total = 0.0
+    unpaid_total = 0.0
+    for key, table in (("payouts", Payout), ("adhoc", AdhocPayment)):
+        if key not in requested:
+            continue
+        totals = _status_totals(db, table, start_date, end_date)
+        paid_total += float(totals.paid)
+        unpaid_total += float(totals.unpaid)
+        counts[key] = totals.count
+
+    return {
+        "start": format_display_date(start_date),
+        "end": format_display_date(end_date),
+        "start_iso": start_date.isoformat(),
+        "end_iso": end_date.isoformat(),
+        "datasets": [],
+        "counts": counts,
+        "totals": {
+            "paid": paid_total,
+            "unpaid": unpaid_total,
+        },
+    }
+
+
+def _add_row_totals(totals: dict[str, float], rows: Iterable[dict[str, object]]) -> None:
+    """Add serialized payout or adhoc rows to meta totals, splitting paid from every other status."""
+    for row in rows:
+        totals["paid" if row["status"] == "paid" else "unpaid"] += row["amount"]
+
+
+def _finish_meta(meta: dict[str, Any]) -> dict[str, Any]:
+    meta["datasets"] = sorted(meta["counts"].keys())
+    return meta
+
+
+def _runs_window(start_date: date, end_date: date) -> tuple:
+    return (
+        ScheduleRun.created_at >= datetime.combine(start_date, datetime.min.time()),
+        ScheduleRun.created_at <= datetime.combine(end_date, datetime.max.time()),
+    )
+
+
+def _adjustments_window(start_date: date, end_date: date) -> tuple:
+    return (
+        ModelCompensationAdjustment.effective_date >= start_date,
+        ModelCompensationAdjustment.effective_date <= end_date,
+    )
+
+
+def _window_counts(db: Session, start_date: date, end_date: date, requested: set[str]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    if "adjustments" in requested:
+        counts["adjustments"] = db.execute(
+            select(func.count())
+            .select_from(ModelCompensationAdjustment)
+            .where(*_adjustments_window(start_date, end_date))
+        ).scalar_one()
+    if "runs" in requested:
+        counts["runs"] = db.execute(
+            select(func.count()).select_from(ScheduleRun).where(*_runs_window(start_date, end_date))
+        ).scalar_one()
+    return counts
+
+
+def _dataset_queries(start_date: date, end_date: date, requested: set[str]) -> list[_DatasetQuery]:
+    """Row queries for the requested datasets, paired with their serializers.
 
+    The dates are closure variables, so lambda_stmt binds them as parameters and reuses one
+    cached construct per dataset instead of rebuilding the select on every request.
+    """
+    # Report rows are plain column tuples (no ORM hydration) with amounts cast to float in SQL
+    queries: list[_DatasetQuery] = []
     if "payouts" in requested:
-        payouts = (
-            db.query(Payout)
-            .filter(Payout.pay_date >= start_date, Payout.pay_date <= end_date)
-            .order_by(Payout.pay_date.desc(), Payout.code)
-            .all()
+        queries.append(
+            (
+                "payouts",
+                lambda_stmt(
+                    lambda: select(
+                        Payout.schedule_run_id,
+                        Payout.code,
+                        Payout.working_name,
+                        Payout.pay_date,
+                        cast(Payout.amount, Float).label("amount"),
+                        Payout.status,
+                        Payout.payment_method,
+                        Model.crypto_wallet,
+                    )
+                    .outerjoin(Model, Payout.model_id == Model.id)
+                    .where(Payout.pay_date >= start_date, Payout.pay_date <= end_date)
+                    .order_by(Payout.pay_date.desc(), Payout.code)
+                ),
+                _serialize_payouts,
+            )
         )
-        response["payouts"] = _serialize_payouts(payouts)
-        for payout in payouts:
-            _record_amount(payout.amount, payout.status)
-
     if "adhoc" in requested:
-        adhoc_records = (
-            db.query(AdhocPayment)
-            .filter(AdhocPayment.pay_date >= start_date, AdhocPayment.pay_date <= end_date)
-            .order_by(AdhocPayment.pay_date.desc())
-            .all()
+        queries.append(
+            (
+                "adhoc",
+                lambda_stmt(
+                    lambda: select(
+                        AdhocPayment.model_id,
+                        Model.code.label("model_code"),
+                        AdhocPayment.pay_date,
+                        cast(AdhocPayment.amount, Float).label("amount"),
+                        AdhocPayment.status,
+                        AdhocPayment.description,
+                    )
+                    .outerjoin(Model, AdhocPayment.model_id == Model.id)
+                    .where(AdhocPayment.pay_date >= start_date, AdhocPayment.pay_date <= end_date)
+                    .order_by(AdhocPayment.pay_date.desc())
+                ),
+                _serialize_adhoc,
+            )
         )
-        response["adhoc"] = _serialize_adhoc(adhoc_records)
-        for record in adhoc_records:
-            _record_amount(record.amount, record.status)
-
     if "adjustments" in requested:
-        adjustments = (
-            db.query(ModelCompensationAdjustment)
-            .filter(
-                ModelCompensationAdjustment.effective_date >= start_date,
-                ModelCompensationAdjustment.effective_date <= end_date,
+        queries.append(
+            (
+                "adjustments",
+                lambda_stmt(
+                    lambda: select(
+                        ModelCompensationAdjustment.model_id,
+                        Model.code.label("model_code"),
+                        ModelCompensationAdjustment.effective_date,
+                        cast(ModelCompensationAdjustment.amount_monthly, Float).label("amount_monthly"),
+                        ModelCompensationAdjustment.notes,
+                    )
+                    .outerjoin(Model, ModelCompensationAdjustment.model_id == Model.id)
+                    .where(
+                        ModelCompensationAdjustment.effective_date >= start_date,
+                        ModelCompensationAdjustment.effective_date <= end_date,
+                    )
+                    .order_by(ModelCompensationAdjustment.effective_date.desc())
+                ),
+                _serialize_adjustments,
             )
-            .order_by(ModelCompensationAdjustment.effective_date.desc())
-            .all()
         )
-        response["adjustments"] = _serialize_adjustments(adjustments)
-
     if "runs" in requested:
-        runs = (
-            db.query(ScheduleRun)
-            .filter(
-                ScheduleRun.created_at >= datetime.combine(start_date, datetime.min.time()),
-                ScheduleRun.created_at <= datetime.combine(end_date, datetime.max.time()),
+        runs_from = datetime.combine(start_date, datetime.min.time())
+        runs_to = datetime.combine(end_date, datetime.max.time())
+        queries.append(
+            (
+                "runs",
+                lambda_stmt(
+                    lambda: select(
+                        ScheduleRun.id,
+                        ScheduleRun.target_year,
+                        ScheduleRun.target_month,
+                        ScheduleRun.created_at,
+                        ScheduleRun.currency,
+                        ScheduleRun.summary_models_paid,
+                        cast(ScheduleRun.summary_total_payout, Float).label("summary_total_payout"),
+                    )
+                    .where(ScheduleRun.created_at >= runs_from, ScheduleRun.created_at <= runs_to)
+                    .order_by(ScheduleRun.created_at.desc())
+                ),
+                _serialize_runs,
             )
-            .order_by(ScheduleRun.created_at.desc())
-            .all()
         )
-        response["runs"] = _serialize_runs(runs)
+    return queries
 
-    meta = {
-        "start": format_display_date(start_date),
-        "end": format_display_date(end_date),
-        "start_iso": start_date.isoformat(),
-        "end_iso": end_date.isoformat(),
-        "datasets": sorted(response.keys()),
-        "counts": {key: len(value) for key, value in response.items()},
-        "totals": {
-            "paid": float(paid_total),
-            "unpaid": float(unpaid_total),
-        },
-    }
 
-    return JSONResponse({"meta": meta, "results": response})
+def _fetch_datasets(
+    db: Session,
+    queries: list[_DatasetQuery],
+) -> dict[str, list[dict[str, object]]]:
+    """Run the dataset queries, overlapping them on separate connections when the pool allows."""
+
+    def _job(stmt: StatementLambdaElement, serialize: _Serializer) -> Callable[[Session], list[dict[str, object]]]:
+        return lambda worker_db: serialize(worker_db.execute(stmt).all())
+
+    jobs = {name: _job(stmt, serialize) for name, stmt, serialize in queries}
+    return run_parallel_reads(db, jobs, _DATASET_EXECUTOR)
+
+
+def _stream_payload(
+    bind: Engine | Connection,
+    queries: list[_DatasetQuery],
+    meta: dict[str, Any],
+) -> Iterator[bytes]:
+    """Yield the analytics JSON document, fetching and encoding rows STREAM_BATCH_SIZE at a time.
+
+    The request session is closed once the endpoint returns, so the rows are read through a
+    session of their own. Meta comes last and its counts and paid/unpaid totals are recomputed
+    from the rows actually sent: writes landing between the request's meta query and the row
+    reads would otherwise leave meta describing a different set of rows than ``results``.
+    """
+    totals = meta["totals"] = {"paid": 0.0, "unpaid": 0.0}
+    yield b'{"results":{'
+    with Session(bind=bind) as stream_db:
+        for index, (name, stmt, serialize) in enumerate(queries):
+            yield (b"," if index else b"") + orjson.dumps(name) + b":["
+            count = 0
+            result = stream_db.execute(stmt, execution_options={"yield_per": STREAM_BATCH_SIZE})
+            for partition in result.partitions():
+                rows = serialize(partition)
+                if name in _TOTALLED_DATASETS:
+                    _add_row_totals(totals, rows)
+                # Encode the batch as one array and drop its brackets to splice it into the stream
+                yield (b"," if count else b"") + orjson.dumps(rows)[1:-1]
+                count += len(partition)
+            yield b"]"
+            meta["counts"][name] = count
+    yield b'},"meta":' + orjson.dumps(_finish_meta(meta)) + b"}"
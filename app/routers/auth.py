@@ -2,22 +2,67 @@
 from __future__ import annotations
 
 import os
-from fastapi import APIRouter, Depends, Form, HTTPException, Request
+import secrets
+from anyio import CapacityLimiter, to_thread
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from itsdangerous import BadSignature, TimestampSigner
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session, load_only, make_transient_to_detached
 
-from app.database import get_session
+from app.database import DATABASE_URL, get_session
 from app.auth import User
+from app.core.cache import WriteInvalidatedCache
 from app.dependencies import templates
+from app import ratelimit
 from app.security import (
+    LOGIN_RATE_LIMIT_PER_IP,
+    LOGIN_RATE_LIMIT_PER_USERNAME,
     record_login_attempt,
     is_account_locked,
     increment_failed_login,
+    rehash_password,
     reset_failed_login,
 )
 
 router = APIRouter(tags=["Auth"])
 
+# In production (Render, on PostgreSQL) the site is served over HTTPS, so the session cookie
+# is Secure; local SQLite setups run over plain HTTP. The URL is fixed for the process lifetime.
+SECURE_COOKIES = DATABASE_URL.startswith("postgresql")
+SESSION_COOKIE_MAX_AGE = 86400  # 24 hours
+
+# The session cookie carries the user id signed with this key, so it cannot be edited to act as
+# someone else. Every worker must share it, so only development environments may run without
+# one (each process then signs with its own random key and sessions end on restart).
+_SECRET_KEY = os.getenv("PAYROLL_SECRET_KEY")
+if not _SECRET_KEY:
+    if os.getenv("ENVIRONMENT", "production").lower() not in ("development", "dev", "local"):
+        raise RuntimeError("PAYROLL_SECRET_KEY must be set outside development environments")
+    print("[auth] PAYROLL_SECRET_KEY is unset; using a per-process key for session cookies")
+_session_signer = TimestampSigner(_SECRET_KEY or secrets.token_urlsafe(32), salt="session")
+
+# Column values of recently authenticated users, so most requests skip the users SELECT.
+# Any committed write to users empties it; the TTL bounds staleness across worker processes,
+# which is why admin checks read the role from the database instead.
+_user_cache = WriteInvalidatedCache(("users",), ttl_seconds=60, max_entries=1024)
+_USER_COLUMNS = tuple(inspect(User).column_attrs)
+# What the login path reads and writes; users.username is UNIQUE, so the lookup is one index probe
+_LOGIN_COLUMNS = load_only(
+    User.id,
+    User.username,
+    User.password_hash,
+    User.is_locked,
+    User.locked_until,
+    User.failed_login_count,
+    User.last_failed_login,
+)
+
+# bcrypt releases the GIL, so password checks run in worker threads; capping them at one per
+# core makes a burst of logins queue here instead of tying up the shared threadpool.
+_PASSWORD_CHECK_LIMITER = CapacityLimiter(os.cpu_count() or 1)
+
 
 @router.get("/login")
 def login_page(request: Request):
@@ -27,22 +72,44 @@ def login_page(request: Request):
 
 
 @router.post("/login")
-def login(
+async def login(
     request: Request,
+    background_tasks: BackgroundTasks,
     username: str = Form(...),
     password: str = Form(...),
     next: str | None = Form(default=None),
     db: Session = Depends(get_session),
 ):
-    """Handle login form submission with rate limiting and account lockout."""
+    """Handle login form submission with rate limiting and account lockout.
+
+    Database work runs in the threadpool like any sync route; the password hash runs under
+    its own limiter so slow hashes never hold more threads than there are cores.
+    """
     # Get client IP address
     client_ip = request.client.host if request.client else "unknown"
     user_agent = request.headers.get("user-agent", "")
-    
-    # Check if account is locked
-    locked, lock_reason = is_account_locked(db, username)
-    if locked:
-        record_login_attempt(db, username, False, client_ip, user_agent)
+
+    # Throttle before the user lookup and the deliberately slow password hash
+    for key, (limit, window) in (
+        (f"login:ip:{client_ip}", LOGIN_RATE_LIMIT_PER_IP),
+        (f"login:user:{username.strip().lower()}", LOGIN_RATE_LIMIT_PER_USERNAME),
+    ):
+        allowed, retry_after = ratelimit.check(key, limit, window)
+        if not allowed:
+            return templates.TemplateResponse(
+                "auth/login.html",
+                {
+                    "request": request,
+                    "error": f"Too many login attempts. Try again in {retry_after} seconds.",
+                },
+                status_code=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    user, lock_reason = await run_in_threadpool(
+        _load_login_user, db, username, client_ip, user_agent
+    )
+    if lock_reason is not None:
         return templates.TemplateResponse(
             "auth/login.html",
             {
@@ -51,18 +118,15 @@ def login(
             },
             status_code=403,
         )
-    
-    # Find user
-    user = db.query(User).filter(User.username == username).first()
-    
-    if not user or not user.verify_password(password):
-        # Record failed attempt
-        increment_failed_login(db, username)
-        record_login_attempt(db, username, False, client_ip, user_agent)
-        
-        # Get updated failed attempt count
-        user = db.query(User).filter(User.username == username).first()
-        failed_count = user.failed_login_count if user else 0
+
+    verified = user is not None and await to_thread.run_sync(
+        user.verify_password, password, limiter=_PASSWORD_CHECK_LIMITER
+    )
+    if not verified:
+        failed_count = await run_in_threadpool(
+            _record_failed_login, db, user, username, client_ip, user_agent
+        )
+
         attempts_remaining = max(0, 5 - failed_count)
         
         # Create error message with attempt counter
@@ -82,9 +146,12 @@ def login(
             status_code=401,
         )
     
-    # Successful login - reset failed counter and record attempt
-    reset_failed_login(db, username)
-    record_login_attempt(db, username, True, client_ip, user_agent)
+    # Successful login - upgrade an outdated hash after responding, then reset failed counter
+    if user.password_needs_rehash():
+        background_tasks.add_task(rehash_password, user.id, user.password_hash, password)
+    user_id = await run_in_threadpool(
+        _record_successful_login, db, user, username, client_ip, user_agent
+    )
     
     # Determine safe redirect target
     redirect_to = next or request.query_params.get("next") or "/dashboard"
@@ -94,21 +161,55 @@ def login(
 
     # Set session cookie and redirect
     response = RedirectResponse(url=redirect_to, status_code=303)
-    # In production (Render), secure=True for HTTPS. In dev, secure=False for HTTP.
-    is_production = os.getenv("PAYROLL_DATABASE_URL", "").startswith("postgresql")
     response.set_cookie(
         key="user_id",
-        value=str(user.id),
+        value=session_cookie_value(user_id),
         httponly=True,
         path="/",
-        secure=is_production,  # True in production (HTTPS), False in dev (HTTP)
+        secure=SECURE_COOKIES,
         samesite="lax",
-        max_age=86400,  # 24 hours
+        max_age=SESSION_COOKIE_MAX_AGE,
     )
     return response
 
 
 
+def _load_login_user(
+    db: Session, username: str, client_ip: str, user_agent: str
+) -> tuple[User | None, str | None]:
+    """Load the user once and return (user, lock reason), recording the attempt if locked."""
+    user = db.execute(
+        select(User).options(_LOGIN_COLUMNS).where(User.username == username)
+    ).scalar_one_or_none()
+    locked, lock_reason = is_account_locked(db, user)
+    if locked:
+        record_login_attempt(db, username, False, client_ip, user_agent)
+        return user, lock_reason or ""
+    return user, None
+
+
+def _record_failed_login(
+    db: Session, user: User | None, username: str, client_ip: str, user_agent: str
+) -> int:
+    failed_count = increment_failed_login(db, user)
+    record_login_attempt(db, username, False, client_ip, user_agent)
+    return failed_count
+
+
+def _record_successful_login(
+    db: Session, user: User, username: str, client_ip: str, user_agent: str
+) -> int:
+    user_id = user.id
+    reset_failed_login(db, user)
+    record_login_attempt(db, username, True, client_ip, user_agent)
+    return user_id
+
+
+def session_cookie_value(user_id: int) -> str:
+    """Sign ``user_id`` for the session cookie."""
+    return _session_signer.sign(str(user_id)).decode()
+
+
 @router.get("/logout")
 def logout():
     """Handle logout — clear session cookie."""
@@ -119,26 +220,43 @@ def logout():
 
 def get_current_user(request: Request, db: Session = Depends(get_session)) -> User:
     """Dependency to get current authenticated user."""
-    user_id = request.cookies.get("user_id")
+    cookie = request.cookies.get("user_id")
     
-    if not user_id:
+    if not cookie:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
+    # Only ids this server signed verify, so the payload is always a valid integer
     try:
-        user_id = int(user_id)
-    except (ValueError, TypeError):
+        user_id = int(_session_signer.unsign(cookie, max_age=SESSION_COOKIE_MAX_AGE))
+    except BadSignature:
         raise HTTPException(status_code=401, detail="Invalid session")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    generation = _user_cache.generation
+    snapshot = _user_cache.get(user_id)
+    if snapshot is not None:
+        # Rebuild the row as if just loaded and attach it without a SELECT; edits still flush
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    user = db.get(User, user_id)
     
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     
+    _user_cache.set(user_id, {attr.key: getattr(user, attr.key) for attr in _USER_COLUMNS}, generation=generation)
     return user
 
 
-def get_admin_user(user: User = Depends(get_current_user)) -> User:
-    """Dependency to ensure user is admin."""
-    if not user.is_admin():
+def get_admin_user(user: User = Depends(get_current_user), db: Session = Depends(get_session)) -> User:
+    """Dependency to ensure user is admin.
+
+    The role is read from the users row rather than the user cache, whose entries another
+    worker's demotion or deletion does not clear.
+    """
+    role = db.scalar(select(User.role).where(User.id == user.id))
+    if role is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    if role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     return user
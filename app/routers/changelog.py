@@ -1,6 +1,7 @@
 """Routes for rendering the project changelog."""
 from __future__ import annotations
 
+import threading
 from pathlib import Path
 
 import markdown
@@ -16,22 +17,46 @@ router = APIRouter(tags=["Changelog"])
 
 _CHANGELOG_PATH = Path(__file__).resolve().parents[2] / "CHANGELOG.md"
 
+# Rendered HTML keyed by the file's (mtime_ns, size); the lock also guards the shared parser
+_cache: tuple[tuple[int, int], Markup] | None = None
+_cache_lock = threading.Lock()
+_markdown = markdown.Markdown(
+    extensions=[
+        "fenced_code",
+        "tables",
+        "toc",
+        "sane_lists",
+    ],
+    output_format="html",
+)
+
 
 def _render_changelog() -> Markup:
-    if not _CHANGELOG_PATH.exists():
+    global _cache
+    try:
+        stat = _CHANGELOG_PATH.stat()
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Changelog file not found")
-    content = _CHANGELOG_PATH.read_text(encoding="utf-8")
-    html = markdown.markdown(
-        content,
-        extensions=[
-            "fenced_code",
-            "tables",
-            "toc",
-            "sane_lists",
-        ],
-        output_format="html",
-    )
-    return Markup(html)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _cache_lock:
+        if _cache is not None and _cache[0] == key:
+            return _cache[1]
+        content = _CHANGELOG_PATH.read_text(encoding="utf-8")
+        html = Markup(_markdown.reset().convert(content))
+        _cache = (key, html)
+        return html
+
+
+def warm_changelog() -> None:
+    """Render the changelog when a worker starts so no request pays for the first conversion."""
+    try:
+        _render_changelog()
+    except HTTPException:
+        # A deployment without CHANGELOG.md serves 404s from the route instead
+        pass
 
 
 @router.get("/changelog", response_class=HTMLResponse)
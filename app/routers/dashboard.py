@@ -1,30 +1,85 @@
 """Dashboard routes."""
 from __future__ import annotations
 
-import csv
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
-from io import StringIO
-from typing import Iterable, cast
+from decimal import Decimal
+from functools import partial
+from typing import Iterable, Iterator, Sequence, cast
+from uuid import uuid4
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
 
 from app import crud
 from app.auth import User
-from app.database import get_session
+from app.core.cache import WriteInvalidatedCache
+from app.database import get_session, run_parallel_reads
 from app.dependencies import templates
-from app.core.formatting import format_display_date, format_display_datetime
-from app.routers.auth import get_current_user
-from app.models import Model, ScheduleRun
-from app.exporting import export_full_workbook
-from fastapi.responses import Response
+from app.exporting import stream_csv
+from app.core.formatting import format_cycle_display, format_display_date, format_display_datetime
+from app.routers.auth import get_admin_user, get_current_user
+from app.maintenance import EXPORT_DIR, EXPORT_RETENTION_SECONDS, enqueue_task, get_task, run_task
+from app.models import AdhocPayment, Model, ScheduleRun
 
 router = APIRouter(tags=["Dashboard"])
 
 
+# Assembled dashboard figures keyed by day (overdue counts and the current cycle depend on it).
+# A committed write to any source table empties the cache, e.g. when a payroll run is created.
+_DASHBOARD_TABLES = ("models", "schedule_runs", "payouts", "adhoc_payments")
+_payload_cache = WriteInvalidatedCache(_DASHBOARD_TABLES, ttl_seconds=120, max_entries=4)
+_DASHBOARD_EXECUTOR = ThreadPoolExecutor(max_workers=5, thread_name_prefix="dashboard-query")
+
+
+def clear_dashboard_cache() -> None:
+    _payload_cache.clear()
+
+
 @router.get("/dashboard")
 def dashboard(request: Request, db: Session = Depends(get_session), user: User = Depends(get_current_user)):
+    today = date.today()
+    payload = _payload_cache.get(today)
+    if payload is None:
+        generation = _payload_cache.generation
+        payload = _dashboard_payload(db, today)
+        _payload_cache.set(today, payload, generation=generation)
+
+    return templates.TemplateResponse(
+        "dashboard/index.html",
+        {
+            "request": request,
+            "user": user,
+            **payload,
+            # Get current month name for dashboard label
+            "current_month_name": today.strftime("%B"),
+            "current_year": today.year,
+        },
+    )
+
+
+def _dashboard_payload(db: Session, today: date) -> dict[str, object]:
+    """Query the dashboard figures as plain values so they can be shared between requests.
+
+    The sections are independent, so they run concurrently on their own sessions.
+    """
+    return run_parallel_reads(
+        db,
+        {
+            "summary": _summary_view,
+            "recent_runs": _recent_runs,
+            "top_models": _top_models,
+            "pending_adhoc_payments": _pending_adhoc_payments,
+            "current_month_run_id": partial(_current_month_run_id, today=today),
+        },
+        _DASHBOARD_EXECUTOR,
+    )
+
+
+def _summary_view(db: Session) -> dict[str, object]:
     summary = crud.dashboard_summary(db)
     latest = cast(ScheduleRun | None, summary.get("latest_run"))
     # Provide a view-model copy to avoid type narrowing issues on the summary dict
@@ -34,81 +89,68 @@ def dashboard(request: Request, db: Session = Depends(get_session), user: User =
             "target_year": latest.target_year,
             "target_month": latest.target_month,
             "created_at": latest.created_at,
-            "cycle_display": format_display_date(date(latest.target_year, latest.target_month, 1)),
+            "cycle_display": format_cycle_display(latest.target_year, latest.target_month),
         }
+    return summary_view
+
+
+def _recent_runs(db: Session) -> list[dict[str, object]]:
     # Recent activity: recompute totals from payouts linked to models to avoid stale residuals
-    recent_runs_data = []
-    for run in crud.recent_schedule_runs(db):
-        run_summary = crud.run_payment_summary(db, run.id)
-        paid_total = run_summary.get("paid_total", 0)
-        recent_runs_data.append(
-            {
-                "id": run.id,
-                "target_year": run.target_year,
-                "target_month": run.target_month,
-                "cycle_display": format_display_date(date(run.target_year, run.target_month, 1)),
-                "created_at": run.created_at,
-                "currency": run.currency,
-                # Keep the same key used by the template, but populate with actual paid total
-                "summary_total_payout": paid_total,
-            }
-        )
+    recent_runs = crud.recent_schedule_runs(db)
+    paid_totals = crud.paid_totals_by_run(db, [run.id for run in recent_runs])
+    return [
+        {
+            "id": run.id,
+            "target_year": run.target_year,
+            "target_month": run.target_month,
+            "cycle_display": format_cycle_display(run.target_year, run.target_month),
+            "created_at": run.created_at,
+            "currency": run.currency,
+            # Keep the same key used by the template, but populate with actual paid total
+            "summary_total_payout": paid_totals.get(run.id, Decimal("0")),
+        }
+        for run in recent_runs
+    ]
 
-    top_models_data = []
-    for model, total in crud.top_paid_models(db):
-        top_models_data.append(
-            {
-                "code": model.code,
-                "working_name": model.working_name,
-                "status": model.status,
-                "total_paid": total,
-            }
-        )
 
-    pending_adhoc_data = []
-    for payment in crud.pending_adhoc_payments(db):
-        pending_adhoc_data.append(
-            {
-                "id": payment.id,
-                "pay_date": payment.pay_date,
-                "amount": payment.amount,
-                "status": payment.status,
-                "model_code": payment.model.code if payment.model else None,
-                "model_name": payment.model.working_name if payment.model else None,
-            }
-        )
+def _top_models(db: Session) -> list[dict[str, object]]:
+    return [
+        {
+            "code": model.code,
+            "working_name": model.working_name,
+            "status": model.status,
+            "total_paid": total,
+        }
+        for model, total in crud.top_paid_models(db)
+    ]
+
+
+def _pending_adhoc_payments(db: Session) -> list[dict[str, object]]:
+    return [
+        {
+            "id": payment.id,
+            "pay_date": payment.pay_date,
+            "amount": payment.amount,
+            "status": payment.status,
+            "model_code": model.code if model else None,
+            "model_name": model.working_name if model else None,
+        }
+        for payment in crud.pending_adhoc_payments(db)
+        for model in (payment.model,)
+    ]
 
-    # Get current month name for dashboard label
-    current_month_name = date.today().strftime("%B")
-    current_year = date.today().year
 
+def _current_month_run_id(db: Session, today: date) -> int | None:
     # Determine current month payroll cycle (latest run for this month)
-    today = date.today()
-    current_month_run = (
-        db.query(ScheduleRun)
-        .filter(
+    return db.execute(
+        select(ScheduleRun.id)
+        .where(
             ScheduleRun.target_year == today.year,
             ScheduleRun.target_month == today.month,
         )
         .order_by(ScheduleRun.created_at.desc())
-        .first()
-    )
-    current_month_run_id = current_month_run.id if current_month_run else None
-
-    return templates.TemplateResponse(
-        "dashboard/index.html",
-        {
-            "request": request,
-            "user": user,
-            "summary": summary_view,
-            "recent_runs": recent_runs_data,
-            "top_models": top_models_data,
-            "pending_adhoc_payments": pending_adhoc_data,
-            "current_month_name": current_month_name,
-            "current_year": current_year,
-            "current_month_run_id": current_month_run_id,
-        },
-    )
+        .limit(1)
+    ).scalar_one_or_none()
 
 
 def _format_datetime_for_export(value: datetime | None) -> str:
@@ -119,64 +161,117 @@ def _format_simple_date(value) -> str:
     return format_display_date(value)
 
 
-def _iter_model_export_rows(models: Iterable[Model]) -> Iterable[list[str]]:
-    headers = [
-        "model_id",
-        "model_code",
-        "status",
-        "real_name",
-        "working_name",
-        "start_date",
-        "payment_method",
-        "payment_frequency",
-        "amount_monthly",
-        "crypto_wallet",
-        "model_created_at",
-        "model_updated_at",
-        "adhoc_id",
-        "adhoc_pay_date",
-        "adhoc_amount",
-        "adhoc_status",
-        "adhoc_description",
-        "adhoc_notes",
-        "adhoc_created_at",
-        "adhoc_updated_at",
-    ]
-    yield headers
-
-    for model in models:
-        payments = sorted(model.adhoc_payments, key=lambda item: (item.pay_date, item.id)) if model.adhoc_payments else []
-        base_columns = [
-            str(model.id),
-            model.code or "",
-            model.status or "",
-            model.real_name or "",
-            model.working_name or "",
-            _format_simple_date(model.start_date),
-            model.payment_method or "",
-            model.payment_frequency or "",
-            f"{model.amount_monthly:.2f}" if model.amount_monthly is not None else "",
-            model.crypto_wallet or "",
-            _format_datetime_for_export(model.created_at),
-            _format_datetime_for_export(model.updated_at),
-        ]
+_EXPORT_HEADERS = (
+    "model_id",
+    "model_code",
+    "status",
+    "real_name",
+    "working_name",
+    "start_date",
+    "payment_method",
+    "payment_frequency",
+    "amount_monthly",
+    "crypto_wallet",
+    "model_created_at",
+    "model_updated_at",
+    "adhoc_id",
+    "adhoc_pay_date",
+    "adhoc_amount",
+    "adhoc_status",
+    "adhoc_description",
+    "adhoc_notes",
+    "adhoc_created_at",
+    "adhoc_updated_at",
+)
+# Payment columns of a model that has no adhoc payments
+_EMPTY_ADHOC = ("",) * 8
+
+# One row per model and adhoc payment; models without payments come through the outer join
+# once, with the payment columns NULL
+_EXPORT_ROWS_STMT = (
+    select(
+        Model.id,
+        Model.code,
+        Model.status,
+        Model.real_name,
+        Model.working_name,
+        Model.start_date,
+        Model.payment_method,
+        Model.payment_frequency,
+        Model.amount_monthly,
+        Model.crypto_wallet,
+        Model.created_at,
+        Model.updated_at,
+        AdhocPayment.id,
+        AdhocPayment.pay_date,
+        AdhocPayment.amount,
+        AdhocPayment.status,
+        AdhocPayment.description,
+        AdhocPayment.notes,
+        AdhocPayment.created_at,
+        AdhocPayment.updated_at,
+    )
+    .select_from(Model)
+    .outerjoin(AdhocPayment, AdhocPayment.model_id == Model.id)
+    .order_by(Model.code, AdhocPayment.pay_date, AdhocPayment.id)
+)
 
-        if not payments:
-            yield base_columns + ["", "", "", "", "", "", "", ""]
-            continue
 
-        for payment in payments:
-            adhoc_columns = [
-                str(payment.id),
-                _format_simple_date(payment.pay_date),
-                f"{payment.amount:.2f}" if payment.amount is not None else "",
-                payment.status or "",
-                payment.description or "",
-                payment.notes or "",
-                _format_datetime_for_export(payment.created_at),
-                _format_datetime_for_export(payment.updated_at),
-            ]
-            yield base_columns + adhoc_columns
+def _iter_model_export_rows(rows: Iterable[Sequence]) -> Iterable[Sequence[str]]:
+    yield _EXPORT_HEADERS
+
+    for (
+        model_id,
+        code,
+        status,
+        real_name,
+        working_name,
+        start_date,
+        payment_method,
+        payment_frequency,
+        amount_monthly,
+        crypto_wallet,
+        model_created_at,
+        model_updated_at,
+        adhoc_id,
+        pay_date,
+        amount,
+        adhoc_status,
+        description,
+        notes,
+        adhoc_created_at,
+        adhoc_updated_at,
+    ) in rows:
+        row = [
+            str(model_id),
+            code or "",
+            status or "",
+            real_name or "",
+            working_name or "",
+            _format_simple_date(start_date),
+            payment_method or "",
+            payment_frequency or "",
+            f"{amount_monthly:.2f}" if amount_monthly is not None else "",
+            crypto_wallet or "",
+            _format_datetime_for_export(model_created_at),
+            _format_datetime_for_export(model_updated_at),
+        ]
+        if adhoc_id is None:
+            row.extend(_EMPTY_ADHOC)
+        else:
+            row.extend(
+                [
+                    str(adhoc_id),
+                    _format_simple_date(pay_date),
+                    f"{amount:.2f}" if amount is not None else "",
+                    adhoc_status or "",
+                    description or "",
+                    notes or "",
+                    _format_datetime_for_export(adhoc_created_at),
+                    _format_datetime_for_export(adhoc_updated_at),
+                ]
+            )
+        yield row
 
 
 @router.get("/dashboard/export")
@@ -185,38 +280,84 @@ def export_dashboard_models(
     user: User = Depends(get_current_user),
 ) -> StreamingResponse:
     _ = user  # ensure the user is authenticated but not otherwise used
-    models = (
-        db.query(Model)
-        .options(selectinload(Model.adhoc_payments))
-        .order_by(Model.code)
-        .all()
-    )
-
-    buffer = StringIO()
-    writer = csv.writer(buffer)
-    for row in _iter_model_export_rows(models):
-        writer.writerow(row)
+    rows = _iter_export_rows(db.get_bind())
 
-    buffer.seek(0)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"payroll_models_export_{timestamp}.csv"
-    csv_bytes = buffer.getvalue().encode("utf-8-sig")
-    response = StreamingResponse(iter([csv_bytes]), media_type="text/csv")
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+    return StreamingResponse(
+        stream_csv(_iter_model_export_rows(rows), bom=True),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
-@router.get("/dashboard/export-xlsx")
-def export_dashboard_xlsx(db: Session = Depends(get_session), user: User = Depends(get_current_user)) -> Response:
-    if not user.is_admin():
-        from fastapi import HTTPException
+_EXPORT_BATCH_SIZE = 500
 
-        raise HTTPException(status_code=403, detail="Admin privileges required")
-    content = export_full_workbook(db)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"payroll_full_export_{timestamp}.xlsx"
-    return Response(
-        content,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
+
+def _iter_export_rows(bind: Engine | Connection) -> Iterator[Sequence]:
+    """Yield export rows as plain tuples, fetching _EXPORT_BATCH_SIZE at a time.
+
+    The request session is closed before a streaming body runs, so the export reads through a
+    session of its own.
+    """
+    with Session(bind=bind) as export_db:
+        result = export_db.execute(_EXPORT_ROWS_STMT, execution_options={"yield_per": _EXPORT_BATCH_SIZE})
+        for batch in result.partitions():
+            yield from batch
+
+
+# Newest workbook export task. Repeat requests share it (even while it is still running) until
+# one of the exported tables changes or the file ages out.
+_WORKBOOK_TABLES = (
+    "models",
+    "model_compensation_adjustments",
+    "adhoc_payments",
+    "schedule_runs",
+    "payouts",
+    "model_advances",
+    "advance_repayments",
+)
+_workbook_task_cache = WriteInvalidatedCache(
+    _WORKBOOK_TABLES, ttl_seconds=EXPORT_RETENTION_SECONDS, max_entries=1
+)
+_XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@router.post("/dashboard/export-xlsx")
+def start_dashboard_xlsx_export(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_session),
+    user: User = Depends(get_admin_user),
+) -> JSONResponse:
+    """Queue the full workbook export and return its job id; poll the job URL for the file."""
+    task_id = _workbook_task_cache.get("latest")
+    task = get_task(db, task_id) if task_id is not None else None
+    if task is None or task.status == "failed" or (
+        task.status == "succeeded" and not (EXPORT_DIR / task.params["filename"]).exists()
+    ):
+        filename = f"payroll_full_export_{datetime.now():%Y%m%d_%H%M%S}_{uuid4().hex[:8]}.xlsx"
+        task = enqueue_task(db, "export_workbook", user.id, {"filename": filename})
+        background_tasks.add_task(run_task, task.id, db.get_bind())
+        _workbook_task_cache.set("latest", task.id)
+    return JSONResponse({"job_id": task.id, "status": task.status}, status_code=202)
+
+
+@router.get("/dashboard/export-xlsx/{task_id}")
+def download_dashboard_xlsx(
+    task_id: int,
+    db: Session = Depends(get_session),
+    user: User = Depends(get_admin_user),
+) -> Response:
+    """Serve a finished workbook export, or 202 with the job status while it is being built."""
+    task = get_task(db, task_id)
+    if task is None or task.kind != "export_workbook":
+        raise HTTPException(status_code=404, detail="Export not found")
+    if task.status == "failed":
+        return JSONResponse({"job_id": task.id, "status": task.status, "error": task.error}, status_code=500)
+    if task.status != "succeeded":
+        return JSONResponse({"job_id": task.id, "status": task.status}, status_code=202)
+    filename = task.params["filename"]
+    path = EXPORT_DIR / filename
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Export has expired")
+    return FileResponse(path, media_type=_XLSX_MEDIA_TYPE, filename=filename)
@@ -1,18 +1,17 @@
 """Routes for managing models."""
 from __future__ import annotations
 
-import csv
-import io
 import math
 from datetime import date
 from decimal import Decimal, InvalidOperation
 from itertools import zip_longest
-from typing import Any
+from typing import Any, Iterator, Sequence
 from urllib.parse import urlencode
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
 from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import Session
 
 from app import crud
@@ -20,7 +19,8 @@ from app.auth import User
 from app.database import get_session
 from app.dependencies import templates
 from app.core.formatting import format_display_date
-from app.models import FREQUENCY_ENUM, STATUS_ENUM, Payout, ScheduleRun
+from app.exporting import stream_csv
+from app.models import FREQUENCY_ENUM, STATUS_ENUM, Model, Payout, ScheduleRun
 from app.routers.auth import get_current_user, get_admin_user
 from app.schemas import AdhocPaymentCreate, AdhocPaymentUpdate, ModelCreate, ModelUpdate
 from app.importers.excel_importer import ImportOptions, RunOptions, import_from_excel
@@ -359,6 +359,7 @@ def list_all_model_payments(
         status=status_filter,
         frequency=frequency_filter,
         payment_method=method_filter,
+        with_payouts=True,
     )
 
     all_payments: list[dict[str, Any]] = []
@@ -379,7 +380,7 @@ def list_all_model_payments(
             pass
 
     for model in models:
-        payouts = crud.list_payouts_for_model(db, model.id)
+        payouts = sorted(model.payouts, key=lambda item: (item.pay_date, item.id), reverse=True)
         for payout in payouts:
             if payment_status and payout.status != payment_status:
                 continue
@@ -390,7 +391,7 @@ def list_all_model_payments(
             if end_date_obj and payout.pay_date and payout.pay_date > end_date_obj:
                 continue
 
-            run = crud.get_schedule_run(db, payout.schedule_run_id) if payout.schedule_run_id else None
+            run = payout.schedule_run
 
             all_payments.append(
                 {
@@ -402,17 +403,17 @@ def list_all_model_payments(
 
     all_payments.sort(key=lambda item: item["payout"].pay_date or date.min, reverse=True)
 
-    total_amount = sum((payment["payout"].amount or zero) for payment in all_payments)
-    paid_amount = sum(
-        (payment["payout"].amount or zero)
-        for payment in all_payments
-        if payment["payout"].status == "paid"
-    )
-    unpaid_amount = sum(
-        (payment["payout"].amount or zero)
-        for payment in all_payments
-        if payment["payout"].status in {"not_paid", "on_hold"}
-    )
+    total_amount = zero
+    paid_amount = zero
+    unpaid_amount = zero
+    for payment in all_payments:
+        amount = payment["payout"].amount or zero
+        total_amount += amount
+        status = payment["payout"].status
+        if status == "paid":
+            paid_amount += amount
+        elif status in {"not_paid", "on_hold"}:
+            unpaid_amount += amount
 
     status_counts: dict[str, int] = {}
     frequency_counts: dict[str, int] = {}
@@ -508,81 +509,9 @@ def export_models_csv(
         payment_method=method_filter,
     )
 
-    totals_map = crud.total_paid_by_model(db, [model.id for model in models])
-    
     # Check if user wants to include payment history
     include_payment_history = include_payments and include_payments.lower() == "true"
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    
-    # Header row - always include payment columns to match /schedules/ view
-    writer.writerow(
-        [
-            "Code",
-            "Status",
-            "Real Name",
-            "Working Name",
-            "Start Date",
-            "Payment Method",
-            "Payment Frequency",
-            "Monthly Amount",
-            "Crypto Wallet",
-            "Pay Date",
-            "Amount",
-            "Status (Payment)",
-            "Notes",
-        ]
-    )
-
-    for model in models:
-        start_date_value = format_display_date(model.start_date)
-
-        # Get paid payouts for this model
-        paid_payouts = crud.get_paid_payouts_for_model(db, model.id)
-        
-        if paid_payouts:
-            # Write one row per payment
-            for payout in paid_payouts:
-                pay_date_value = format_display_date(payout.pay_date)
-                writer.writerow(
-                    [
-                        model.code,
-                        model.status,
-                        model.real_name,
-                        model.working_name,
-                        start_date_value,
-                        model.payment_method,
-                        model.payment_frequency,
-                        f"{model.amount_monthly:.2f}",
-                        model.crypto_wallet or "",
-                        pay_date_value,
-                        f"{payout.amount:.2f}",
-                        payout.status,
-                        payout.notes or "",
-                    ]
-                )
-        else:
-            # Write model row with empty payment fields if no payouts
-            writer.writerow(
-                [
-                    model.code,
-                    model.status,
-                    model.real_name,
-                    model.working_name,
-                    start_date_value,
-                    model.payment_method,
-                    model.payment_frequency,
-                    f"{model.amount_monthly:.2f}",
-                    model.crypto_wallet or "",
-                    "",
-                    "",
-                    "",
-                    "",
-                ]
-            )
-
-    buffer.seek(0)
     filename_parts = ["models_export"]
     if code_filter:
         filename_parts.append(code_filter.replace(" ", "_"))
@@ -594,7 +523,81 @@ def export_models_csv(
         "Content-Disposition": f"attachment; filename={filename}",
     }
 
-    return StreamingResponse(iter([buffer.getvalue()]), media_type="text/csv", headers=headers)
+    filters = {
+        "code": code_filter,
+        "status": status_filter,
+        "frequency": frequency_filter,
+        "payment_method": method_filter,
+    }
+    return StreamingResponse(
+        stream_csv(_iter_models_csv_rows(db.get_bind(), models, filters)), media_type="text/csv", headers=headers
+    )
+
+
+# Header row - always include payment columns to match /schedules/ view
+_MODELS_CSV_HEADERS = (
+    "Code",
+    "Status",
+    "Real Name",
+    "Working Name",
+    "Start Date",
+    "Payment Method",
+    "Payment Frequency",
+    "Monthly Amount",
+    "Crypto Wallet",
+    "Pay Date",
+    "Amount",
+    "Status (Payment)",
+    "Notes",
+)
+
+
+def _iter_models_csv_rows(
+    bind: Engine | Connection, models: Sequence[Model], filters: dict[str, str | None]
+) -> Iterator[Sequence[str]]:
+    """Yield the models export one row at a time.
+
+    The request session is closed before a streaming body runs, so paid payouts are read
+    through a session of their own: one query over the same model filters, in the models'
+    order, fetched in batches and merged with the model list as it is walked.
+    """
+    yield _MODELS_CSV_HEADERS
+
+    exported = {model.id for model in models}
+    written: set[int] = set()
+    with Session(bind=bind) as export_db:
+        # Payouts of models added (or renamed past their place) since the list was read are left out
+        payout_rows = (
+            row
+            for row in crud.iter_paid_payout_export_rows(export_db, **filters)
+            if row.model_id in exported and row.model_id not in written
+        )
+        pending = next(payout_rows, None)
+        for model in models:
+            model_columns = (
+                model.code,
+                model.status,
+                model.real_name,
+                model.working_name,
+                format_display_date(model.start_date),
+                model.payment_method,
+                model.payment_frequency,
+                f"{model.amount_monthly:.2f}",
+                model.crypto_wallet or "",
+            )
+
+            # Write one row per payment
+            has_payments = False
+            while pending is not None and pending.model_id == model.id:
+                _, pay_date, amount, status, notes = pending
+                yield model_columns + (format_display_date(pay_date), f"{amount:.2f}", status, notes or "")
+                has_payments = True
+                pending = next(payout_rows, None)
+
+            if not has_payments:
+                # Write model row with empty payment fields if no payouts
+                yield model_columns + ("", "", "", "")
+            written.add(model.id)
 
 
 @router.get("/{model_id}/payments.json")
@@ -620,7 +623,8 @@ def model_payments_json(
     payout_rows: list[dict[str, Any]] = []
 
     for payout in payouts:
-        amount = Decimal(payout.amount or 0)
+        # Numeric columns already load as Decimal; avoid copying each one
+        amount = payout.amount if payout.amount is not None else Decimal("0")
         if payout.status == "paid":
             total_paid += amount
 
@@ -784,6 +788,7 @@ def model_snapshot_data(
     total_paid = total_paid_map.get(model.id)
     adhoc_payments = crud.list_adhoc_payments(db, model_id)
     pending_adhoc = [payment for payment in adhoc_payments if payment.status == "pending"]
+    state = crud.get_active_model_state(db, model.id)
     payload = {
         "model": {
             "id": model.id,
@@ -812,6 +817,8 @@ def model_snapshot_data(
             "total_paid": str(total_paid) if total_paid is not None else None,
             "adhoc_pending_count": len(pending_adhoc),
             "adhoc_total_count": len(adhoc_payments),
+            "effective_amount": str(state.effective_amount) if state else None,
+            "advance_remaining": str(state.advance_remaining) if state else None,
         },
     }
     return JSONResponse(content=payload)
@@ -1045,7 +1052,7 @@ def export_models_data(
     # Adjustments
     if 'adjustments' in selection:
         rows = []
-        for m in crud.list_models(db):
+        for m in crud.list_models(db, with_adjustments=True):
             for adj in sorted(list(m.compensation_adjustments or []), key=lambda a: a.effective_date):
                 rows.append({
                     'model_id': m.id,
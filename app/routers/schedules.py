@@ -5,7 +5,6 @@ from __future__ import annotations
 import calendar
 import csv
 import io
-import json
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Sequence, cast, Any
@@ -22,7 +21,7 @@ from app import crud
 from app.auth import User
 from app.database import get_session
 from app.dependencies import templates
-from app.core.formatting import format_display_date
+from app.core.formatting import format_cycle_display, format_display_date
 from app.models import AdhocPayment, PAYOUT_STATUS_ENUM, Payout, Model, ScheduleRun
 from app.routers.auth import get_current_user, get_admin_user
 from app.services import PayrollService
@@ -31,6 +30,10 @@ router = APIRouter(prefix="/schedules", tags=["Schedules"])
 
 DEFAULT_EXPORT_DIR = Path("exports")
 
+# Shared by the per-payout loops below instead of being rebuilt for every row
+_ZERO = Decimal("0")
+_UNSETTLED_STATUSES = frozenset(("not_paid", "on_hold", "approved"))
+
 QUICK_RANGE_OPTIONS = [
     {"id": "past_7_days", "label": "Past 7 Days", "days": 7},
     {"id": "past_30_days", "label": "Past 30 Days", "days": 30},
@@ -114,13 +117,16 @@ def _format_range_label(start: date | None, end: date | None, fallback: str) ->
     return fallback
 
 
+def _stored_frequency_counts(run_obj) -> dict[str, int]:
+    """Return the frequency counts saved on a run, or an empty dict when none were stored."""
+    counts = getattr(run_obj, "summary_frequency_counts", None)
+    return counts if isinstance(counts, dict) else {}
+
+
 def _build_run_card(run_obj, zero: Decimal) -> dict[str, object]:
     frequency_counts = getattr(run_obj, "frequency_counts", None)
     if not isinstance(frequency_counts, dict):
-        try:
-            frequency_counts = json.loads(run_obj.summary_frequency_counts)
-        except (json.JSONDecodeError, AttributeError):
-            frequency_counts = {}
+        frequency_counts = _stored_frequency_counts(run_obj)
 
     outstanding = getattr(run_obj, "unpaid_total", zero) or zero
     paid_total_value = getattr(run_obj, "paid_total", zero) or zero
@@ -235,10 +241,7 @@ def _prepare_runs_by_year(db: Session, target_year: int) -> tuple[list, list[int
     zero = Decimal("0")
 
     for run in all_runs:
-        try:
-            run.frequency_counts = json.loads(run.summary_frequency_counts)
-        except json.JSONDecodeError:
-            run.frequency_counts = {}
+        run.frequency_counts = _stored_frequency_counts(run)
 
         summary = crud.run_payment_summary(db, run.id)
         run.summary_models_paid = summary.get("paid_models", 0)
@@ -310,10 +313,7 @@ def _gather_dashboard_data(db: Session, month: str | None, year: int | None = No
     grouped_runs: dict[tuple[int, int], list] = {}
     filtered_runs: list = []
     for run in all_runs:
-        try:
-            run.frequency_counts = json.loads(run.summary_frequency_counts)
-        except json.JSONDecodeError:
-            run.frequency_counts = {}
+        run.frequency_counts = _stored_frequency_counts(run)
 
         summary = crud.run_payment_summary(db, run.id)
         run.summary_models_paid = summary.get("paid_models", 0)
@@ -1603,7 +1603,7 @@ def list_runs_all(
 
     month_totals: list[dict[str, object]] = []
     for month_index in range(1, 13):
-        label = format_display_date(date(target_year, month_index, 1))
+        label = format_cycle_display(target_year, month_index)
         month_value = f"{target_year:04d}-{month_index:02d}"
         count = month_totals_map.get(label, 0)
         month_totals.append(
@@ -1970,7 +1970,7 @@ def view_schedule(
             # Errors are intentionally swallowed here to avoid blocking the user from viewing the run.
             pass
 
-    run.cycle_display = format_display_date(date(run.target_year, run.target_month, 1))
+    run.cycle_display = format_cycle_display(run.target_year, run.target_month)
 
     code_filter = code.strip() if code else None
     frequency_filter = frequency if frequency else None
@@ -2025,12 +2025,8 @@ def view_schedule(
     )
     # Map of payout_id -> total amount deducted from cash advances (planned allocations)
     advance_allocations = crud.get_allocation_totals_for_run(db, run_id)
-    payout_total = sum((payout.amount or Decimal("0")) for payout in payouts)
     validations = crud.list_validation_for_run(db, run_id)
-    try:
-        frequency_counts = json.loads(run.summary_frequency_counts)
-    except json.JSONDecodeError:
-        frequency_counts = {}
+    frequency_counts = _stored_frequency_counts(run)
 
     base_filename = f"pay_schedule_{run.target_year:04d}_{run.target_month:02d}_run{run.id}"
     export_path = Path(run.export_path)
@@ -2040,14 +2036,17 @@ def view_schedule(
     method_options = crud.payment_methods_for_run(db, run_id)
     frequency_options = crud.frequencies_for_run(db, run_id)
 
-    # Calculate overdue payments for this run
+    # Total the listed payouts and the overdue ones for this run in a single pass
     today = date.today()
+    payout_total = _ZERO
     overdue_count = 0
-    overdue_amount = Decimal("0")
+    overdue_amount = _ZERO
     for payout in payouts:
-        if payout.pay_date and payout.pay_date < today and payout.status in ["not_paid", "on_hold", "approved"]:
+        amount = payout.amount or _ZERO
+        payout_total += amount
+        if payout.pay_date and payout.pay_date < today and payout.status in _UNSETTLED_STATUSES:
             overdue_count += 1
-            overdue_amount += payout.amount or Decimal("0")
+            overdue_amount += amount
 
     return templates.TemplateResponse(
         "schedules/detail.html",
@@ -2118,6 +2117,7 @@ def download_export(
             db,
             run_id,
             status=status_filter,
+            with_models=True,
         )
         
         output = io.StringIO()
@@ -2164,7 +2164,7 @@ def download_export(
     if file_type == "schedule_excel":
         # Support the 'overdue' pseudo-status -- filter server-side if requested
         if status_filter == 'overdue':
-            all_payouts = crud.list_payouts_for_run(db, run_id)
+            all_payouts = crud.list_payouts_for_run(db, run_id, with_models=True)
             today = date.today()
             payouts = [p for p in all_payouts if p.pay_date and p.pay_date < today and p.status in ('not_paid', 'on_hold')]
         else:
@@ -2172,6 +2172,7 @@ def download_export(
                 db,
                 run_id,
                 status=status_filter,
+                with_models=True,
             )
 
         rows = []
@@ -2264,7 +2265,7 @@ def update_payout_record(
         is_overdue = bool(
             payout.pay_date
             and payout.pay_date < today
-            and payout.status in ("not_paid", "on_hold", "approved")
+            and payout.status in _UNSETTLED_STATUSES
         )
         return JSONResponse(
             {
@@ -7,19 +7,19 @@ from typing import Any, Optional
 
 from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
 
-from app.models import ADHOC_PAYMENT_STATUS_ENUM, FREQUENCY_ENUM, STATUS_ENUM
+from app.models import ADHOC_PAYMENT_STATUS_ENUM, FREQUENCY_ENUM, MODEL_TEXT_LIMITS, STATUS_ENUM
 
 
 class ModelBase(BaseModel):
     status: str = Field(..., pattern="|".join(STATUS_ENUM))
     code: str = Field(..., min_length=1, max_length=50)
-    real_name: str = Field(..., min_length=1, max_length=200)
-    working_name: str = Field(..., min_length=1, max_length=200)
+    real_name: str = Field(..., min_length=1, max_length=MODEL_TEXT_LIMITS["real_name"])
+    working_name: str = Field(..., min_length=1, max_length=MODEL_TEXT_LIMITS["working_name"])
     start_date: date
-    payment_method: str = Field(..., min_length=1, max_length=100)
+    payment_method: str = Field(..., min_length=1, max_length=MODEL_TEXT_LIMITS["payment_method"])
     payment_frequency: str
     amount_monthly: Decimal = Field(..., gt=0)
-    crypto_wallet: Optional[str] = Field(None, max_length=200)
+    crypto_wallet: Optional[str] = Field(None, max_length=MODEL_TEXT_LIMITS["crypto_wallet"])
 
     @field_validator("status")
     def validate_status(cls, value: str) -> str:
@@ -84,7 +84,7 @@ class ScheduleRunRead(ScheduleRunBase):
     id: int
     summary_models_paid: int
     summary_total_payout: Decimal
-    summary_frequency_counts: str
+    summary_frequency_counts: dict[str, int]
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -1,11 +1,17 @@
 """Security utilities for rate limiting and account lockout."""
 from __future__ import annotations
 
+import asyncio
+import threading
 from datetime import datetime, timedelta
+from typing import Any
+
+from anyio import to_thread
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select, update
 
 from app.auth import User
+from app.database import SessionLocal
 from app.models import LoginAttempt
 from app.core.formatting import format_display_datetime
 
@@ -13,6 +19,17 @@ from app.core.formatting import format_display_datetime
 MAX_FAILED_ATTEMPTS = 5
 LOCKOUT_DURATION_MINUTES = 15
 RATE_LIMIT_WINDOW_MINUTES = 15
+LOGIN_ATTEMPT_RETENTION_DAYS = 90
+# Login throttles checked before any database read or password hash: (hits, window seconds)
+LOGIN_RATE_LIMIT_PER_IP = (20, 60)
+LOGIN_RATE_LIMIT_PER_USERNAME = (10, 300)
+# Login attempts are an audit trail nothing reads back during sign-in, so they are buffered
+# and inserted in batches: when this many are waiting, or every few seconds from the app lifespan
+LOGIN_ATTEMPT_BATCH_SIZE = 100
+LOGIN_ATTEMPT_FLUSH_SECONDS = 2.0
+
+_pending_attempts: list[dict[str, Any]] = []
+_pending_lock = threading.Lock()
 
 
 def record_login_attempt(
@@ -22,15 +39,52 @@ def record_login_attempt(
     ip_address: str | None = None,
     user_agent: str | None = None,
 ) -> None:
-    """Record a login attempt in the database."""
-    attempt = LoginAttempt(
-        username=username,
-        success=success,
-        ip_address=ip_address,
-        user_agent=user_agent,
-    )
-    db.add(attempt)
-    db.commit()
+    """Queue a login attempt; it is written with the next batch (at once if this fills one)."""
+    attempt = {
+        "username": username,
+        "success": success,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "attempted_at": datetime.now(),
+    }
+    with _pending_lock:
+        _pending_attempts.append(attempt)
+        batch_full = len(_pending_attempts) >= LOGIN_ATTEMPT_BATCH_SIZE
+    if batch_full:
+        flush_login_attempts(db)
+
+
+def flush_login_attempts(db: Session | None = None) -> int:
+    """Insert every queued login attempt in one statement. Returns rows written.
+
+    The batch is written and committed on a session of its own (on ``db``'s bind when given),
+    so the caller's transaction is never committed early. If the insert fails, the batch goes
+    back on the queue for the next flush.
+    """
+    with _pending_lock:
+        batch = _pending_attempts[:]
+        _pending_attempts.clear()
+    if not batch:
+        return 0
+    try:
+        with (SessionLocal() if db is None else Session(bind=db.get_bind())) as flush_db:
+            flush_db.execute(insert(LoginAttempt), batch)
+            flush_db.commit()
+    except Exception:
+        with _pending_lock:
+            _pending_attempts[:0] = batch
+        raise
+    return len(batch)
+
+
+async def flush_login_attempts_periodically(interval: float = LOGIN_ATTEMPT_FLUSH_SECONDS) -> None:
+    """Write queued attempts every ``interval`` seconds until cancelled (run from the app lifespan)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await to_thread.run_sync(flush_login_attempts)
+        except Exception as exc:
+            print(f"[security] Failed to write login attempts: {type(exc).__name__}: {exc}")
 
 
 def get_failed_attempts_count(
@@ -39,24 +93,39 @@ def get_failed_attempts_count(
     minutes: int = RATE_LIMIT_WINDOW_MINUTES,
 ) -> int:
     """Get count of failed login attempts in the last N minutes."""
+    flush_login_attempts(db)
     cutoff_time = datetime.now() - timedelta(minutes=minutes)
     
-    stmt = select(LoginAttempt).where(
+    stmt = select(func.count()).select_from(LoginAttempt).where(
         LoginAttempt.username == username,
         LoginAttempt.success == False,
         LoginAttempt.attempted_at >= cutoff_time,
     )
     
-    attempts = db.execute(stmt).scalars().all()
-    return len(attempts)
+    return db.execute(stmt).scalar_one()
+
+
+def purge_login_attempts(db: Session, days: int = LOGIN_ATTEMPT_RETENTION_DAYS) -> int:
+    """Delete login attempts older than the retention window. Returns rows removed."""
+    cutoff_time = datetime.now() - timedelta(days=days)
+    result = db.execute(delete(LoginAttempt).where(LoginAttempt.attempted_at < cutoff_time))
+    db.commit()
+    return result.rowcount or 0
+
 
+def _resolve_user(db: Session, user: User | str | None) -> User | None:
+    """Accept an already-loaded user (skipping the lookup) or a username."""
+    if user is None or isinstance(user, User):
+        return user
+    return db.query(User).filter(User.username == user).first()
 
-def is_account_locked(db: Session, username: str) -> tuple[bool, str | None]:
+
+def is_account_locked(db: Session, user: User | str | None) -> tuple[bool, str | None]:
     """
     Check if account is locked.
     Returns (is_locked, reason_message)
     """
-    user = db.query(User).filter(User.username == username).first()
+    user = _resolve_user(db, user)
     
     if not user:
         return False, None
@@ -78,48 +147,76 @@ def is_account_locked(db: Session, username: str) -> tuple[bool, str | None]:
     return False, None
 
 
+def _apply_lock(user: User, duration_minutes: int) -> None:
+    user.is_locked = True
+    user.locked_until = datetime.now() + timedelta(minutes=duration_minutes)
+    user.failed_login_count = 0  # Reset counter
+
+
 def lock_account(
     db: Session,
-    username: str,
+    user: User | str | None,
     duration_minutes: int = LOCKOUT_DURATION_MINUTES,
 ) -> None:
     """Lock a user account after too many failed attempts."""
-    user = db.query(User).filter(User.username == username).first()
+    user = _resolve_user(db, user)
     
     if user:
-        user.is_locked = True
-        user.locked_until = datetime.now() + timedelta(minutes=duration_minutes)
-        user.failed_login_count = 0  # Reset counter
+        _apply_lock(user, duration_minutes)
         db.add(user)
         db.commit()
 
 
-def increment_failed_login(db: Session, username: str) -> None:
-    """Increment failed login counter for a user."""
-    user = db.query(User).filter(User.username == username).first()
+def increment_failed_login(db: Session, user: User | str | None) -> int:
+    """Increment failed login counter for a user and return the new count (0 for unknown users).
+
+    Reaching MAX_FAILED_ATTEMPTS locks the account in the same commit.
+    """
+    user = _resolve_user(db, user)
     
-    if user:
-        user.failed_login_count += 1
-        user.last_failed_login = datetime.now()
-        db.add(user)
-        db.commit()
-        
-        # Lock account if max attempts reached
-        if user.failed_login_count >= MAX_FAILED_ATTEMPTS:
-            lock_account(db, username)
+    if not user:
+        return 0
+    failed_count = (user.failed_login_count or 0) + 1
+    user.failed_login_count = failed_count
+    user.last_failed_login = datetime.now()
+    
+    # Lock account if max attempts reached
+    if failed_count >= MAX_FAILED_ATTEMPTS:
+        _apply_lock(user, LOCKOUT_DURATION_MINUTES)
+    db.add(user)
+    db.commit()
+    return failed_count
 
 
-def reset_failed_login(db: Session, username: str) -> None:
+def reset_failed_login(db: Session, user: User | str | None) -> None:
     """Reset failed login counter after successful login."""
-    user = db.query(User).filter(User.username == username).first()
+    user = _resolve_user(db, user)
     
-    if user:
+    # Nothing to write when the counter is already clear
+    if user and (user.failed_login_count or user.last_failed_login is not None):
         user.failed_login_count = 0
         user.last_failed_login = None
         db.add(user)
         db.commit()
 
 
+def rehash_password(user_id: int, old_hash: str, password: str) -> bool:
+    """Replace a user's hash with one at the current cost; runs after the login response.
+
+    The update only applies while the stored hash is still ``old_hash``, so a password changed
+    in the meantime is never overwritten. Returns True when the hash was replaced.
+    """
+    new_hash = User.hash_password(password)
+    with SessionLocal() as db:
+        result = db.execute(
+            update(User)
+            .where(User.id == user_id, User.password_hash == old_hash)
+            .values(password_hash=new_hash)
+        )
+        db.commit()
+    return result.rowcount > 0
+
+
 def unlock_account(db: Session, username: str) -> None:
     """Manually unlock an account (admin only)."""
     user = db.query(User).filter(User.username == username).first()
@@ -139,6 +236,7 @@ def get_recent_login_attempts(
     limit: int = 10,
 ) -> list[LoginAttempt]:
     """Get recent login attempts for a user."""
+    flush_login_attempts(db)
     stmt = (
         select(LoginAttempt)
         .where(LoginAttempt.username == username)
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import calendar
-import json
 from datetime import date
 from decimal import Decimal
 from pathlib import Path
@@ -55,19 +54,11 @@ class PayrollService:
             self.db, target_year=target_year, target_month=target_month
         )
         
-        # Preserve old payout status and notes for matching payouts
-        old_payout_data = {}
         if existing_runs:
             run = existing_runs[0]  # Use the most recent run for this month
-            # Save status and notes from old payouts before clearing
-            for payout in run.payouts:
-                key = (payout.code, payout.pay_date)
-                old_payout_data[key] = {
-                    "status": payout.status,
-                    "notes": payout.notes,
-                }
-            # Clear old payouts and validations so we can refresh with current data
-            crud.clear_schedule_data(self.db, run)
+            # Clear allocations and validations; store_payouts updates the existing payouts in place,
+            # preserving their status and notes
+            crud.clear_schedule_data(self.db, run, keep_payouts=True)
         else:
             run = crud.create_schedule_run(
                 self.db,
@@ -79,7 +70,7 @@ class PayrollService:
                 export_path=str(output_dir),
             )
         
-        models = crud.list_models(self.db)
+        models = crud.list_models(self.db, with_adjustments=True)
         records = [
             self._to_record(index, model, target_year, target_month)
             for index, model in enumerate(models, start=1)
@@ -96,7 +87,7 @@ class PayrollService:
         # Update the run with new summary data
         run.summary_models_paid = summary.get("models_paid", 0)
         run.summary_total_payout = Decimal(str(summary.get("total_payout", 0)))
-        run.summary_frequency_counts = json.dumps(summary.get("frequency_counts", {}))
+        run.summary_frequency_counts = dict(summary.get("frequency_counts", {}))
         self.db.commit()
 
         amount_column = f"Amount ({currency})"
@@ -117,7 +108,6 @@ class PayrollService:
             run,
             payout_records,
             amount_column=amount_column,
-            old_payout_data=old_payout_data,
         )
         crud.store_validation_messages(self.db, run, records, include_inactive)
 
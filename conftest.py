@@ -1,6 +1,9 @@
 import os
 import shutil
 import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
 import pytest
 from sqlalchemy import event
 
@@ -8,6 +11,7 @@ from sqlalchemy import event
 _TEMP_DIR = tempfile.mkdtemp(prefix="payroll_tests_")
 _DB_FILE = os.path.join(_TEMP_DIR, "test_payroll.db")
 os.environ["PAYROLL_DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ.setdefault("PAYROLL_SECRET_KEY", "test-session-secret")
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -43,8 +47,9 @@ def setup_test_database():
 # while preserving user accounts for authentication-related tests.
 @pytest.fixture(autouse=True)
 def _clean_domain_tables():
-    from app import crud
+    from app import crud, ratelimit
     from app.database import SessionLocal
+    ratelimit.reset()
     session = SessionLocal()
     try:
         crud.reset_application_data(session)
@@ -69,3 +74,27 @@ def test_db():
         except Exception:
             pass
         session.close()
+
+
+@pytest.fixture
+def capture_sql():
+    """Record the SQL an engine executes inside a ``with`` block.
+
+    ``with capture_sql(engine) as statements:`` collects each statement string. ``record`` maps
+    a statement to what gets collected instead, such as the name of the thread executing it.
+    """
+
+    @contextmanager
+    def _capture(engine, record: Callable[[str], object] = lambda statement: statement) -> Iterator[list]:
+        captured: list = []
+
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            captured.append(record(statement))
+
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield captured
+        finally:
+            event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+    return _capture
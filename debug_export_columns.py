@@ -25,7 +25,7 @@ m = Model(code="ALPHA1", status="Active", real_name="Alex", working_name="Alpha"
 session.add(m)
 session.flush()
 run = ScheduleRun(target_year=2025, target_month=10, currency="USD", include_inactive=False,
-                  summary_models_paid=0, summary_total_payout=Decimal("0"), summary_frequency_counts="{}",
+                  summary_models_paid=0, summary_total_payout=Decimal("0"), summary_frequency_counts={},
                   export_path="exports")
 session.add(run)
 session.flush()
@@ -6,14 +6,22 @@ echo "[entrypoint] working dir: $(pwd)"
 echo "[entrypoint] python: $(python -V 2>&1)"
 echo "[entrypoint] pip packages:"
 pip --disable-pip-version-check list || true
-echo "[entrypoint] environment vars:"
-env | sort
+echo "[entrypoint] environment vars (secrets and database URLs omitted):"
+env | grep -v -i -e SECRET -e PASSWORD -e TOKEN -e DATABASE_URL | sort
 
 # Default port if not set
 if [ -z "$PORT" ]; then
   PORT=8000
 fi
 
+# Requests arrive through the host's proxy, which connects from a private address. Trusting
+# X-Forwarded-For from those addresses makes request.client the real visitor (the per-IP login
+# limit depends on it) while ignoring the header when a client sends it directly.
+if [ -z "$FORWARDED_ALLOW_IPS" ]; then
+  FORWARDED_ALLOW_IPS="127.0.0.1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+fi
+
 echo "[entrypoint] launching gunicorn on 0.0.0.0:$PORT"
 
-exec gunicorn -k uvicorn.workers.UvicornWorker app.main:app --bind 0.0.0.0:$PORT --workers 2 --log-level info
+exec gunicorn -k uvicorn.workers.UvicornWorker app.main:app --bind 0.0.0.0:$PORT --workers 2 --log-level info \
+  --forwarded-allow-ips "$FORWARDED_ALLOW_IPS"
@@ -12,7 +12,7 @@ from sqlalchemy.orm import sessionmaker
 if "bcrypt" not in sys.modules:
     mock_bcrypt = types.ModuleType("bcrypt")
 
-    def _gensalt() -> bytes:
+    def _gensalt(rounds: int = 12) -> bytes:
         return b"test-salt"
 
     def _hashpw(password: bytes, salt: bytes) -> bytes:
@@ -1,10 +1,11 @@
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 
+import pytest
 from sqlalchemy.orm import Session
 
 from app import crud
-from app.models import ScheduleRun, Payout
+from app.models import AuditLog, ScheduleRun, Payout
 
 
 def test_cleanup_empty_runs_removes_runs_without_payouts(test_db: Session):
@@ -43,11 +44,300 @@ def test_cleanup_empty_runs_removes_runs_without_payouts(test_db: Session):
         )
     )
     test_db.commit()
+    empty_id, data_id = run_empty.id, run_with_data.id
 
     # Cleanup
     result = crud.cleanup_empty_runs(test_db)
 
     # Assert empty run deleted, the other remains
     assert result["deleted_runs"] == 1
-    assert crud.get_schedule_run(test_db, run_empty.id) is None
-    assert crud.get_schedule_run(test_db, run_with_data.id) is not None
+    assert result["run_ids"] == [empty_id]
+    assert crud.get_schedule_run(test_db, empty_id) is None
+    assert crud.get_schedule_run(test_db, data_id) is not None
+
+
+def test_purge_login_attempts_keeps_recent_history(test_db: Session):
+    from datetime import datetime, timedelta
+
+    from app.models import LoginAttempt
+    from app.security import get_failed_attempts_count, purge_login_attempts
+
+    now = datetime.now()
+    test_db.add_all(
+        [
+            LoginAttempt(username="purge-check", success=False, attempted_at=now - timedelta(days=120)),
+            LoginAttempt(username="purge-check", success=False, attempted_at=now - timedelta(minutes=1)),
+            LoginAttempt(username="purge-check", success=True, attempted_at=now),
+        ]
+    )
+    test_db.commit()
+
+    assert get_failed_attempts_count(test_db, "purge-check") == 1
+    assert purge_login_attempts(test_db) >= 1
+    remaining = test_db.query(LoginAttempt).filter_by(username="purge-check").all()
+    assert len(remaining) == 2
+    assert all(attempt.attempted_at > now - timedelta(days=1) for attempt in remaining)
+
+
+def test_log_admin_action_stores_compact_json_with_decimals(test_db: Session):
+    import json
+
+    from app.models import AuditLog
+
+    crud.log_admin_action(test_db, None, "purge_model", {"payouts_paid_amount": Decimal("100.00"), "payouts": 2})
+
+    entry = test_db.query(AuditLog).filter_by(action="purge_model").order_by(AuditLog.id.desc()).first()
+    assert entry.details == '{"payouts_paid_amount":"100.00","payouts":2}'
+    assert json.loads(entry.details)["payouts"] == 2
+
+
+def test_create_user_reports_duplicate_username_from_unique_index(test_db: Session):
+    from fastapi.testclient import TestClient
+
+    from app.auth import User
+    from app.main import app
+    from app.routers.auth import session_cookie_value
+
+    admin = test_db.query(User).filter(User.username == "admin").one()
+    client = TestClient(app)
+    client.cookies.set("user_id", session_cookie_value(admin.id))
+
+    form = {"username": "dup-user", "password": "secret", "role": "user"}
+    try:
+        created = client.post("/admin/users/new", data=form, follow_redirects=False)
+        duplicate = client.post("/admin/users/new", data=form, follow_redirects=False)
+
+        assert created.status_code == 303
+        assert duplicate.status_code == 400
+        assert "Username already exists" in duplicate.text
+        assert test_db.query(User).filter(User.username == "dup-user").count() == 1
+    finally:
+        test_db.query(User).filter(User.username == "dup-user").delete()
+        test_db.commit()
+
+
+def test_cleanup_empty_runs_runs_as_background_task(test_db: Session):
+    from fastapi.testclient import TestClient
+
+    from app.auth import User
+    from app.main import app
+    from app.routers.auth import session_cookie_value
+    from app.models import MaintenanceTask
+
+    admin = test_db.query(User).filter(User.username == "admin").one()
+    client = TestClient(app)
+    client.cookies.set("user_id", session_cookie_value(admin.id))
+
+    queued = client.post("/admin/maintenance/cleanup-empty-runs", follow_redirects=False)
+    assert queued.status_code == 303
+    task_url = queued.headers["location"]
+    assert task_url.startswith("/admin/tasks/")
+    task_id = int(task_url.rsplit("/", 1)[1])
+    try:
+        page = client.get(task_url)
+        assert page.status_code == 200
+        assert "Deleted 0 empty run(s)." in page.text
+
+        status = client.get(f"/admin/api/tasks/{task_id}").json()
+        assert status["status"] == "succeeded"
+        assert status["kind"] == "cleanup_empty_runs"
+        assert status["finished_at"] is not None
+    finally:
+        test_db.query(MaintenanceTask).filter(MaintenanceTask.id == task_id).delete()
+        test_db.commit()
+
+
+def test_delete_user_keeps_audit_rows(test_db: Session):
+    from fastapi.testclient import TestClient
+
+    from app.auth import User
+    from app.main import app
+    from app.routers.auth import session_cookie_value
+
+    admin = test_db.query(User).filter(User.username == "admin").one()
+    doomed = User(username="doomed-user", password_hash=User.hash_password("secret"), role="user")
+    test_db.add(doomed)
+    test_db.commit()
+    crud.log_admin_action(test_db, doomed.id, "cleanup_orphans", {})
+    doomed_id = doomed.id
+
+    client = TestClient(app)
+    client.cookies.set("user_id", session_cookie_value(admin.id))
+    try:
+        deleted = client.post(f"/admin/users/{doomed_id}/delete", follow_redirects=False)
+        missing = client.post(f"/admin/users/{doomed_id}/delete", follow_redirects=False)
+
+        assert deleted.status_code == 303
+        assert missing.status_code == 404
+        test_db.expire_all()
+        assert test_db.get(User, doomed_id) is None
+        entry = test_db.query(AuditLog).order_by(AuditLog.id.desc()).first()
+        assert entry.action == "cleanup_orphans"
+        assert entry.user_id is None
+    finally:
+        test_db.query(User).filter(User.username == "doomed-user").delete()
+        test_db.commit()
+
+
+def test_delete_user_clears_references_without_foreign_key_enforcement(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.auth import User
+    from app.database import Base
+    from app.models import MaintenanceTask
+    from app.routers.admin import delete_user
+
+    # A bare engine: the app never enables SQLite's foreign_keys pragma, so ON DELETE SET NULL is inert
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}", future=True)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False, future=True)()
+    try:
+        admin = User(username="root", password_hash="x", role="admin")
+        doomed = User(username="doomed", password_hash="x", role="user")
+        session.add_all([admin, doomed])
+        session.flush()
+        session.add_all(
+            [
+                AuditLog(user_id=doomed.id, action="cleanup_orphans"),
+                MaintenanceTask(kind="cleanup_orphans", requested_by=doomed.id),
+            ]
+        )
+        session.commit()
+
+        delete_user(doomed.id, db=session, admin=admin)
+
+        session.expire_all()
+        assert session.query(AuditLog.user_id).scalar() is None
+        assert session.query(MaintenanceTask.requested_by).scalar() is None
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def test_list_users_revalidates_with_etag(test_db: Session):
+    from fastapi.testclient import TestClient
+
+    from app.auth import User
+    from app.main import app
+    from app.routers.auth import session_cookie_value
+
+    admin = test_db.query(User).filter(User.username == "admin").one()
+    client = TestClient(app)
+    client.cookies.set("user_id", session_cookie_value(admin.id))
+
+    first = client.get("/admin/users")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert client.get("/admin/users", headers={"If-None-Match": etag}).status_code == 304
+
+    test_db.add(User(username="etag-user", password_hash=User.hash_password("secret"), role="user"))
+    test_db.commit()
+    try:
+        changed = client.get("/admin/users", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert "etag-user" in changed.text
+    finally:
+        test_db.query(User).filter(User.username == "etag-user").delete()
+        test_db.commit()
+
+
+def test_login_attempts_are_buffered_and_written_in_batches(test_db: Session, monkeypatch):
+    from app import security
+    from app.models import LoginAttempt
+    from app.security import flush_login_attempts, get_failed_attempts_count, record_login_attempt
+
+    flush_login_attempts(test_db)
+    monkeypatch.setattr(security, "LOGIN_ATTEMPT_BATCH_SIZE", 3)
+
+    def _stored() -> int:
+        return test_db.query(LoginAttempt).filter_by(username="batch-check").count()
+
+    record_login_attempt(test_db, "batch-check", False, "10.0.0.1", "pytest")
+    record_login_attempt(test_db, "batch-check", True, "10.0.0.1", "pytest")
+    assert _stored() == 0
+
+    # Filling the batch writes it on a session of its own, leaving the caller's uncommitted
+    test_db.add(LoginAttempt(username="batch-pending", success=False, attempted_at=datetime.now()))
+    record_login_attempt(test_db, "batch-check", False, "10.0.0.1", "pytest")
+    assert _stored() == 3
+    test_db.rollback()
+    assert test_db.query(LoginAttempt).filter_by(username="batch-pending").count() == 0
+
+    # Readers flush whatever is still queued before counting
+    record_login_attempt(test_db, "batch-check", False, "10.0.0.1", "pytest")
+    assert get_failed_attempts_count(test_db, "batch-check") == 3
+    assert flush_login_attempts() == 0
+
+
+def test_failed_login_attempt_flush_keeps_the_batch(test_db: Session, monkeypatch):
+    from app import security
+    from app.models import LoginAttempt
+    from app.security import flush_login_attempts, record_login_attempt
+
+    flush_login_attempts(test_db)
+    record_login_attempt(test_db, "retry-check", False, "10.0.0.2", "pytest")
+
+    def _fail(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(security, "insert", _fail)
+    with pytest.raises(RuntimeError):
+        flush_login_attempts(test_db)
+    monkeypatch.undo()
+
+    assert flush_login_attempts(test_db) == 1
+    assert test_db.query(LoginAttempt).filter_by(username="retry-check").count() == 1
+
+
+def test_unfinished_tasks_fail_once_their_heartbeat_goes_stale(test_db: Session):
+    from datetime import timedelta
+
+    from fastapi.testclient import TestClient
+
+    from app.auth import User
+    from app.main import app
+    from app.maintenance import TASK_TIMEOUT_SECONDS
+    from app.models import MaintenanceTask
+    from app.routers.auth import session_cookie_value
+
+    admin = test_db.query(User).filter(User.username == "admin").one()
+    now = datetime.now()
+    long_ago = now - timedelta(seconds=TASK_TIMEOUT_SECONDS + 60)
+    stalled = MaintenanceTask(kind="cleanup_orphans", status="running", created_at=long_ago, heartbeat_at=long_ago)
+    # Requested long ago but still reporting progress
+    alive = MaintenanceTask(kind="cleanup_orphans", status="running", created_at=long_ago, heartbeat_at=now)
+    test_db.add_all([stalled, alive])
+    test_db.commit()
+    client = TestClient(app)
+    client.cookies.set("user_id", session_cookie_value(admin.id))
+
+    assert client.get(f"/admin/api/tasks/{stalled.id}").json()["status"] == "failed"
+    assert client.get(f"/admin/api/tasks/{alive.id}").json()["status"] == "running"
+    # The status page stops refreshing itself after its poll budget
+    assert 'http-equiv="refresh"' in client.get(f"/admin/tasks/{alive.id}").text
+    assert 'http-equiv="refresh"' not in client.get(f"/admin/tasks/{alive.id}?poll=150").text
+
+
+def test_run_task_keeps_a_failure_recorded_while_it_ran(test_db: Session, monkeypatch):
+    from sqlalchemy import update
+
+    from app import maintenance
+    from app.models import MaintenanceTask
+
+    task = maintenance.enqueue_task(test_db, "cleanup_orphans", None)
+
+    def _job(db: Session, params: dict) -> tuple[dict, str]:
+        # Another worker times the task out while the job is still running
+        with Session(bind=test_db.get_bind()) as other:
+            other.execute(update(MaintenanceTask).where(MaintenanceTask.id == task.id).values(status="failed"))
+            other.commit()
+        return {}, "done"
+
+    monkeypatch.setitem(maintenance.TASK_RUNNERS, "cleanup_orphans", ("cleanup_orphans", _job))
+    maintenance.run_task(task.id, test_db.get_bind())
+    # Only a pending task is started
+    maintenance.run_task(task.id, test_db.get_bind())
+
+    test_db.expire_all()
+    assert (task.status, task.message) == ("failed", None)
@@ -38,7 +38,7 @@ def test_reset_application_data_clears_domain_tables_and_keeps_users(test_db):
     test_db.add(ad)
 
     # Schedule run and payout
-    run = ScheduleRun(target_year=model.start_date.year, target_month=model.start_date.month, currency="USD", include_inactive=False, summary_models_paid=0, summary_total_payout=Decimal("0"), summary_frequency_counts="{}", export_path="exports")
+    run = ScheduleRun(target_year=model.start_date.year, target_month=model.start_date.month, currency="USD", include_inactive=False, summary_models_paid=0, summary_total_payout=Decimal("0"), summary_frequency_counts={}, export_path="exports")
     test_db.add(run)
     test_db.flush()
 
@@ -3,7 +3,7 @@ from decimal import Decimal
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -89,7 +89,7 @@ def _seed_data(session):
         include_inactive=False,
         summary_models_paid=1,
         summary_total_payout=Decimal("1500.00"),
-        summary_frequency_counts="{}",
+        summary_frequency_counts={},
     )
     session.add(run)
     session.flush()
@@ -161,3 +161,299 @@ def test_analytics_defaults_to_payouts_dataset(client, db_session):
     assert payload["meta"]["counts"]["payouts"] == 1
     assert payload["meta"]["totals"]["paid"] == pytest.approx(1500.0)
     assert payload["meta"]["totals"]["unpaid"] == pytest.approx(0.0)
+
+
+def test_analytics_data_issues_one_query_per_dataset(client, db_session, capture_sql):
+    _seed_data(db_session)
+    today = date.today()
+    for index in range(3):
+        model = Model(
+            status="Active",
+            code=f"BATCH{index}",
+            real_name="Batch R",
+            working_name="Batch W",
+            start_date=today - timedelta(days=90),
+            payment_method="ACH",
+            payment_frequency="monthly",
+            amount_monthly=Decimal("1000.00"),
+        )
+        db_session.add(model)
+        db_session.flush()
+        db_session.add(
+            ModelCompensationAdjustment(model_id=model.id, effective_date=today, amount_monthly=Decimal("1100.00"))
+        )
+    db_session.commit()
+    db_session.expire_all()
+
+    with capture_sql(db_session.get_bind()) as statements:
+        response = client.get("/analytics/data", params={"datasets": "payouts,adhoc,adjustments,runs"})
+
+    selects = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["meta"]["counts"]["adjustments"] == 4
+    assert {row["model_code"] for row in payload["results"]["adjustments"]} == {
+        "MODEL100",
+        "BATCH0",
+        "BATCH1",
+        "BATCH2",
+    }
+    assert payload["results"]["runs"][0]["total_payout"] == pytest.approx(1500.0)
+    # One row query per dataset plus one totals query each for payouts and adhoc
+    assert len(selects) == 6
+
+
+def test_analytics_totals_only_skips_result_rows(client, db_session):
+    _seed_data(db_session)
+    today = date.today()
+    model = db_session.query(Model).filter_by(code="MODEL100").one()
+    db_session.add(AdhocPayment(model_id=model.id, pay_date=today, amount=Decimal("40.00"), status="pending"))
+    db_session.commit()
+    params = {
+        "start": (today - timedelta(days=1)).isoformat(),
+        "end": (today + timedelta(days=1)).isoformat(),
+        "datasets": "payouts,adhoc,adjustments,runs",
+        "totals_only": "1",
+    }
+
+    response = client.get("/analytics/data", params=params)
+    assert response.status_code == 200
+    payload = response.json()
+
+    assert payload["results"] == {}
+    assert payload["meta"]["datasets"] == ["adhoc", "adjustments", "payouts", "runs"]
+    assert payload["meta"]["counts"] == {"payouts": 1, "adhoc": 2, "adjustments": 1, "runs": 1}
+    assert payload["meta"]["totals"]["paid"] == pytest.approx(1750.0)
+    assert payload["meta"]["totals"]["unpaid"] == pytest.approx(40.0)
+
+
+def test_analytics_data_is_cached_until_a_payout_write_commits(client, db_session, capture_sql):
+    _seed_data(db_session)
+
+    with capture_sql(db_session.get_bind()) as statements:
+        first = client.get("/analytics/data")
+        queries_after_first = len(statements)
+        second = client.get("/analytics/data")
+        not_modified = client.get("/analytics/data", headers={"If-None-Match": first.headers["etag"]})
+        assert not [
+            statement
+            for statement in statements[queries_after_first:]
+            if statement.lstrip().upper().startswith("SELECT")
+        ]
+
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert not_modified.status_code == 304
+
+    payout = db_session.query(Payout).one()
+    payout.status = "not_paid"
+    db_session.commit()
+
+    refreshed = client.get("/analytics/data").json()
+    assert refreshed["meta"]["totals"]["paid"] == pytest.approx(0.0)
+    assert refreshed["meta"]["totals"]["unpaid"] == pytest.approx(1500.0)
+
+
+def test_analytics_data_streams_wide_ranges_in_batches(client, db_session, monkeypatch):
+    from app.routers import analytics
+
+    _seed_data(db_session)
+    model = db_session.query(Model).filter_by(code="MODEL100").one()
+    today = date.today()
+    db_session.add_all(
+        AdhocPayment(model_id=model.id, pay_date=today, amount=Decimal(f"{10 + index}.00"), status="pending")
+        for index in range(4)
+    )
+    db_session.commit()
+    params = {
+        "start": (today - timedelta(days=1)).isoformat(),
+        "end": (today + timedelta(days=1)).isoformat(),
+        "datasets": "payouts,adhoc,adjustments,runs",
+    }
+    buffered = client.get("/analytics/data", params=params).json()
+
+    analytics.clear_analytics_cache()
+    monkeypatch.setattr(analytics, "STREAM_ROW_THRESHOLD", 0)
+    monkeypatch.setattr(analytics, "STREAM_BATCH_SIZE", 2)
+    streamed = client.get("/analytics/data", params=params)
+
+    assert streamed.status_code == 200
+    assert "etag" not in streamed.headers
+    assert streamed.json() == buffered
+    assert streamed.json()["meta"]["counts"]["adhoc"] == 5
+
+
+def test_analytics_data_totals_describe_the_returned_rows(client, db_session, monkeypatch):
+    from app.routers import analytics
+
+    _seed_data(db_session)
+    today = date.today()
+    model = db_session.query(Model).filter_by(code="MODEL100").one()
+    fetch_datasets = analytics._fetch_datasets
+
+    def _fetch_after_a_write(db, queries):
+        # A payment committed between the meta query and the row reads
+        db_session.add(AdhocPayment(model_id=model.id, pay_date=today, amount=Decimal("7.50"), status="paid"))
+        db_session.commit()
+        return fetch_datasets(db, queries)
+
+    monkeypatch.setattr(analytics, "_fetch_datasets", _fetch_after_a_write)
+    params = {
+        "start": (today - timedelta(days=1)).isoformat(),
+        "end": (today + timedelta(days=1)).isoformat(),
+        "datasets": "payouts,adhoc",
+    }
+    body = client.get("/analytics/data", params=params).json()
+
+    rows = body["results"]["payouts"] + body["results"]["adhoc"]
+    assert body["meta"]["counts"] == {"payouts": 1, "adhoc": 2}
+    assert body["meta"]["totals"] == {
+        "paid": sum(row["amount"] for row in rows if row["status"] == "paid"),
+        "unpaid": sum(row["amount"] for row in rows if row["status"] != "paid"),
+    }
+
+
+def test_stream_payload_meta_describes_the_streamed_rows(db_session):
+    import orjson
+
+    from app.routers import analytics
+
+    _seed_data(db_session)
+    today = date.today()
+    start, end = today - timedelta(days=1), today + timedelta(days=1)
+    requested = {"payouts", "adhoc"}
+    meta = analytics._analytics_meta(db_session, start, end, requested)
+    # A write committed after the meta query but before the rows are read
+    model = db_session.query(Model).filter_by(code="MODEL100").one()
+    db_session.add(AdhocPayment(model_id=model.id, pay_date=today, amount=Decimal("7.50"), status="paid"))
+    db_session.commit()
+    expected = analytics._analytics_meta(db_session, start, end, requested)
+
+    body = b"".join(
+        analytics._stream_payload(db_session.get_bind(), analytics._dataset_queries(start, end, requested), meta)
+    )
+    streamed = orjson.loads(body)
+
+    assert streamed["meta"]["counts"] == expected["counts"] == {"payouts": 1, "adhoc": 2}
+    assert streamed["meta"]["totals"] == expected["totals"]
+
+
+def test_fetch_datasets_overlaps_queries_on_separate_connections(tmp_path, capture_sql):
+    import threading
+
+    from app.routers import analytics
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'analytics.db'}", future=True, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False, future=True)()
+    try:
+        _seed_data(session)
+        today = date.today()
+        queries = analytics._dataset_queries(
+            today - timedelta(days=1), today + timedelta(days=1), {"payouts", "adhoc", "adjustments", "runs"}
+        )
+        with capture_sql(engine, record=lambda statement: threading.current_thread().name) as threads:
+            results = analytics._fetch_datasets(session, queries)
+    finally:
+        session.close()
+        engine.dispose()
+
+    assert list(results) == ["payouts", "adhoc", "adjustments", "runs"]
+    assert {name: len(rows) for name, rows in results.items()} == {"payouts": 1, "adhoc": 1, "adjustments": 1, "runs": 1}
+    assert threads and all(name.startswith("analytics-query") for name in threads)
+
+
+def test_fetch_datasets_releases_the_request_connection_before_fanning_out(tmp_path):
+    from app.routers import analytics
+
+    # One connection in total: the workers can only run once the caller has given it back
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'analytics.db'}",
+        future=True,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=2,
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False, future=True)()
+    try:
+        _seed_data(session)
+        today = date.today()
+        start, end = today - timedelta(days=1), today + timedelta(days=1)
+        queries = analytics._dataset_queries(start, end, {"payouts", "adhoc"})
+        model = session.query(Model).filter_by(code="MODEL100").one()
+        meta = analytics._analytics_meta(session, start, end, {"payouts", "adhoc"})
+        assert session.in_transaction()
+        results = analytics._fetch_datasets(session, queries)
+        # Objects loaded before the fan-out are neither expired nor detached by the release
+        assert model in session and not inspect(model).expired_attributes
+
+        # Pending changes are never rolled back: the jobs run in order on the caller's session
+        model.working_name = "Renamed"
+        pending = analytics._fetch_datasets(session, queries)
+        assert model in session.dirty
+    finally:
+        session.close()
+        engine.dispose()
+
+    assert meta["counts"] == {"payouts": 1, "adhoc": 1}
+    assert {name: len(rows) for name, rows in results.items()} == {"payouts": 1, "adhoc": 1}
+    assert pending == results
+
+
+def test_textual_dml_and_copy_writes_clear_write_invalidated_caches(monkeypatch):
+    import csv
+    from datetime import datetime
+
+    from sqlalchemy import text
+
+    from app import crud
+    from app.core.cache import WriteInvalidatedCache
+    from app.database import SessionLocal
+
+    cache = WriteInvalidatedCache(("schedule_runs",), ttl_seconds=60, max_entries=4)
+
+    def _copy(dbapi_connection, sql, data):
+        # Stands in for COPY: the rows go through the raw driver cursor, unseen by engine events
+        table = sql.split()[1]
+        columns = sql[sql.index("(") + 1 : sql.index(")")]
+        rows = list(csv.reader(data))
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({', '.join('?' * len(rows[0]))})", rows)
+        finally:
+            cursor.close()
+
+    db = SessionLocal()
+    try:
+        cache.set("runs", 1)
+        db.execute(text("UPDATE schedule_runs SET currency = currency"))
+        db.commit()
+        assert cache.get("runs") is None
+
+        cache.set("runs", 1)
+        monkeypatch.setitem(crud._COPY_WRITERS, db.get_bind().dialect.driver, _copy)
+        crud.bulk_copy(
+            db,
+            ScheduleRun,
+            [
+                {
+                    "target_year": 2025,
+                    "target_month": 4,
+                    "currency": "USD",
+                    "include_inactive": False,
+                    "summary_models_paid": 0,
+                    "summary_total_payout": Decimal("0"),
+                    "summary_frequency_counts": {},
+                    "created_at": datetime(2025, 4, 1, 9, 0),
+                    "export_path": "exports",
+                }
+            ],
+        )
+        assert cache.get("runs") == 1  # nothing is cleared before the commit
+        db.commit()
+        assert cache.get("runs") is None
+        assert db.query(ScheduleRun).filter(ScheduleRun.target_month == 4).count() == 1
+    finally:
+        db.close()
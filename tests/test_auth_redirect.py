@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 from app.main import app
+from app.routers.auth import session_cookie_value
 
 
 def test_html_request_redirects_to_login_with_next():
@@ -52,3 +53,300 @@ def test_next_param_returns_user_to_original_page_after_login():
     resp3 = client.get(next_value, follow_redirects=False)
     # Authenticated dashboard/models should return 200 OK
     assert resp3.status_code in (200, 303, 307)  # 303/307 acceptable if page performs its own redirect
+
+
+def test_json_client_sending_wildcard_gets_401_json():
+    client = TestClient(app)
+    resp = client.get(
+        "/dashboard",
+        headers={"accept": "application/json, */*"},
+        follow_redirects=False,
+    )
+    assert resp.status_code == 401
+    assert resp.json().get("detail") == "Not authenticated"
+
+
+def test_browser_navigation_redirects_without_html_accept():
+    client = TestClient(app)
+    resp = client.get(
+        "/dashboard",
+        headers={"accept": "*/*", "sec-fetch-mode": "navigate"},
+        follow_redirects=False,
+    )
+    assert resp.status_code in (303, 307)
+    assert resp.headers["location"].startswith("/login?next=")
+
+
+def test_admin_routes_are_registered_once():
+    from collections import Counter
+
+    registrations = Counter(
+        (method, route.path)
+        for route in app.routes
+        if route.path.startswith("/admin")
+        for method in getattr(route, "methods", None) or ()
+    )
+    assert registrations
+    assert [key for key, count in registrations.items() if count > 1] == []
+
+
+def test_failed_logins_count_down_then_lock_without_reloading_user(monkeypatch):
+    from app.auth import User
+    from app.database import SessionLocal
+
+    # Other test modules may stub bcrypt, so compare passwords directly
+    monkeypatch.setattr(User, "verify_password", lambda self, password: password == "right-pass1")
+    db = SessionLocal()
+    db.add(User(username="lockout-user", password_hash=User.hash_password("right-pass1"), role="user"))
+    db.commit()
+    client = TestClient(app)
+    try:
+        first = client.post("/login", data={"username": "lockout-user", "password": "wrong"}, follow_redirects=False)
+        assert first.status_code == 401
+        assert "(4 attempts remaining)" in first.text
+
+        for _ in range(4):
+            last = client.post("/login", data={"username": "lockout-user", "password": "wrong"}, follow_redirects=False)
+        assert last.status_code == 401
+        assert "attempts remaining" not in last.text
+
+        locked = client.post("/login", data={"username": "lockout-user", "password": "right-pass1"}, follow_redirects=False)
+        assert locked.status_code == 403
+
+        db.expire_all()
+        user = db.query(User).filter(User.username == "lockout-user").one()
+        assert user.is_locked
+        assert user.failed_login_count == 0
+    finally:
+        db.query(User).filter(User.username == "lockout-user").delete()
+        db.commit()
+        db.close()
+
+
+def test_authenticated_requests_reuse_cached_user_and_still_persist_edits(monkeypatch, capture_sql):
+    from app.auth import User
+    from app.database import SessionLocal, engine
+
+    monkeypatch.setattr(User, "verify_password", lambda self, password: password == "old-pass1")
+    monkeypatch.setattr(User, "hash_password", staticmethod(lambda password: f"hashed:{password}"))
+    db = SessionLocal()
+    user = User(username="cached-user", password_hash="hashed:old-pass1", role="user")
+    db.add(user)
+    db.commit()
+    client = TestClient(app)
+    client.cookies.set("user_id", session_cookie_value(user.id))
+    try:
+        assert client.get("/profile").status_code == 200
+        with capture_sql(engine) as statements:
+            assert client.get("/profile").status_code == 200
+        assert not [
+            statement
+            for statement in statements
+            if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement
+        ]
+
+        changed = client.post(
+            "/profile/change-password",
+            data={"current_password": "old-pass1", "new_password": "new-pass2", "confirm_password": "new-pass2"},
+        )
+        assert changed.status_code == 200
+        db.expire_all()
+        assert db.query(User).filter(User.username == "cached-user").one().password_hash == "hashed:new-pass2"
+    finally:
+        db.query(User).filter(User.username == "cached-user").delete()
+        db.commit()
+        db.close()
+
+
+def test_login_throttles_by_username_before_looking_up_the_user():
+    from app.security import LOGIN_RATE_LIMIT_PER_USERNAME
+
+    client = TestClient(app)
+    limit, _ = LOGIN_RATE_LIMIT_PER_USERNAME
+
+    for _ in range(limit):
+        resp = client.post("/login", data={"username": "ghost-user", "password": "guess"}, follow_redirects=False)
+        assert resp.status_code == 401
+    throttled = client.post("/login", data={"username": "GHOST-USER", "password": "guess"}, follow_redirects=False)
+
+    assert throttled.status_code == 429
+    assert int(throttled.headers["retry-after"]) > 0
+    assert "Too many login attempts" in throttled.text
+
+
+def test_login_checks_password_off_the_event_loop(monkeypatch):
+    import asyncio
+
+    from app.auth import User
+    from app.database import SessionLocal
+
+    ran_on_loop = []
+
+    def _verify(self, password):
+        try:
+            asyncio.get_running_loop()
+            ran_on_loop.append(True)
+        except RuntimeError:
+            ran_on_loop.append(False)
+        return password == "thread-pass1"
+
+    monkeypatch.setattr(User, "verify_password", _verify)
+    db = SessionLocal()
+    db.add(User(username="thread-user", password_hash="unused", role="user"))
+    db.commit()
+    try:
+        resp = TestClient(app).post(
+            "/login", data={"username": "thread-user", "password": "thread-pass1"}, follow_redirects=False
+        )
+        assert resp.status_code == 303
+        assert ran_on_loop == [False]
+        # SQLite test database: plain-HTTP cookie with the 24 hour lifetime
+        cookie = resp.headers["set-cookie"]
+        assert "Max-Age=86400" in cookie
+        assert "Secure" not in cookie
+    finally:
+        db.query(User).filter(User.username == "thread-user").delete()
+        db.commit()
+        db.close()
+
+
+def test_login_upgrades_hash_made_with_another_cost(monkeypatch):
+    from app import auth as auth_module
+    from app.auth import User
+    from app.database import SessionLocal
+
+    current_hash = f"$2b${auth_module.BCRYPT_ROUNDS:02d}$" + "n" * 53
+    legacy_hash = "$2b$04$" + "o" * 53
+    # Other test modules may stub bcrypt, so fake both sides of the hash
+    monkeypatch.setattr(User, "verify_password", lambda self, password: password == "rehash-pass1")
+    monkeypatch.setattr(User, "hash_password", staticmethod(lambda password: current_hash))
+    assert User(password_hash=legacy_hash).password_needs_rehash()
+    assert not User(password_hash=current_hash).password_needs_rehash()
+
+    db = SessionLocal()
+    db.add(User(username="rehash-user", password_hash=legacy_hash, role="user"))
+    db.commit()
+    try:
+        resp = TestClient(app).post(
+            "/login", data={"username": "rehash-user", "password": "rehash-pass1"}, follow_redirects=False
+        )
+        assert resp.status_code == 303
+        db.expire_all()
+        user = db.query(User).filter(User.username == "rehash-user").one()
+        assert user.password_hash == current_hash
+    finally:
+        db.query(User).filter(User.username == "rehash-user").delete()
+        db.commit()
+        db.close()
+
+
+def test_login_lookup_reads_only_the_columns_it_needs(monkeypatch, capture_sql):
+    from app.auth import User
+    from app.database import SessionLocal, engine
+
+    monkeypatch.setattr(User, "verify_password", lambda self, password: password == "narrow-pass1")
+    db = SessionLocal()
+    db.add(User(username="narrow-user", password_hash="unused", role="user"))
+    db.commit()
+    try:
+        with capture_sql(engine) as statements:
+            resp = TestClient(app).post(
+                "/login", data={"username": "narrow-user", "password": "narrow-pass1"}, follow_redirects=False
+            )
+        assert resp.status_code == 303
+    finally:
+        db.query(User).filter(User.username == "narrow-user").delete()
+        db.commit()
+        db.close()
+
+    user_selects = [
+        statement
+        for statement in statements
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement
+    ]
+    assert len(user_selects) == 1
+    assert "users.password_hash" in user_selects[0]
+    assert "users.created_at" not in user_selects[0]
+
+
+def test_rate_limit_windows_are_aligned_clock_buckets(monkeypatch):
+    from app import ratelimit
+
+    clock = [119.5]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: clock[0])
+
+    assert ratelimit.check("bucket-key", 2, 60) == (True, 0)
+    assert ratelimit.check("bucket-key", 2, 60) == (True, 0)
+    # The window runs to 120s, so the retry hint counts down to that boundary
+    assert ratelimit.check("bucket-key", 2, 60) == (False, 1)
+
+    clock[0] = 120.0
+    assert ratelimit.check("bucket-key", 2, 60) == (True, 0)
+
+
+def test_session_cookie_must_carry_a_valid_signature():
+    from app.auth import User
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    user = User(username="signed-user", password_hash="unused", role="user")
+    db.add(user)
+    db.commit()
+    signed = session_cookie_value(user.id)
+    client = TestClient(app)
+    try:
+        # An unsigned id, and another user's id under this user's signature
+        forged = f"{user.id + 1}{signed[len(str(user.id)):]}"
+        for cookie in (str(user.id), forged):
+            client.cookies.set("user_id", cookie)
+            resp = client.get("/profile/", headers={"accept": "application/json"}, follow_redirects=False)
+            assert resp.status_code == 401
+            assert resp.json()["detail"] == "Invalid session"
+
+        client.cookies.set("user_id", signed)
+        assert client.get("/profile/", follow_redirects=False).status_code == 200
+    finally:
+        db.query(User).filter(User.username == "signed-user").delete()
+        db.commit()
+        db.close()
+
+
+def test_user_cache_drops_snapshots_read_before_a_clear():
+    from app.core.cache import WriteInvalidatedCache
+
+    cache = WriteInvalidatedCache(("users",), ttl_seconds=60, max_entries=4)
+    generation = cache.generation
+    cache.clear()  # a write to users commits while the row is being read
+    cache.set(1, {"role": "admin"}, generation=generation)
+    assert cache.get(1) is None
+
+    cache.set(1, {"role": "user"}, generation=cache.generation)
+    assert cache.get(1) == {"role": "user"}
+
+
+def test_admin_check_ignores_a_stale_cached_role():
+    from app.auth import User
+    from app.database import SessionLocal
+    from app.routers import auth as auth_routes
+
+    db = SessionLocal()
+    user = User(username="demoted-admin", password_hash="unused", role="admin")
+    db.add(user)
+    db.commit()
+    client = TestClient(app)
+    client.cookies.set("user_id", session_cookie_value(user.id))
+    try:
+        assert client.get("/admin/users", follow_redirects=False).status_code == 200
+        snapshot = auth_routes._user_cache.get(user.id)
+        assert snapshot["role"] == "admin"
+
+        user.role = "user"
+        db.commit()
+        # Another worker's cache would still hold the admin snapshot
+        auth_routes._user_cache.set(user.id, snapshot)
+        resp = client.get("/admin/users", headers={"accept": "application/json"}, follow_redirects=False)
+        assert resp.status_code == 403
+    finally:
+        db.query(User).filter(User.username == "demoted-admin").delete()
+        db.commit()
+        db.close()
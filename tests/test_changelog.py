@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers import changelog
+
+
+def test_render_changelog_reuses_html_until_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "CHANGELOG.md"
+    path.write_text("# Changelog\n\n- First entry\n", encoding="utf-8")
+    monkeypatch.setattr(changelog, "_CHANGELOG_PATH", path)
+    monkeypatch.setattr(changelog, "_cache", None)
+
+    first = changelog._render_changelog()
+    assert "First entry" in first
+    assert changelog._render_changelog() is first
+
+    path.write_text("# Changelog\n\n- Second entry\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    updated = changelog._render_changelog()
+    assert "Second entry" in updated
+    assert "First entry" not in updated
+
+
+def test_render_changelog_missing_file_is_404(tmp_path, monkeypatch):
+    monkeypatch.setattr(changelog, "_CHANGELOG_PATH", tmp_path / "missing.md")
+    with pytest.raises(HTTPException) as exc:
+        changelog._render_changelog()
+    assert exc.value.status_code == 404
+
+
+def test_warm_changelog_fills_the_cache_and_tolerates_a_missing_file(tmp_path, monkeypatch):
+    path = tmp_path / "CHANGELOG.md"
+    path.write_text("# Changelog\n\n- Warm entry\n", encoding="utf-8")
+    monkeypatch.setattr(changelog, "_CHANGELOG_PATH", path)
+    monkeypatch.setattr(changelog, "_cache", None)
+
+    changelog.warm_changelog()
+    assert changelog._cache is not None
+    assert "Warm entry" in changelog._cache[1]
+
+    monkeypatch.setattr(changelog, "_CHANGELOG_PATH", tmp_path / "missing.md")
+    changelog.warm_changelog()
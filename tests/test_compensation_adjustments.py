@@ -15,7 +15,7 @@ from sqlalchemy.orm import sessionmaker
 if "bcrypt" not in sys.modules:
     mock_bcrypt = types.ModuleType("bcrypt")
 
-    def _gensalt() -> bytes:
+    def _gensalt(rounds: int = 12) -> bytes:
         return b"test-salt"
 
     def _hashpw(password: bytes, salt: bytes) -> bytes:
@@ -31,7 +31,12 @@ if "bcrypt" not in sys.modules:
 
 from app import crud
 from app.database import Base
-from app.importers.excel_importer import ImportOptions, RunOptions, import_from_excel
+from app.importers.excel_importer import (
+    ImportOptions,
+    RunOptions,
+    import_compensation_adjustments,
+    import_from_excel,
+)
 from app.models import Model, ModelCompensationAdjustment
 from app.schemas import ModelCreate
 from app.routers import models as model_routes
@@ -213,6 +218,56 @@ def test_import_with_compensation_adjustments_sheet():
         session.close()
 
 
+
+def test_import_adjustments_updates_existing_and_repeated_rows():
+    session = _make_session()
+    try:
+        model = Model(
+            code="BETA1",
+            status="Active",
+            real_name="Blair",
+            working_name="Beta",
+            start_date=date(2024, 1, 1),
+            payment_method="Wire",
+            payment_frequency="monthly",
+            amount_monthly=Decimal("4000"),
+        )
+        session.add(model)
+        session.flush()
+        session.add(
+            ModelCompensationAdjustment(
+                model_id=model.id,
+                effective_date=date(2024, 1, 1),
+                amount_monthly=Decimal("4000"),
+            )
+        )
+        session.commit()
+
+        adjustments_df = pd.DataFrame(
+            [
+                {"Code": "beta1", "Effective Date": "2024-01-01", "Monthly Amount": 4200, "Notes": "Corrected"},
+                {"Code": "BETA1", "Effective Date": "2099-06-01", "Monthly Amount": 5000, "Notes": None},
+                {"Code": "BETA1", "Effective Date": "2099-06-01", "Monthly Amount": 5500, "Notes": None},
+            ]
+        )
+
+        created, updated, errors = import_compensation_adjustments(adjustments_df, session)
+        session.commit()
+
+        assert errors == []
+        assert (created, updated) == (1, 2)
+        amounts = [
+            adjustment.amount_monthly
+            for adjustment in session.query(ModelCompensationAdjustment).order_by(
+                ModelCompensationAdjustment.effective_date
+            )
+        ]
+        assert amounts == [Decimal("4200"), Decimal("5500")]
+        # Future-dated adjustments leave the current rate alone
+        assert session.get(Model, model.id).amount_monthly == Decimal("4000")
+    finally:
+        session.close()
+
 def test_parse_adjustments_accepts_dates_after_start():
     baseline = date(2024, 1, 1)
     parsed = model_routes._parse_adjustment_rows(
@@ -234,3 +289,57 @@ def test_parse_adjustments_rejects_dates_before_start():
             baseline,
         )
     assert "on or after" in excinfo.value.detail
+
+
+def test_active_model_state_view_reports_current_pay_and_open_advances():
+    from datetime import timedelta
+
+    from app.database import SessionLocal
+    from app.models import ModelAdvance
+
+    session = SessionLocal()
+    try:
+        today = date.today()
+        active = crud.create_model(
+            session,
+            ModelCreate(
+                status="Active",
+                code="VIEW-1",
+                real_name="Name",
+                working_name="Alias",
+                start_date=date(2024, 1, 1),
+                payment_method="Wire",
+                payment_frequency="monthly",
+                amount_monthly=Decimal("4000"),
+                crypto_wallet=None,
+            ),
+        )
+        inactive = crud.create_model(
+            session,
+            ModelCreate(
+                status="Inactive",
+                code="VIEW-2",
+                real_name="Name",
+                working_name="Alias",
+                start_date=date(2024, 1, 1),
+                payment_method="Wire",
+                payment_frequency="monthly",
+                amount_monthly=Decimal("3000"),
+                crypto_wallet=None,
+            ),
+        )
+        crud.create_compensation_adjustment(session, active, today - timedelta(days=1), Decimal("4500"))
+        crud.create_compensation_adjustment(session, active, today + timedelta(days=30), Decimal("9000"))
+        session.add_all(
+            ModelAdvance(model_id=active.id, amount_total=amount, amount_remaining=amount, status=status)
+            for amount, status in ((Decimal("100"), "active"), (Decimal("50"), "approved"), (Decimal("70"), "closed"))
+        )
+        session.commit()
+
+        state = crud.get_active_model_state(session, active.id)
+        assert state is not None
+        assert state.effective_amount == Decimal("4500")
+        assert state.advance_remaining == Decimal("150")
+        assert crud.get_active_model_state(session, inactive.id) is None
+    finally:
+        session.close()
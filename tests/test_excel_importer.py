@@ -122,7 +122,7 @@ def test_import_payouts_updates_existing_without_overwriting_others():
             include_inactive=False,
             summary_models_paid=0,
             summary_total_payout=Decimal("0"),
-            summary_frequency_counts="{}",
+            summary_frequency_counts={},
             export_path="exports",
         )
         session.add(run)
@@ -221,3 +221,144 @@ def test_import_payouts_updates_existing_without_overwriting_others():
         assert summary.payout_errors == []
     finally:
         session.close()
+
+
+def test_import_refreshes_schedule_run_summary():
+    session = _make_session()
+    try:
+        workbook_bytes = _build_workbook()
+        run_options = RunOptions(
+            create_schedule_run=True,
+            target_year=2024,
+            target_month=2,
+            currency="USD",
+            export_dir="exports",
+        )
+
+        import_from_excel(session, workbook_bytes, ImportOptions(), run_options)
+
+        run = session.query(ScheduleRun).one()
+        assert run.summary_total_payout == Decimal("2500")
+        assert run.summary_models_paid == 1
+        assert run.summary_frequency_counts == {"monthly": 1}
+    finally:
+        session.close()
+
+
+def test_auto_generated_runs_load_models_once(capture_sql):
+    session = _make_session()
+    try:
+        models_df = pd.DataFrame(
+            [
+                {
+                    "Code": "ALPHA1",
+                    "Real Name": "Alex Smith",
+                    "Working Name": "Alpha",
+                    "Start Date": "2024-01-01",
+                    "Payment Method": "Wire",
+                    "Payment Frequency": "Monthly",
+                    "Monthly Amount": 5000,
+                }
+            ]
+        )
+        payouts_df = pd.DataFrame(
+            [
+                {"Code": "ALPHA1", "Pay Date": f"2024-{month:02d}-07", "Amount": 1000, "Status": "Paid"}
+                for month in (1, 2, 3)
+            ]
+        )
+        buffer = BytesIO()
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            models_df.to_excel(writer, sheet_name="Models", index=False)
+            payouts_df.to_excel(writer, sheet_name="Payouts", index=False)
+
+        with capture_sql(session.get_bind()) as statements:
+            summary = import_from_excel(
+                session,
+                buffer.getvalue(),
+                ImportOptions(),
+                RunOptions(auto_generate_runs=True),
+            )
+
+        model_selects = [
+            statement
+            for statement in statements
+            if statement.lstrip().upper().startswith("SELECT") and "FROM models" in statement
+        ]
+        assert summary.payouts_created == 3
+        assert len(summary.schedule_run_ids) == 3
+        assert len(model_selects) == 1
+    finally:
+        session.close()
+
+
+def test_auto_generated_run_errors_render_with_period_prefix():
+    session = _make_session()
+    try:
+        models_df = pd.DataFrame(
+            [
+                {
+                    "Code": "ALPHA1",
+                    "Real Name": "Alex Smith",
+                    "Working Name": "Alpha",
+                    "Start Date": "2024-01-01",
+                    "Payment Method": "Wire",
+                    "Payment Frequency": "Monthly",
+                    "Monthly Amount": 5000,
+                }
+            ]
+        )
+        payouts_df = pd.DataFrame(
+            [
+                {"Code": "ALPHA1", "Pay Date": "2024-02-07", "Amount": 1000, "Status": "Paid"},
+                {"Code": "GHOST", "Pay Date": "2024-02-14", "Amount": 1000, "Status": "Paid"},
+            ]
+        )
+        buffer = BytesIO()
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            models_df.to_excel(writer, sheet_name="Models", index=False)
+            payouts_df.to_excel(writer, sheet_name="Payouts", index=False)
+
+        summary = import_from_excel(
+            session,
+            buffer.getvalue(),
+            ImportOptions(),
+            RunOptions(auto_generate_runs=True),
+        )
+
+        assert [(error.row, error.period) for error in summary.payout_errors] == [(3, (2024, 2))]
+        expected = "2024-02: Row 3: model 'GHOST' not found; import models first"
+        assert str(summary.payout_errors[0]) == expected
+        assert summary.as_dict()["payout_errors"] == [expected]
+    finally:
+        session.close()
+
+
+def test_import_models_rejects_names_over_the_field_limit():
+    from app.importers.excel_importer import import_models
+
+    session = _make_session()
+    try:
+        models_df = pd.DataFrame(
+            [
+                {
+                    "Code": code,
+                    "Status": "Active",
+                    "Real Name": real_name,
+                    "Working Name": "Alias",
+                    "Start Date": "2024-01-01",
+                    "Payment Method": "Wire",
+                    "Payment Frequency": "Monthly",
+                    "Monthly Amount": 1000,
+                }
+                for code, real_name in (("SHORT1", "Alex Smith"), ("LONG1", "x" * 201))
+            ]
+        )
+
+        created, _, errors = import_models(models_df, session, update_existing=True)
+
+        assert created == 1
+        assert [error.reason for error in errors] == ["real name exceeds 200 characters"]
+        assert [model.code for model in session.query(Model).all()] == ["SHORT1"]
+    finally:
+        session.close()
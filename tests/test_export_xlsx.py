@@ -44,11 +44,18 @@ def test_export_xlsx_requires_admin():
 
     with _override_dependencies(session, user):
         client = TestClient(app)
-        resp = client.get("/dashboard/export-xlsx")
+        resp = client.post("/dashboard/export-xlsx")
         assert resp.status_code == 403
+        assert client.get("/dashboard/export-xlsx/1").status_code == 403
 
 
-def test_export_xlsx_admin():
+def test_export_xlsx_admin(tmp_path, monkeypatch):
+    from app import maintenance
+    from app.routers import dashboard
+
+    monkeypatch.setattr(maintenance, "EXPORT_DIR", tmp_path)
+    monkeypatch.setattr(dashboard, "EXPORT_DIR", tmp_path)
+    dashboard._workbook_task_cache.clear()
     session = _make_db()
 
     user = User.create_user("admin", "password", role="admin")
@@ -57,6 +64,152 @@ def test_export_xlsx_admin():
 
     with _override_dependencies(session, user):
         client = TestClient(app)
-        resp = client.get("/dashboard/export-xlsx")
+        started = client.post("/dashboard/export-xlsx")
+        assert started.status_code == 202
+        job_id = started.json()["job_id"]
+
+        # The workbook was built after the response; later requests reuse it until data changes
+        assert client.post("/dashboard/export-xlsx").json() == {"job_id": job_id, "status": "succeeded"}
+
+        resp = client.get(f"/dashboard/export-xlsx/{job_id}")
         assert resp.status_code == 200
         assert resp.headers.get("content-type") == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        assert "payroll_full_export_" in resp.headers["content-disposition"]
+        assert resp.content[:2] == b"PK"
+    dashboard._workbook_task_cache.clear()
+
+
+def test_dashboard_csv_stream_chunks_rows_after_a_single_bom():
+    from app.exporting.csv_stream import CSV_CHUNK_SIZE, stream_csv
+
+    rows = [["code", "note"]] + [[f"M{index:05d}", "x" * 40] for index in range(1000)]
+    chunks = list(stream_csv(rows, bom=True))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < CSV_CHUNK_SIZE + 200 for chunk in chunks)
+    text = b"".join(chunks).decode("utf-8-sig")
+    assert "\ufeff" not in text
+    lines = text.splitlines()
+    assert lines[0] == "code,note"
+    assert len(lines) == 1001
+
+
+def test_dashboard_csv_export_reads_models_and_payments_in_one_join(monkeypatch, capture_sql):
+    from datetime import date
+    from decimal import Decimal
+
+    from app.models import AdhocPayment, Model
+    from app.routers import dashboard
+
+    session = _make_db()
+    user = User.create_user("csv-user", "password", role="user")
+    session.add(user)
+    for index in range(5):
+        model = Model(
+            status="Active",
+            code=f"CSV{index}",
+            real_name="Real",
+            working_name="Work",
+            start_date=date(2025, 1, 1),
+            payment_method="ACH",
+            payment_frequency="monthly",
+            amount_monthly=Decimal("1000.00"),
+        )
+        session.add(model)
+        session.flush()
+        # CSV4 has no payments; CSV0 has two, listed by pay date
+        for day in (() if index == 4 else (20, 1) if index == 0 else (1,)):
+            session.add(AdhocPayment(model_id=model.id, pay_date=date(2025, 2, day), amount=Decimal("5.00"), status="paid"))
+    session.commit()
+
+    monkeypatch.setattr(dashboard, "_EXPORT_BATCH_SIZE", 2)
+    with capture_sql(session.get_bind()) as statements, _override_dependencies(session, user):
+        resp = TestClient(app).get("/dashboard/export")
+
+    selects = [
+        statement
+        for statement in statements
+        if statement.lstrip().upper().startswith("SELECT") and "adhoc_payments" in statement
+    ]
+    assert resp.status_code == 200
+    lines = resp.content.decode("utf-8-sig").splitlines()
+    rows = [line.split(",") for line in lines[1:]]
+    assert [row[1] for row in rows] == ["CSV0", "CSV0", "CSV1", "CSV2", "CSV3", "CSV4"]
+    assert [row[13] for row in rows[:2]] == ["02/01/2025", "02/20/2025"]
+    assert rows[-1][12:] == [""] * 8
+    assert len(selects) == 1
+
+
+def test_models_csv_export_streams_paid_payouts_read_in_one_query(capture_sql):
+    from datetime import date
+    from decimal import Decimal
+
+    from app.models import Model, Payout, ScheduleRun
+
+    session = _make_db()
+    user = User.create_user("models-csv-user", "password", role="user")
+    run = ScheduleRun(
+        target_year=2025,
+        target_month=3,
+        currency="USD",
+        include_inactive=False,
+        summary_models_paid=0,
+        summary_total_payout=Decimal("0"),
+        summary_frequency_counts={},
+        export_path="exports",
+    )
+    session.add_all([user, run])
+    for code in ("EXP1", "EXP2"):
+        session.add(
+            Model(
+                status="Active",
+                code=code,
+                real_name="Real",
+                working_name="Work",
+                start_date=date(2025, 1, 1),
+                payment_method="ACH",
+                payment_frequency="monthly",
+                amount_monthly=Decimal("100.00"),
+            )
+        )
+    session.flush()
+    first = session.query(Model).filter(Model.code == "EXP1").one()
+    for day, status in ((15, "paid"), (31, "paid"), (20, "not_paid")):
+        session.add(
+            Payout(
+                schedule_run=run,
+                model_id=first.id,
+                pay_date=date(2025, 3, day),
+                code=first.code,
+                real_name=first.real_name,
+                working_name=first.working_name,
+                payment_method="ACH",
+                payment_frequency="monthly",
+                amount=Decimal("50.00"),
+                status=status,
+                notes=f"day {day}",
+            )
+        )
+    session.commit()
+    with capture_sql(session.get_bind()) as statements, _override_dependencies(session, user):
+        resp = TestClient(app).get("/models/export?include_payments=true")
+
+    payout_selects = [
+        statement
+        for statement in statements
+        if statement.lstrip().upper().startswith("SELECT") and "FROM payouts" in statement
+    ]
+    assert resp.status_code == 200
+    assert "models_export_with_payments.csv" in resp.headers["content-disposition"]
+    rows = [line.split(",") for line in resp.text.splitlines()]
+    assert rows[0][0] == "Code" and len(rows[0]) == 13
+    assert [(row[0], row[9], row[12]) for row in rows[1:]] == [
+        ("EXP1", "03/31/2025", "day 31"),
+        ("EXP1", "03/15/2025", "day 15"),
+        ("EXP2", "", ""),
+    ]
+    assert len(payout_selects) == 1
+
+    with _override_dependencies(session, user):
+        filtered = TestClient(app).get("/models/export?code=EXP2")
+    assert [line.split(",")[0] for line in filtered.text.splitlines()[1:]] == ["EXP2"]
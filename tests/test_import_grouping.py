@@ -13,3 +13,14 @@ def test_group_payout_rows_by_month_multiple_rows_same_month():
     assert list(grouped.keys()) == [(2025, 10)]
     # Grouped DataFrame should contain all 3 rows
     assert len(grouped[(2025, 10)]) == 3
+
+
+def test_group_payout_rows_by_month_returns_months_in_order():
+    df = pd.DataFrame([
+        {"Code": "A", "Pay Date": "2025/12/07", "Amount": 100, "Status": "Paid"},
+        {"Code": "B", "Pay Date": "2024/03/14", "Amount": 200, "Status": "Paid"},
+        {"Code": "C", "Pay Date": "2025/01/21", "Amount": 300, "Status": "Paid"},
+    ])
+    grouped, errors = group_payout_rows_by_month(df)
+    assert not errors
+    assert list(grouped.keys()) == [(2024, 3), (2025, 1), (2025, 12)]
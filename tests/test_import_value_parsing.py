@@ -0,0 +1,34 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from app.importers.excel_importer import parse_date_value, parse_decimal_value
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "2025-10-03",
+        "2025-10-3",
+        "10/03/2025",
+        "10/3/2025",
+        "10-03-2025",
+        "Oct 3 2025",
+        pd.Timestamp("2025-10-03 08:30"),
+        datetime(2025, 10, 3, 8, 30),
+        date(2025, 10, 3),
+    ],
+)
+def test_parse_date_value_accepts_common_layouts(raw):
+    assert parse_date_value(raw, "pay date") == date(2025, 10, 3)
+
+
+def test_parse_date_value_rejects_impossible_dates():
+    with pytest.raises(ValueError, match="Could not parse pay date value '02/30/2025'"):
+        parse_date_value("02/30/2025", "pay date")
+
+
+def test_parse_decimal_value_strips_currency_noise():
+    assert parse_decimal_value(" $1,250.50 ", "amount") == Decimal("1250.50")
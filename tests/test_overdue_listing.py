@@ -17,7 +17,7 @@ def seed_overdue(session, days_ago: int = 1, code: str = "MOD1") -> tuple[Schedu
         include_inactive=False,
         summary_models_paid=0,
         summary_total_payout=Decimal("0"),
-        summary_frequency_counts="{}",
+        summary_frequency_counts={},
         export_path="exports",
     )
     session.add(run)
@@ -97,3 +97,85 @@ def test_dashboard_overdue_review_links_to_current_month_view():
     import re
     match = re.search(r"/schedules/(\d+)\?show=overdue#payments-overdue", resp.text)
     assert match, "Expected Review link to point to current month cycle with overdue filter"
+
+
+def test_dashboard_reuses_figures_until_payouts_change(capture_sql):
+    from app.database import engine
+
+    session = SessionLocal()
+    try:
+        _, payout = seed_overdue(session, days_ago=2, code="C777")
+        client = TestClient(app)
+        login_admin(client)
+
+        with capture_sql(engine) as statements:
+            first = client.get("/dashboard")
+            queried = len(statements)
+            statements.clear()
+            second = client.get("/dashboard")
+            assert not [stmt for stmt in statements if "FROM payouts" in stmt]
+        assert queried > 0
+        assert "1 Overdue Payment" in first.text
+        assert "1 Overdue Payment" in second.text
+
+        payout.status = "paid"
+        session.commit()
+        assert "1 Overdue Payment" not in client.get("/dashboard").text
+    finally:
+        session.close()
+
+
+def test_dashboard_sections_are_queried_concurrently(capture_sql):
+    import threading
+
+    from app.database import engine
+    from app.routers import dashboard
+
+    session = SessionLocal()
+    try:
+        run, _ = seed_overdue(session, days_ago=1, code="P555")
+        run_id = run.id
+        with capture_sql(engine, record=lambda statement: threading.current_thread().name) as threads:
+            payload = dashboard._dashboard_payload(session, date.today())
+    finally:
+        session.close()
+
+    assert set(payload) == {"summary", "recent_runs", "top_models", "pending_adhoc_payments", "current_month_run_id"}
+    assert payload["current_month_run_id"] == run_id
+    assert payload["summary"]["overdue_count"] == 1
+    assert threads and all(name.startswith("dashboard-query") for name in threads)
+
+
+def test_pending_adhoc_payments_load_their_models_in_one_query(capture_sql):
+    import pytest
+    from sqlalchemy.exc import InvalidRequestError
+
+    from app import crud
+    from app.database import engine
+    from app.models import AdhocPayment
+
+    session = SessionLocal()
+    try:
+        for index, code in enumerate(("ADH1", "ADH2", "ADH3")):
+            _, payout = seed_overdue(session, code=code)
+            session.add(
+                AdhocPayment(
+                    model_id=payout.model_id,
+                    pay_date=date.today() + timedelta(days=index),
+                    amount=Decimal("15.00"),
+                    status="pending",
+                )
+            )
+        session.commit()
+        session.expunge_all()
+
+        with capture_sql(engine) as statements:
+            payments = crud.pending_adhoc_payments(session)
+            names = [(payment.model.code, payment.model.working_name) for payment in payments]
+
+        assert names == [("ADH1", "Model ADH1"), ("ADH2", "Model ADH2"), ("ADH3", "Model ADH3")]
+        assert len(statements) == 1
+        with pytest.raises(InvalidRequestError):
+            payments[0].model.payouts
+    finally:
+        session.close()
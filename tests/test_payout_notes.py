@@ -17,7 +17,7 @@ def seed_run_with_payout(session) -> tuple[ScheduleRun, Payout]:
         include_inactive=False,
         summary_models_paid=0,
         summary_total_payout=Decimal("0"),
-        summary_frequency_counts="{}",
+        summary_frequency_counts={},
         export_path="exports",
     )
     session.add(run)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine, select, text
+
+from app import database
+from app.models import Payout
+
+
+def _legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}", future=True)
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE payouts (id INTEGER PRIMARY KEY, status VARCHAR(20) NOT NULL DEFAULT 'not_paid')")
+        )
+        connection.execute(
+            text("INSERT INTO payouts (id, status) VALUES (1, 'paid'), (2, 'on_hold'), (3, 'not_paid')")
+        )
+    return engine
+
+
+def test_legacy_status_names_are_rewritten_to_codes(tmp_path, monkeypatch):
+    engine = _legacy_engine(tmp_path)
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.ensure_payout_status_codes()
+    # Running again on converted rows is a no-op
+    database.ensure_payout_status_codes()
+
+    with engine.connect() as connection:
+        raw = connection.execute(text("SELECT id, status FROM payouts ORDER BY id")).all()
+        assert [(row_id, int(code)) for row_id, code in raw] == [(1, 3), (2, 1), (3, 0)]
+
+        table = Payout.__table__
+        stmt = select(table.c.id, table.c.status).where(table.c.status.in_(["paid", "on_hold"])).order_by(table.c.id)
+        assert connection.execute(stmt).all() == [(1, "paid"), (2, "on_hold")]
+
+
+def test_lifetime_paid_follows_paid_payouts_and_ranks_top_models():
+    from datetime import date
+    from decimal import Decimal
+
+    from app import crud
+    from app.database import SessionLocal
+    from app.models import Model, ScheduleRun
+
+    db = SessionLocal()
+    try:
+        run = ScheduleRun(target_year=2025, target_month=1, currency="USD", include_inactive=False, export_path="exports")
+        models = [
+            Model(
+                code=code,
+                real_name=code,
+                working_name=code,
+                start_date=date(2025, 1, 1),
+                payment_method="ACH",
+                payment_frequency="monthly",
+                amount_monthly=Decimal("100.00"),
+            )
+            for code in ("LP1", "LP2")
+        ]
+        db.add_all([run, *models])
+        db.flush()
+
+        def _payout(model, amount, status):
+            return Payout(
+                schedule_run=run,
+                model_id=model.id,
+                pay_date=date(2025, 1, 15),
+                code=model.code,
+                real_name=model.code,
+                working_name=model.code,
+                payment_method="ACH",
+                payment_frequency="monthly",
+                amount=Decimal(amount),
+                status=status,
+            )
+
+        first = _payout(models[0], "40.00", "paid")
+        second = _payout(models[1], "25.00", "paid")
+        unpaid = _payout(models[1], "90.00", "not_paid")
+        db.add_all([first, second, unpaid])
+        db.commit()
+        assert [(model.code, total) for model, total in crud.top_paid_models(db)] == [
+            ("LP1", Decimal("40.00")),
+            ("LP2", Decimal("25.00")),
+        ]
+
+        unpaid.status = "paid"
+        first.status = "on_hold"
+        db.commit()
+        db.expire_all()
+        assert [(model.code, total) for model, total in crud.top_paid_models(db)] == [("LP2", Decimal("115.00"))]
+
+        db.delete(second)
+        db.commit()
+        db.expire_all()
+        assert db.get(Model, models[1].id).lifetime_paid == Decimal("90.00")
+    finally:
+        db.close()
+
+
+def test_refresh_triggers_are_only_recreated_when_their_definition_changes(tmp_path, monkeypatch, capture_sql):
+    engine = create_engine(f"sqlite:///{tmp_path / 'triggers.db'}", future=True)
+    database.Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.ensure_lifetime_paid_triggers()
+    try:
+        with capture_sql(engine) as statements:
+            database.ensure_lifetime_paid_triggers()
+            unchanged = list(statements)
+            monkeypatch.setattr(database, "_lifetime_paid_refresh", lambda: "UPDATE models SET lifetime_paid = 0")
+            database.ensure_lifetime_paid_triggers()
+    finally:
+        engine.dispose()
+
+    assert not [statement for statement in unchanged if "TRIGGER" in statement]
+    assert sum(statement.startswith("CREATE TRIGGER") for statement in statements) == 3
@@ -135,3 +135,43 @@ def test_purge_model_flow(test_db: Session):
 
     # Run should still exist
     assert crud.get_schedule_run(test_db, run_id) is not None
+
+
+def test_delete_model_removes_owned_rows_with_bulk_deletes(test_db: Session):
+    from app.models import AdvanceRepayment, ModelAdvance
+
+    model_id = _create_model(test_db)
+    _seed_related(test_db, model_id)
+    advance = ModelAdvance(
+        model_id=model_id,
+        amount_total=Decimal("300.00"),
+        amount_remaining=Decimal("200.00"),
+        status="active",
+        strategy="fixed",
+        fixed_amount=Decimal("100.00"),
+    )
+    test_db.add(advance)
+    test_db.flush()
+    test_db.add(AdvanceRepayment(advance_id=advance.id, amount=Decimal("100.00"), source="manual"))
+    test_db.commit()
+
+    crud.delete_model(test_db, crud.get_model(test_db, model_id))
+
+    assert crud.get_model(test_db, model_id) is None
+    assert test_db.query(Payout).filter(Payout.model_id == model_id).count() == 0
+    assert test_db.query(ValidationIssue).filter(ValidationIssue.model_id == model_id).count() == 0
+    assert test_db.query(ModelAdvance).filter(ModelAdvance.model_id == model_id).count() == 0
+    assert test_db.query(AdvanceRepayment).count() == 0
+
+
+def test_delete_model_with_loaded_collections(test_db: Session):
+    model_id = _create_model(test_db)
+    _seed_related(test_db, model_id)
+
+    model = crud.get_model(test_db, model_id)
+    # Bulk deletes skip identity map sync; already loaded children must not be deleted twice
+    assert model.payouts and model.compensation_adjustments
+    crud.delete_model(test_db, model)
+
+    assert crud.get_model(test_db, model_id) is None
+    assert test_db.query(Payout).filter(Payout.model_id == model_id).count() == 0
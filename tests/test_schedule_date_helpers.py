@@ -71,3 +71,12 @@ def test_format_range_label_variations():
     assert schedules._format_range_label(today, None, "Fallback").startswith("Since")
     assert schedules._format_range_label(None, today, "Fallback").startswith("Through")
     assert schedules._format_range_label(None, None, "Fallback") == "Fallback"
+
+
+def test_format_cycle_display_matches_display_date_and_is_cached():
+    from app.core.formatting import format_cycle_display, format_display_date
+
+    format_cycle_display.cache_clear()
+    assert format_cycle_display(2025, 3) == format_display_date(date(2025, 3, 1)) == "03/01/2025"
+    format_cycle_display(2025, 3)
+    assert format_cycle_display.cache_info().hits == 1
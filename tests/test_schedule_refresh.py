@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from app.database import SessionLocal, engine
+from app.models import Model, ModelAdvance, Payout, PayoutAdvanceAllocation
+from app.services import PayrollService
+
+
+def _model(code: str, frequency: str, amount: str) -> Model:
+    return Model(
+        code=code,
+        status="Active",
+        real_name=f"{code} Real",
+        working_name=f"{code} Working",
+        start_date=date(2024, 1, 1),
+        payment_method="Wire",
+        payment_frequency=frequency,
+        amount_monthly=Decimal(amount),
+    )
+
+
+def test_rerunning_payroll_updates_existing_payouts_in_place(tmp_path):
+    session = SessionLocal()
+    try:
+        session.add_all([_model("KEEP1", "monthly", "1000"), _model("DROP1", "monthly", "500")])
+        session.commit()
+
+        service = PayrollService(session)
+        *_, run_id = service.run_payroll(2024, 3, "USD", False, tmp_path)
+
+        kept = session.query(Payout).filter_by(schedule_run_id=run_id, code="KEEP1").one()
+        kept_id = kept.id
+        kept.status = "paid"
+        kept.notes = "Sent manually"
+        session.query(Model).filter_by(code="KEEP1").one().amount_monthly = Decimal("1200")
+        session.query(Model).filter_by(code="DROP1").one().status = "Inactive"
+        session.commit()
+
+        *_, rerun_id = service.run_payroll(2024, 3, "USD", False, tmp_path)
+        session.expire_all()
+
+        assert rerun_id == run_id
+        payouts = session.query(Payout).filter_by(schedule_run_id=run_id).all()
+        assert [payout.code for payout in payouts] == ["KEEP1"]
+        refreshed = payouts[0]
+        assert refreshed.id == kept_id
+        assert refreshed.amount == Decimal("1200")
+        assert refreshed.status == "paid"
+        assert refreshed.notes == "Sent manually"
+    finally:
+        session.close()
+
+
+def test_payroll_run_records_advance_allocations_against_new_payouts(tmp_path):
+    session = SessionLocal()
+    try:
+        model = _model("ADV1", "monthly", "1000")
+        session.add(model)
+        session.flush()
+        session.add(
+            ModelAdvance(
+                model_id=model.id,
+                amount_total=Decimal("300"),
+                amount_remaining=Decimal("300"),
+                status="active",
+                strategy="fixed",
+                fixed_amount=Decimal("200"),
+            )
+        )
+        session.commit()
+
+        *_, run_id = PayrollService(session).run_payroll(2024, 3, "USD", False, tmp_path)
+        session.expire_all()
+
+        payout = session.query(Payout).filter_by(schedule_run_id=run_id, code="ADV1").one()
+        allocation = session.query(PayoutAdvanceAllocation).filter_by(schedule_run_id=run_id).one()
+        assert allocation.payout_id == payout.id
+        assert allocation.planned_amount == Decimal("200")
+        assert payout.amount == Decimal("800")
+    finally:
+        session.close()
+
+
+def test_payroll_run_loads_compensation_adjustments_in_one_query(tmp_path, capture_sql):
+    session = SessionLocal()
+    try:
+        session.add_all([_model(f"ADJ{index}", "monthly", "1000") for index in range(3)])
+        session.commit()
+
+        with capture_sql(engine) as statements:
+            PayrollService(session).run_payroll(2024, 3, "USD", False, tmp_path)
+
+        adjustment_selects = [
+            statement
+            for statement in statements
+            if statement.lstrip().upper().startswith("SELECT") and "FROM model_compensation_adjustments" in statement
+        ]
+        assert len(adjustment_selects) == 1
+    finally:
+        session.close()
+
+
+def test_payroll_run_inserts_payouts_and_allocations_in_single_batches(tmp_path, capture_sql):
+    session = SessionLocal()
+    try:
+        models = [_model(f"BATCH{index}", "weekly", "1000") for index in range(5)]
+        session.add_all(models)
+        session.flush()
+        session.add_all(
+            ModelAdvance(
+                model_id=model.id,
+                amount_total=Decimal("1000"),
+                amount_remaining=Decimal("1000"),
+                status="active",
+                strategy="fixed",
+                fixed_amount=Decimal("10"),
+            )
+            for model in models
+        )
+        session.commit()
+
+        with capture_sql(engine) as statements:
+            *_, run_id = PayrollService(session).run_payroll(2024, 3, "USD", False, tmp_path)
+
+        assert session.query(Payout).filter_by(schedule_run_id=run_id).count() > len(models)
+        assert sum(statement.startswith("INSERT INTO payouts") for statement in statements) == 1
+        assert sum(statement.startswith("INSERT INTO payout_advance_allocations") for statement in statements) == 1
+    finally:
+        session.close()
+
+
+def test_model_id_lookups_are_reused_until_a_model_changes(capture_sql):
+    from app.crud import _model_ids_by_code
+
+    session = SessionLocal()
+    try:
+        model = _model("CACHE1", "monthly", "1000")
+        session.add(model)
+        session.commit()
+        model_id = model.id
+
+        with capture_sql(engine) as statements:
+            assert _model_ids_by_code(session, ["CACHE1"]) == {"CACHE1": model_id}
+            assert _model_ids_by_code(session, ["CACHE1"]) == {"CACHE1": model_id}
+            lookups = [statement for statement in statements if "FROM models" in statement]
+            assert len(lookups) == 1
+
+            model.code = "CACHE2"
+            session.flush()
+            assert _model_ids_by_code(session, ["CACHE1", "CACHE2"]) == {"CACHE2": model_id}
+    finally:
+        session.rollback()
+        session.close()
+
+
+def test_paying_payout_realizes_allocations_with_batched_advance_updates(tmp_path, capture_sql):
+    from app import crud
+
+    session = SessionLocal()
+    try:
+        model = _model("REPAY1", "monthly", "1000")
+        session.add(model)
+        session.flush()
+        advances = [
+            ModelAdvance(
+                model_id=model.id,
+                amount_total=Decimal(total),
+                amount_remaining=Decimal(total),
+                status="active",
+                strategy="fixed",
+                fixed_amount=Decimal("100"),
+            )
+            for total in ("100", "300")
+        ]
+        session.add_all(advances)
+        session.commit()
+        advance_ids = [advance.id for advance in advances]
+
+        *_, run_id = PayrollService(session).run_payroll(2024, 3, "USD", False, tmp_path)
+        payout = session.query(Payout).filter_by(schedule_run_id=run_id, code="REPAY1").one()
+
+        with capture_sql(engine) as statements:
+            crud.update_payout(session, payout, None, "paid")
+        session.expire_all()
+
+        settled, partial = (session.get(ModelAdvance, advance_id) for advance_id in advance_ids)
+        assert (settled.status, settled.amount_remaining) == ("closed", Decimal("0"))
+        assert (partial.status, partial.amount_remaining) == ("active", Decimal("200"))
+        assert sorted(repayment.amount for repayment in partial.repayments + settled.repayments) == [
+            Decimal("100"),
+            Decimal("100"),
+        ]
+        assert session.query(PayoutAdvanceAllocation).filter_by(payout_id=payout.id).count() == 0
+        assert sum(statement.startswith("UPDATE model_advances") for statement in statements) == 2
+    finally:
+        session.close()
+
+
+def test_outstanding_advance_total_tracks_advance_changes():
+    from app import crud
+
+    session = SessionLocal()
+    try:
+        model = _model("CACHEADV", "monthly", "1000")
+        session.add(model)
+        session.flush()
+        first, second = (
+            ModelAdvance(model_id=model.id, amount_total=Decimal(total), amount_remaining=Decimal(total), status="active")
+            for total in ("300", "200")
+        )
+        session.add_all([first, second])
+        session.commit()
+        assert crud.outstanding_advance_total(session, model.id) == Decimal("500")
+
+        crud.record_advance_repayment(session, first, amount=Decimal("300"))
+        assert crud.outstanding_advance_total(session, model.id) == Decimal("200")
+
+        session.delete(second)
+        session.commit()
+        assert crud.outstanding_advance_total(session, model.id) == Decimal("0")
+    finally:
+        session.close()
@@ -32,7 +32,7 @@ def _create_run(session, year: int, month: int, total: str = "0") -> ScheduleRun
         include_inactive=False,
         summary_models_paid=0,
         summary_total_payout=Decimal(total),
-        summary_frequency_counts="{}",
+        summary_frequency_counts={},
         export_path="exports",
     )
     session.add(run)
@@ -117,3 +117,26 @@ def test_dashboard_totals_ignore_deleted_models():
         assert dashboard["selected_runs"][0].summary_total_payout == Decimal("100.00")
     finally:
         session.close()
+
+
+def test_paid_totals_by_run_matches_run_payment_summary():
+    session = SessionLocal()
+    try:
+        model = _create_model(session, "PTR1")
+        january = _create_run(session, 2024, 1)
+        february = _create_run(session, 2024, 2)
+        empty = _create_run(session, 2024, 3)
+        _create_payout(session, january, model, "100.00", status="paid")
+        _create_payout(session, january, model, "30.00", status="not_paid")
+        _create_payout(session, january, None, "55.00", status="paid")
+        _create_payout(session, february, model, "70.00", status="paid")
+
+        run_ids = [january.id, february.id, empty.id]
+        totals = crud.paid_totals_by_run(session, run_ids)
+        assert totals == {january.id: Decimal("100.00"), february.id: Decimal("70.00")}
+        for run_id in run_ids:
+            expected = crud.run_payment_summary(session, run_id)["paid_total"]
+            assert totals.get(run_id, Decimal("0")) == expected
+        assert crud.paid_totals_by_run(session, []) == {}
+    finally:
+        session.close()
@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_versioned_static_assets_are_cached_as_immutable():
+    client = TestClient(app)
+    resp = client.get("/static/css/styles.css?v=2.20.0")
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+def test_unversioned_static_assets_revalidate_with_etag():
+    client = TestClient(app)
+    resp = client.get("/static/css/styles.css")
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"] == "no-cache"
+    etag = resp.headers["etag"]
+
+    revalidated = client.get("/static/css/styles.css", headers={"if-none-match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["cache-control"] == "no-cache"
+
+
+def test_hot_templates_are_compiled_at_startup():
+    from app.dependencies import HOT_TEMPLATES, templates, warm_templates
+
+    templates.env.cache.clear()
+    warm_templates()
+    cached = {key[1] for key in templates.env.cache.keys()}
+    assert set(HOT_TEMPLATES) <= cached
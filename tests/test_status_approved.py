@@ -34,7 +34,7 @@ def _make_run_with_payout(session, model: Model, pay_date: date):
         include_inactive=False,
         summary_models_paid=0,
         summary_total_payout=Decimal("0"),
-        summary_frequency_counts="{}",
+        summary_frequency_counts={},
         export_path="exports",
     )
     session.add(run)